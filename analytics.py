@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+文章趋势分析
+从本地文章归档读取累积的文章（附带摘要缓存中的中文摘要），整理为列式表（每个字段一列，
+安装 numpy 时数值列为 numpy 数组），按 feed 和周统计服务名/词频并计算 TF-IDF 趋势：
+以 feed 中的每一周为一个文档，某周中出现多、其他周中出现少的词得分高。
+列式表可导出为 Parquet/Arrow（需 pyarrow）、NPZ（需 numpy）或列式 JSON
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 numpy 时使用纯 Python 实现（结果相同，适合较小的数据量）
+    np = None
+
+# 服务名：Amazon/AWS 后接 1-3 个首字母大写的词（如 Amazon Bedrock、AWS Lambda、Amazon EC2 Auto Scaling）
+SERVICE_NAME = re.compile(r'\b(?:Amazon|AWS)(?:\s+(?:[A-Z][A-Za-z0-9]*|[0-9][A-Za-z0-9]*)){1,3}')
+# 服务名后常见的非名称词，遇到时截断
+SERVICE_STOP_WORDS = {
+    'Now', 'Is', 'Are', 'Adds', 'Announces', 'Launches', 'Introduces', 'Supports', 'Expands', 'Releases',
+    'In', 'On', 'For', 'With', 'And', 'The', 'To', 'At', 'By', 'Of', 'From', 'Region', 'Regions'
+}
+WORD = re.compile(r'[a-z][a-z0-9\-]{2,}')
+TAG = re.compile(r'<[^>]+>')
+ENTITY = re.compile(r'&[#\w]+;')
+STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'you', 'your', 'this', 'that', 'are', 'can', 'now', 'from', 'using', 'use',
+    'new', 'how', 'our', 'more', 'will', 'also', 'have', 'has', 'into', 'when', 'which', 'their', 'about',
+    'available', 'today', 'amazon', 'aws', 'service', 'services', 'customers', 'post', 'blog', 'learn'
+}
+
+TERM_KINDS = ('services', 'words')
+
+# 分析文本：标题 + description + 正文开头
+MAX_CONTENT_CHARS = 2000
+
+# 1970-01-01 是星期四：天数加 3 后对 7 取余为星期几（星期一为 0）
+EPOCH = date(1970, 1, 1)
+EPOCH_WEEKDAY_OFFSET = 3
+
+DEFAULT_WEEKS = 13
+DEFAULT_TOP = 10
+
+EXPORT_FORMATS = ('.parquet', '.arrow', '.feather', '.npz', '.json')
+
+
+def extract_terms(text: str, kind: str = 'services') -> List[str]:
+    """从文本中提取服务名（services）或去除停用词后的小写词（words），按出现顺序返回（含重复）"""
+    text = ENTITY.sub(' ', TAG.sub(' ', text))
+    if kind == 'words':
+        return [w for w in WORD.findall(text.lower()) if w not in STOP_WORDS]
+    terms = []
+    for match in SERVICE_NAME.finditer(text):
+        words = match.group().split()
+        for position in range(1, len(words)):
+            if words[position] in SERVICE_STOP_WORDS:
+                words = words[:position]
+                break
+        if len(words) > 1:
+            terms.append(' '.join(words))
+    return terms
+
+
+def week_start(days):
+    """返回某天（1970-01-01 起的天数）所在周星期一的天数，也可传入 numpy 数组"""
+    return days - (days + EPOCH_WEEKDAY_OFFSET) % 7
+
+
+def week_label(days: int) -> str:
+    """周的显示名（ISO 周，如 2025-W34）"""
+    year, week, _ = (EPOCH + timedelta(days=days)).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _array(values, dtype):
+    return np.asarray(values, dtype=dtype) if np is not None else list(values)
+
+
+class ArticleTable:
+    """列式文章表
+
+    columns 为每个字段一列（feed、title、link、pub_date、author、summary）；
+    feed_code、day 为每篇文章的 feed 编号和发布日期（1970-01-01 起的天数）；
+    词项按 (term_doc, term_id) 两列扁平存储，每次出现一行，vocabulary 为词项编号到文本的映射。
+    """
+
+    def __init__(self, rows: Sequence[Dict], kind: str = 'services'):
+        self.kind = kind
+        self.feeds: List[str] = sorted({row['feed'] for row in rows})
+        feed_index = {feed: code for code, feed in enumerate(self.feeds)}
+        self.columns: Dict[str, List[str]] = {
+            name: [row.get(name) or '' for row in rows]
+            for name in ('feed', 'title', 'link', 'pub_date', 'author', 'summary')
+        }
+        self.feed_code = _array([feed_index[row['feed']] for row in rows], 'int32')
+        self.day = _array([(date.fromisoformat(row['pub_date'][:10]) - EPOCH).days for row in rows], 'int32')
+
+        self.vocabulary: List[str] = []
+        vocabulary_index: Dict[str, int] = {}
+        term_doc: List[int] = []
+        term_id: List[int] = []
+        for doc, row in enumerate(rows):
+            for term in extract_terms(row.get('text') or row.get('title', ''), kind):
+                code = vocabulary_index.get(term)
+                if code is None:
+                    code = vocabulary_index[term] = len(self.vocabulary)
+                    self.vocabulary.append(term)
+                term_doc.append(doc)
+                term_id.append(code)
+        self.term_doc = _array(term_doc, 'int64')
+        self.term_id = _array(term_id, 'int64')
+
+    def __len__(self):
+        return len(self.columns['link'])
+
+    def doc_terms(self) -> List[List[str]]:
+        """每篇文章的词项列表（导出用）"""
+        terms: List[List[str]] = [[] for _ in range(len(self))]
+        for doc, code in zip(self.term_doc, self.term_id):
+            terms[int(doc)].append(self.vocabulary[int(code)])
+        return terms
+
+
+def load_articles(archive, start_dt: datetime, end_dt: datetime, feed_names: Dict[str, str],
+                  summaries: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """从归档读取 feed_names（{feed URL: 名称}）中各 feed 在时间范围内的文章，附带摘要和分析文本"""
+    summaries = summaries or {}
+    rows = []
+    seen = set()
+    for feed_url, title, link, pub_date, author, description, content in archive.query_range(
+            start_dt, end_dt, feed_names, MAX_CONTENT_CHARS):
+        # 同一篇文章被多个 feed 别名指向同一 URL 时只计一次
+        if (feed_url, link) in seen:
+            continue
+        seen.add((feed_url, link))
+        rows.append({
+            'feed': feed_names[feed_url], 'title': title, 'link': link, 'pub_date': pub_date,
+            'author': author, 'summary': summaries.get(link, ''),
+            'text': f"{title}\n{description or ''}\n{content or ''}"
+        })
+    return rows
+
+
+def _entry_stats_numpy(table: ArticleTable, weeks: List[int]):
+    """numpy 实现：返回按 (分组, -TF-IDF, 词项) 排序的 (分组, 词项, 出现次数, 文章数, TF-IDF)，分组 = feed × 周"""
+    n_terms = max(len(table.vocabulary), 1)
+    n_weeks = len(weeks)
+    week_index = np.searchsorted(np.asarray(weeks), week_start(table.day))
+    doc_group = table.feed_code.astype(np.int64) * n_weeks + week_index
+
+    keys, mentions = np.unique(doc_group[table.term_doc] * n_terms + table.term_id, return_counts=True)
+    # 文章数：先对 (文章, 词项) 去重再按分组计数，键集合与 keys 相同
+    doc_keys = np.unique(table.term_doc * n_terms + table.term_id)
+    _, articles = np.unique(doc_group[doc_keys // n_terms] * n_terms + doc_keys % n_terms, return_counts=True)
+
+    group = keys // n_terms
+    term = keys % n_terms
+    totals = np.bincount(group, weights=mentions, minlength=len(table.feeds) * n_weeks)
+    feed = group // n_weeks
+    # 每个 feed 中有文章的周数，以及每个词项出现的周数
+    weeks_per_feed = np.bincount(np.unique(doc_group) // n_weeks, minlength=len(table.feeds))
+    feed_term = feed * n_terms + term
+    feed_terms, weeks_with_term = np.unique(feed_term, return_counts=True)
+    df = weeks_with_term[np.searchsorted(feed_terms, feed_term)]
+    score = mentions / totals[group] * (np.log((1 + weeks_per_feed[feed]) / (1 + df)) + 1)
+
+    # 得分相同时按词项编号排序（与纯 Python 实现一致）
+    order = np.lexsort((term, -np.round(score, 12), group))
+    return (group[order].tolist(), term[order].tolist(), mentions[order].tolist(),
+            articles[order].tolist(), score[order].tolist())
+
+
+def _entry_stats_python(table: ArticleTable, weeks: List[int]):
+    """纯 Python 实现，结果与 _entry_stats_numpy 相同"""
+    n_weeks = len(weeks)
+    week_index = {week: index for index, week in enumerate(weeks)}
+    doc_group = [code * n_weeks + week_index[week_start(day)] for code, day in zip(table.feed_code, table.day)]
+
+    mentions = Counter((doc_group[doc], term) for doc, term in zip(table.term_doc, table.term_id))
+    articles = Counter((doc_group[doc], term) for doc, term in set(zip(table.term_doc, table.term_id)))
+    totals = Counter()
+    for (group, _), count in mentions.items():
+        totals[group] += count
+    weeks_per_feed = Counter(group // n_weeks for group in set(doc_group))
+    df = Counter((group // n_weeks, term) for group, term in mentions)
+
+    entries = []
+    for (group, term), count in mentions.items():
+        feed = group // n_weeks
+        idf = math.log((1 + weeks_per_feed[feed]) / (1 + df[(feed, term)])) + 1
+        entries.append((group, term, count, articles[(group, term)], count / totals[group] * idf))
+    entries.sort(key=lambda e: (e[0], -round(e[4], 12), e[1]))
+    return tuple(map(list, zip(*entries))) if entries else ([], [], [], [], [])
+
+
+def analyze(table: ArticleTable, top: int = DEFAULT_TOP, use_numpy: Optional[bool] = None) -> Dict:
+    """按 feed 和周统计词频和 TF-IDF 趋势
+
+    返回 {feed: {articles, top_terms: [(词项, 出现次数, 文章数)], weeks: [{week, start, articles,
+    top_terms, trending: [(词项, TF-IDF)]}]}}，周按时间倒序。
+    """
+    use_numpy = np is not None if use_numpy is None else use_numpy
+    weeks = sorted({week_start(int(day)) for day in table.day})
+    n_weeks = len(weeks)
+    stats = _entry_stats_numpy if use_numpy else _entry_stats_python
+    groups, terms, mentions, articles, scores = stats(table, weeks) if len(table.term_id) else ([],) * 5
+
+    # 每个分组（feed × 周）的文章数
+    week_index = {week: index for index, week in enumerate(weeks)}
+    doc_counts = Counter(int(code) * n_weeks + week_index[week_start(int(day))]
+                         for code, day in zip(table.feed_code, table.day))
+
+    result = {feed: {'articles': 0, 'top_terms': [], 'weeks': []} for feed in table.feeds}
+    per_group: Dict[int, List[Tuple[int, int, int, float]]] = {}
+    for group, term, count, article_count, score in zip(groups, terms, mentions, articles, scores):
+        per_group.setdefault(group, []).append((term, count, article_count, score))
+
+    feed_totals: Dict[int, Counter] = {}
+    feed_articles: Dict[int, Counter] = {}
+    for group in sorted(doc_counts, reverse=True):
+        feed, week = divmod(group, n_weeks)
+        entries = per_group.get(group, [])
+        by_count = sorted(entries, key=lambda e: (-e[2], -e[1], table.vocabulary[e[0]]))
+        result[table.feeds[feed]]['articles'] += doc_counts[group]
+        result[table.feeds[feed]]['weeks'].append({
+            'week': week_label(weeks[week]),
+            'start': (EPOCH + timedelta(days=weeks[week])).isoformat(),
+            'articles': doc_counts[group],
+            'top_terms': [(table.vocabulary[t], c, a) for t, c, a, _ in by_count[:top]],
+            'trending': [(table.vocabulary[t], round(s, 4)) for t, _, _, s in entries[:top]]
+        })
+        for term, count, article_count, _ in entries:
+            feed_totals.setdefault(feed, Counter())[term] += count
+            feed_articles.setdefault(feed, Counter())[term] += article_count
+
+    for feed, totals in feed_totals.items():
+        ranked = sorted(totals, key=lambda t: (-feed_articles[feed][t], -totals[t], table.vocabulary[t]))
+        result[table.feeds[feed]]['top_terms'] = [
+            (table.vocabulary[t], totals[t], feed_articles[feed][t]) for t in ranked[:top]
+        ]
+    return result
+
+
+def export_table(table: ArticleTable, path: str):
+    """按扩展名导出列式表：.parquet/.arrow/.feather（需 pyarrow）、.npz（需 numpy）或 .json（列式 JSON）"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {extension or path}（支持 {', '.join(EXPORT_FORMATS)}）")
+    columns = dict(table.columns)
+    columns['week'] = [week_label(week_start(int(day))) for day in table.day]
+
+    if extension in ('.parquet', '.arrow', '.feather'):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError(f"导出 {extension} 需要安装 pyarrow（pip install pyarrow）") from None
+        arrow_table = pa.table({**columns, 'terms': table.doc_terms()})
+        if extension == '.parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(arrow_table, path)
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(arrow_table, path)
+        return
+
+    if extension == '.npz':
+        if np is None:
+            raise ImportError("导出 .npz 需要安装 numpy（pip install numpy）")
+        np.savez_compressed(
+            path, **{name: np.asarray(values, dtype=str) for name, values in columns.items()},
+            day=table.day, term_doc=table.term_doc, term_id=table.term_id,
+            vocabulary=np.asarray(table.vocabulary, dtype=str)
+        )
+        return
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'kind': table.kind,
+            'columns': columns,
+            'terms': {
+                'vocabulary': table.vocabulary,
+                'doc': [int(doc) for doc in table.term_doc],
+                'term': [int(term) for term in table.term_id]
+            }
+        }, f, ensure_ascii=False)
+
+
+def render_markdown(result: Dict, kind: str, start_dt: datetime, end_dt: datetime, top: int) -> str:
+    """把分析结果渲染为 Markdown"""
+    label = '服务' if kind == 'services' else '词'
+    lines = [
+        f"# AWS 博客{label}趋势分析",
+        "",
+        f"**分析时间范围**: {start_dt.strftime('%Y年%m月%d日')} 至 {end_dt.strftime('%Y年%m月%d日')}",
+        f"**文章总数**: {sum(feed['articles'] for feed in result.values())}",
+        ""
+    ]
+    for feed, stats in sorted(result.items(), key=lambda item: -item[1]['articles']):
+        if not stats['articles']:
+            continue
+        lines.append(f"## {feed}（{stats['articles']} 篇）")
+        lines.append("")
+        if stats['top_terms']:
+            lines.append(f"**提及最多的{label}**: " + '，'.join(
+                f"{term} ({articles} 篇)" for term, _, articles in stats['top_terms'][:top]))
+            lines.append("")
+        lines.append("| 周 | 文章数 | 提及最多 | TF-IDF 趋势 |")
+        lines.append("|---|---|---|---|")
+        for week in stats['weeks']:
+            frequent = '、'.join(f"{term} ×{count}" for term, count, _ in week['top_terms']) or '-'
+            trending = '、'.join(term for term, _ in week['trending']) or '-'
+            lines.append(f"| {week['week']} | {week['articles']} | {frequent} | {trending} |")
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog='analytics.py',
+                                     description='按 feed 和周统计本地文章归档中的服务名/词频和 TF-IDF 趋势')
+    parser.add_argument('blog_type', nargs='?', default='all',
+                        help='博客类型，多个用逗号分隔 (默认: all)')
+    parser.add_argument('--start', default=None,
+                        help=f'开始时间 (ISO 格式；默认为结束时间前 {DEFAULT_WEEKS} 周)')
+    parser.add_argument('--end', default=None, help='结束时间 (ISO 格式；默认为当前时间)')
+    parser.add_argument('--terms', choices=TERM_KINDS, default='services',
+                        help='统计服务名 (services) 或普通词 (words) (默认: services)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f'每周列出的词项数 (默认: {DEFAULT_TOP})')
+    parser.add_argument('--format', choices=['markdown', 'json'], default='markdown', help='输出格式 (默认: markdown)')
+    parser.add_argument('-o', '--output', default=None, help='结果输出文件 (默认: stdout)')
+    parser.add_argument('--export', default=None,
+                        help='把列式文章表导出到文件，格式由扩展名决定 (.parquet/.arrow/.feather/.npz/.json)')
+    parser.add_argument('--archive-path', default=None)
+    parser.add_argument('--cache-path', default=None, help='摘要缓存文件（导出时附带中文摘要）')
+    parser.add_argument('--no-summaries', action='store_true', help='不读取摘要缓存')
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(sys.argv[1:] if argv is None else argv)
+
+    import pipeline
+    from article_archive import ArticleArchive
+    from date_utils import parse_iso_datetime
+    from rss_parser import AWSBlogRSSParser
+
+    try:
+        end_dt = parse_iso_datetime(args.end) if args.end else datetime.now(timezone.utc).replace(tzinfo=None)
+        start_dt = parse_iso_datetime(args.start) if args.start else end_dt - timedelta(weeks=DEFAULT_WEEKS)
+        url_types = AWSBlogRSSParser().resolve_blog_types(pipeline.split_blog_types(args.blog_type))
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+
+    summaries = {}
+    if not args.no_summaries:
+        from summary_cache import SummaryCache
+        try:
+            cache = SummaryCache(args.cache_path)
+            summaries = cache.latest_by_link()
+            cache.close()
+        except Exception as e:
+            print(f"摘要缓存不可用，导出不附带摘要: {e}", file=sys.stderr)
+
+    archive = ArticleArchive(args.archive_path)
+    try:
+        rows = load_articles(archive, start_dt, end_dt,
+                             {url: types[0] for url, types in url_types.items()}, summaries)
+    finally:
+        archive.close()
+    if not rows:
+        print("归档中没有该时间范围的文章，请先运行 fetch/analyze/watch 积累文章", file=sys.stderr)
+
+    table = ArticleTable(rows, args.terms)
+    result = analyze(table, args.top)
+    print(f"分析 {len(table)} 篇文章，{len(table.vocabulary)} 个{'服务名' if args.terms == 'services' else '词'}"
+          f"（{'numpy' if np is not None else '纯 Python'}）", file=sys.stderr)
+
+    if args.export:
+        try:
+            export_table(table, args.export)
+            print(f"列式数据已导出到 {args.export}", file=sys.stderr)
+        except (ImportError, ValueError) as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
+
+    if args.format == 'json':
+        output = json.dumps(result, indent=2, ensure_ascii=False)
+    else:
+        output = render_markdown(result, args.terms, start_dt, end_dt, args.top)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"分析结果已写入 {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+AWS Blog 文章归档
+基于 SQLite 的本地文章库：解析过的每篇文章按 feed 和 GUID（无 GUID 时用链接）去重写入，
+按 (feed, UTC 发布时间) 建索引；feed 只提供最近的文章，更早的日期范围从归档中查询
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from summary_cache import get_cache_dir
+
+# 按字典序即可比较的 UTC 时间格式
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+ARTICLE_COLUMNS = ('title', 'link', 'pub_date', 'pub_date_raw', 'description',
+                   'content_encoded', 'author', 'guid', 'simhash')
+
+
+class ArticleArchive:
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = os.path.join(get_cache_dir(), 'articles.sqlite3')
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.writes = 0
+
+        # 多个 feed 并发解析时共享连接，所有访问由锁串行化
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                feed_url TEXT NOT NULL,
+                article_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                link TEXT NOT NULL,
+                pub_date TEXT NOT NULL,
+                pub_date_raw TEXT,
+                description TEXT,
+                content_encoded TEXT,
+                author TEXT,
+                guid TEXT,
+                simhash TEXT,
+                archived_at REAL NOT NULL,
+                PRIMARY KEY (feed_url, article_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_feed_date ON articles (feed_url, pub_date);
+            CREATE TABLE IF NOT EXISTS feed_sync (
+                feed_url TEXT PRIMARY KEY,
+                oldest_pub_date TEXT,
+                newest_pub_date TEXT,
+                synced_at REAL NOT NULL
+            );
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(articles)")]
+        if 'simhash' not in columns:
+            self._conn.execute("ALTER TABLE articles ADD COLUMN simhash TEXT")
+        self._conn.commit()
+
+    @staticmethod
+    def article_id(article: Dict) -> str:
+        """文章去重键：优先 GUID，其次链接"""
+        return article.get('guid') or article['link']
+
+    def add_articles(self, feed_url: str, articles: Iterable[Dict]) -> int:
+        """写入（或更新）一次同步得到的文章，并记录 feed 的同步时间和覆盖范围，返回写入条数"""
+        now = time.time()
+        rows = []
+        for article in articles:
+            pub_date = datetime.fromisoformat(article['pub_date']).strftime(DATE_FORMAT)
+            rows.append((
+                feed_url, self.article_id(article), article['title'], article['link'], pub_date,
+                article.get('pub_date_raw'), article.get('description', ''),
+                article.get('content_encoded', ''), article.get('author', ''),
+                article.get('guid'), article.get('simhash'), now
+            ))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO articles "
+                "(feed_url, article_id, title, link, pub_date, pub_date_raw, description, "
+                "content_encoded, author, guid, simhash, archived_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            oldest, newest = self._conn.execute(
+                "SELECT MIN(pub_date), MAX(pub_date) FROM articles WHERE feed_url = ?", (feed_url,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_sync (feed_url, oldest_pub_date, newest_pub_date, synced_at) "
+                "VALUES (?, ?, ?, ?)",
+                (feed_url, oldest, newest, now)
+            )
+            self._conn.commit()
+            self.writes += len(rows)
+        return len(rows)
+
+    def get_sync(self, feed_url: str) -> Optional[Dict]:
+        """返回 feed 的同步信息 {oldest, newest, synced_at}（日期为 UTC naive datetime），从未同步时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT oldest_pub_date, newest_pub_date, synced_at FROM feed_sync WHERE feed_url = ?",
+                (feed_url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'oldest': datetime.strptime(row[0], DATE_FORMAT) if row[0] else None,
+            'newest': datetime.strptime(row[1], DATE_FORMAT) if row[1] else None,
+            'synced_at': datetime.fromtimestamp(row[2], timezone.utc).replace(tzinfo=None)
+        }
+
+    def query(self, feed_url: str, start_dt: datetime, end_dt: datetime) -> List[Dict]:
+        """按索引查询 feed 在 [start_dt, end_dt]（UTC）内的文章，按发布时间倒序返回"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(ARTICLE_COLUMNS)} FROM articles "
+                "WHERE feed_url = ? AND pub_date >= ? AND pub_date <= ? "
+                "ORDER BY pub_date DESC",
+                (feed_url, start_dt.strftime(DATE_FORMAT), end_dt.strftime(DATE_FORMAT))
+            ).fetchall()
+        articles = []
+        for row in rows:
+            article = dict(zip(ARTICLE_COLUMNS, row))
+            for optional in ('guid', 'simhash'):
+                if article[optional] is None:
+                    del article[optional]
+            articles.append(article)
+        return articles
+
+    def query_range(self, start_dt: datetime, end_dt: datetime, feed_urls: Optional[Iterable[str]] = None,
+                    max_content_chars: int = 2000) -> List[tuple]:
+        """按发布时间查询多个 feed（默认全部）的文章，返回 (feed_url, title, link, pub_date, author,
+        description, content_encoded 开头) 元组列表，供批量分析使用（正文只取开头，避免读取全文）
+        """
+        params: List = [max_content_chars, start_dt.strftime(DATE_FORMAT), end_dt.strftime(DATE_FORMAT)]
+        condition = ''
+        if feed_urls is not None:
+            feed_urls = list(feed_urls)
+            condition = f" AND feed_url IN ({', '.join('?' * len(feed_urls))})"
+            params.extend(feed_urls)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT feed_url, title, link, pub_date, author, description, substr(content_encoded, 1, ?) "
+                f"FROM articles WHERE pub_date >= ? AND pub_date <= ?{condition} ORDER BY pub_date",
+                params
+            ).fetchall()
+
+    def count(self, feed_url: Optional[str] = None) -> int:
+        """返回归档文章数（可按 feed 过滤）"""
+        with self._lock:
+            if feed_url is None:
+                return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM articles WHERE feed_url = ?", (feed_url,)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
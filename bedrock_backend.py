@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Bedrock 模型调用后端
+- boto3: 进程内调用，复用连接池中的 HTTPS 连接，响应直接在内存中解析
+- cli:   调用 aws CLI（原有方式），作为未安装 boto3 时的备用
+- endpoint: 调用兼容的 HTTP 端点（如 benchmarks/stream_server.py 本地替身服务），用于测试流式输出
+- stub:  本地桩后端，不访问网络，用于测试和演示
+
+invoke_stream 按 invoke-model-with-response-stream 语义逐段产出生成的文本，
+不支持流式的后端等待完整响应后一次产出；传入 on_usage 时回调响应中的 token 用量（含提示缓存读写）
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import urllib.parse
+from typing import Callable, Dict, Iterator, Optional
+
+THROTTLING_ERROR_CODES = ('ThrottlingException', 'TooManyRequestsException')
+
+# 流式响应中表示错误的事件名（Bedrock event stream 的异常事件）
+STREAM_ERROR_EVENTS = ('internalServerException', 'modelStreamErrorException', 'validationException',
+                       'serviceUnavailableException', 'modelTimeoutException')
+
+# 各模型响应中 token 用量字段的名称：Claude 为 usage.*_tokens，Nova 为 usage.*Tokens，
+# 流式响应末尾的 amazon-bedrock-invocationMetrics 为 *TokenCount
+USAGE_FIELDS = {
+    'input_tokens': ('input_tokens', 'inputTokens', 'inputTokenCount'),
+    'output_tokens': ('output_tokens', 'outputTokens', 'outputTokenCount'),
+    'cache_read_tokens': ('cache_read_input_tokens', 'cacheReadInputTokens', 'cacheReadInputTokenCount'),
+    'cache_write_tokens': ('cache_creation_input_tokens', 'cacheWriteInputTokens', 'cacheWriteInputTokenCount')
+}
+
+# endpoint 后端的默认地址（benchmarks/stream_server.py 的默认端口）
+DEFAULT_ENDPOINT_URL = 'http://127.0.0.1:8765'
+
+
+class ModelInvocationError(Exception):
+    """模型调用失败"""
+
+
+class ThrottlingError(ModelInvocationError):
+    """模型调用被限流"""
+
+
+def response_text(response: Dict) -> str:
+    """从 Claude（content）或 Nova（output.message.content）的完整响应中取出生成的文本"""
+    content = response.get('content')
+    if content is None:
+        content = response.get('output', {}).get('message', {}).get('content', [])
+    return ''.join(part.get('text', '') for part in content)
+
+
+def request_prompt(body: Dict) -> str:
+    """拼接请求体中系统提示和用户消息的文本（Claude 和 Nova 格式），供桩后端和测试检查提示内容"""
+    parts = []
+    system = body.get('system') or []
+    if isinstance(system, str):
+        system = [{'text': system}]
+    parts.extend(block.get('text', '') for block in system)
+    for message in body.get('messages', []):
+        content = message.get('content', '')
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block.get('text', '') for block in content)
+    return '\n\n'.join(part for part in parts if part)
+
+
+def usage_tokens(usage: Optional[Dict]) -> Dict[str, int]:
+    """把各模型的用量字段统一为 {input_tokens, output_tokens, cache_read_tokens, cache_write_tokens}，
+    只包含响应中出现的字段
+    """
+    tokens = {}
+    for name, aliases in USAGE_FIELDS.items():
+        for alias in aliases:
+            if (usage or {}).get(alias) is not None:
+                tokens[name] = int(usage[alias])
+                break
+    return tokens
+
+
+def response_usage(response: Dict) -> Dict[str, int]:
+    """从完整响应中取出 token 用量"""
+    return usage_tokens(response.get('usage'))
+
+
+def stream_event_usage(event: Dict) -> Dict[str, int]:
+    """从一个流式响应事件中取出 token 用量，后到的事件覆盖同名字段
+
+    Claude 的 message_start 包含输入用量，message_delta 包含累计输出用量；
+    Nova 的 metadata 事件包含全部用量；Bedrock 在最后一个事件附带 amazon-bedrock-invocationMetrics。
+    """
+    if 'amazon-bedrock-invocationMetrics' in event:
+        return usage_tokens(event['amazon-bedrock-invocationMetrics'])
+    if event.get('type') == 'message_start':
+        return response_usage(event.get('message', {}))
+    if event.get('type') == 'message_delta':
+        return response_usage(event)
+    if 'metadata' in event:
+        return response_usage(event['metadata'])
+    return {}
+
+
+def stream_event_text(event: Dict) -> str:
+    """从一个流式响应事件中取出新增的文本，非文本事件返回空字符串，错误事件抛出异常
+
+    Claude 为 content_block_delta 事件，Nova 为 contentBlockDelta 事件。
+    """
+    if 'throttlingException' in event:
+        raise ThrottlingError(f"ThrottlingException: {event['throttlingException'].get('message', '')}")
+    for name in STREAM_ERROR_EVENTS:
+        if name in event:
+            raise ModelInvocationError(f"{name}: {event[name].get('message', '')}")
+    if event.get('type') == 'content_block_delta':
+        return event.get('delta', {}).get('text', '')
+    if 'contentBlockDelta' in event:
+        return event['contentBlockDelta'].get('delta', {}).get('text', '')
+    return ''
+
+
+class BedrockBackend:
+    name = 'base'
+
+    def invoke(self, model_id: str, body: Dict, timeout: float = 30) -> Dict:
+        """调用模型并返回解析后的响应 JSON"""
+        raise NotImplementedError
+
+    def invoke_stream(self, model_id: str, body: Dict, timeout: float = 30,
+                      on_usage: Optional[Callable[[Dict[str, int]], None]] = None) -> Iterator[str]:
+        """流式调用模型，逐段产出生成的文本；默认等待完整响应后一次产出
+
+        on_usage 在收到用量信息时回调（统一字段名，可能多次回调，后到的值覆盖同名字段）。
+        """
+        response = self.invoke(model_id, body, timeout)
+        if on_usage is not None:
+            on_usage(response_usage(response))
+        yield response_text(response)
+
+
+class Boto3Backend(BedrockBackend):
+    name = 'boto3'
+
+    def __init__(self, region: Optional[str] = None, max_pool_connections: int = 32,
+                 default_timeout: float = 30):
+        import boto3
+
+        self.region = region
+        self.max_pool_connections = max_pool_connections
+        self._session = boto3.session.Session()
+        self._clients: Dict[float, object] = {}
+        self._lock = threading.Lock()
+        # 立即创建默认 client，区域/凭证配置错误在启动时暴露而不是在每次调用时
+        self._client_for(default_timeout)
+
+    def _client_for(self, timeout: float):
+        """按读取超时返回 client（每种超时一个 client，各自复用连接池）"""
+        from botocore.config import Config
+
+        with self._lock:
+            client = self._clients.get(timeout)
+            if client is None:
+                # 重试由调用方（自适应并发 + 熔断 + 备用模型）负责，这里关闭 botocore 自带重试
+                config = Config(
+                    max_pool_connections=self.max_pool_connections,
+                    read_timeout=timeout,
+                    retries={'max_attempts': 0, 'mode': 'standard'}
+                )
+                # client 线程安全，同一超时的所有调用共享连接池
+                client = self._session.client(
+                    'bedrock-runtime', region_name=self.region, config=config
+                )
+                self._clients[timeout] = client
+            return client
+
+    def invoke(self, model_id: str, body: Dict, timeout: float = 30) -> Dict:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self._client_for(timeout).invoke_model(
+                modelId=model_id,
+                body=json.dumps(body),
+                contentType='application/json',
+                accept='application/json'
+            )
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code', '')
+            if code in THROTTLING_ERROR_CODES:
+                raise ThrottlingError(str(e)) from e
+            raise ModelInvocationError(str(e)) from e
+        return json.loads(response['body'].read())
+
+    def invoke_stream(self, model_id: str, body: Dict, timeout: float = 30,
+                      on_usage: Optional[Callable[[Dict[str, int]], None]] = None) -> Iterator[str]:
+        from botocore.exceptions import ClientError, EventStreamError
+
+        try:
+            response = self._client_for(timeout).invoke_model_with_response_stream(
+                modelId=model_id,
+                body=json.dumps(body),
+                contentType='application/json',
+                accept='application/json'
+            )
+            for event in response['body']:
+                if 'chunk' in event:
+                    event = json.loads(event['chunk']['bytes'])
+                if on_usage is not None:
+                    on_usage(stream_event_usage(event))
+                text = stream_event_text(event)
+                if text:
+                    yield text
+        except (ClientError, EventStreamError) as e:
+            code = e.response.get('Error', {}).get('Code', '')
+            if code in THROTTLING_ERROR_CODES or 'throttlingException' in code:
+                raise ThrottlingError(str(e)) from e
+            raise ModelInvocationError(str(e)) from e
+
+
+class CliBackend(BedrockBackend):
+    name = 'cli'
+
+    def invoke(self, model_id: str, body: Dict, timeout: float = 30) -> Dict:
+        # 每次调用使用独立的响应文件，避免并发调用互相覆盖
+        fd, response_path = tempfile.mkstemp(prefix='bedrock_response_', suffix='.json')
+        os.close(fd)
+
+        cmd = [
+            'aws', 'bedrock-runtime', 'invoke-model',
+            '--model-id', model_id,
+            '--body', json.dumps(body),
+            '--cli-binary-format', 'raw-in-base64-out',
+            response_path
+        ]
+
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            if result.returncode != 0:
+                if any(code in result.stderr for code in THROTTLING_ERROR_CODES):
+                    raise ThrottlingError(result.stderr.strip())
+                raise ModelInvocationError(result.stderr.strip())
+
+            with open(response_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        finally:
+            os.remove(response_path)
+
+
+class EndpointBackend(BedrockBackend):
+    """调用 Bedrock 运行时 REST 路径的 HTTP 端点
+
+    POST {base_url}/model/{model_id}/invoke 返回完整响应 JSON；
+    POST {base_url}/model/{model_id}/invoke-with-response-stream 以分块传输返回每行一个事件的 JSON
+    （与 Bedrock 流式事件 chunk 中的内容相同），限流时返回 HTTP 429。
+    """
+    name = 'endpoint'
+
+    def __init__(self, base_url: Optional[str] = None):
+        from http_pool import HTTPConnectionPool
+
+        self.base_url = (base_url or os.environ.get('BEDROCK_ENDPOINT_URL', DEFAULT_ENDPOINT_URL)).rstrip('/')
+        self._pool = HTTPConnectionPool(max_per_host=32)
+
+    def _post(self, model_id: str, action: str, body: Dict, timeout: float):
+        url = f"{self.base_url}/model/{urllib.parse.quote(model_id, safe='')}/{action}"
+        response = self._pool.urlopen(url, headers={'Content-Type': 'application/json'}, timeout=timeout,
+                                      method='POST', body=json.dumps(body).encode('utf-8'))
+        if response.status != 200:
+            message = response.read().decode('utf-8', 'replace')
+            response.close()
+            if response.status == 429:
+                raise ThrottlingError(f"ThrottlingException: {message}")
+            raise ModelInvocationError(f"HTTP {response.status}: {message}")
+        return response
+
+    def invoke(self, model_id: str, body: Dict, timeout: float = 30) -> Dict:
+        with self._post(model_id, 'invoke', body, timeout) as response:
+            return json.loads(response.read())
+
+    def invoke_stream(self, model_id: str, body: Dict, timeout: float = 30,
+                      on_usage: Optional[Callable[[Dict[str, int]], None]] = None) -> Iterator[str]:
+        with self._post(model_id, 'invoke-with-response-stream', body, timeout) as response:
+            for line in response.iter_lines():
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if on_usage is not None:
+                    on_usage(stream_event_usage(event))
+                text = stream_event_text(event)
+                if text:
+                    yield text
+
+
+class StubBackend(BedrockBackend):
+    name = 'stub'
+
+    def __init__(self, responder: Optional[Callable[[str, Dict], str]] = None):
+        self.responder = responder or self._default_responder
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_responder(model_id: str, body: Dict) -> str:
+        return f"[stub:{model_id}] 本地桩后端生成的中文摘要。"
+
+    def invoke(self, model_id: str, body: Dict, timeout: float = 30) -> Dict:
+        with self._lock:
+            self.calls += 1
+        text = self.responder(model_id, body)
+        # 按模型返回与 Bedrock 一致的响应结构
+        if 'anthropic' in model_id:
+            return {'content': [{'type': 'text', 'text': text}]}
+        return {'output': {'message': {'role': 'assistant', 'content': [{'text': text}]}}}
+
+    def invoke_stream(self, model_id: str, body: Dict, timeout: float = 30,
+                      on_usage: Optional[Callable[[Dict[str, int]], None]] = None) -> Iterator[str]:
+        # 按几个字符一段产出，模拟逐 token 的流式响应
+        response = self.invoke(model_id, body, timeout)
+        if on_usage is not None:
+            on_usage(response_usage(response))
+        text = response_text(response)
+        for offset in range(0, len(text), 4):
+            yield text[offset:offset + 4]
+
+
+BACKENDS = {
+    'boto3': Boto3Backend,
+    'cli': CliBackend,
+    'endpoint': EndpointBackend,
+    'stub': StubBackend
+}
+
+_backend: Optional[BedrockBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str = 'auto') -> BedrockBackend:
+    """创建后端；auto 优先使用 boto3，未安装或无法创建 client（如未配置区域）时回退到 aws CLI"""
+    if name == 'auto':
+        try:
+            return Boto3Backend()
+        except ImportError:
+            return CliBackend()
+        except Exception as e:
+            print(f"boto3 后端不可用，回退到 aws CLI: {e}", file=sys.stderr)
+            return CliBackend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}. Available: auto, {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+def set_backend(backend: BedrockBackend):
+    """设置全局后端"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def get_backend() -> BedrockBackend:
+    """返回全局后端，首次使用时按 BEDROCK_BACKEND 环境变量创建（默认 auto）"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(os.environ.get('BEDROCK_BACKEND', 'auto'))
+        return _backend
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+pubDate 解析微基准
+对比原有 strptime 多格式循环与 date_utils 快速解析（冷缓存 / 命中 LRU 缓存）的吞吐
+
+用法: python3 benchmarks/bench_dates.py [--count 50000] [--unique 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from date_utils import parse_rss_date  # noqa: E402
+
+ZONES = ['+0000', 'GMT', '-0700', '+0800', 'PDT']
+
+
+def legacy_parse_date(date_str):
+    """原 AWSBlogRSSParser.parse_date 实现，作为对照"""
+    formats = [
+        "%a, %d %b %Y %H:%M:%S %z",
+        "%a, %d %b %Y %H:%M:%S GMT",
+        "%a, %d %b %Y %H:%M:%S %Z"
+    ]
+    for fmt in formats:
+        try:
+            parsed = datetime.strptime(date_str, fmt)
+            if 'GMT' in date_str:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.replace(tzinfo=None)
+        except ValueError:
+            continue
+    return None
+
+
+def generate_dates(count, unique, seed=42):
+    """生成 count 个 pubDate，其中不同的字符串有 unique 个（模拟多次抓取同一批 feed）"""
+    rng = random.Random(seed)
+    base = datetime(2025, 8, 23)
+    pool = [
+        (base - timedelta(minutes=rng.randrange(60 * 24 * 365))).strftime('%a, %d %b %Y %H:%M:%S ')
+        + rng.choice(ZONES)
+        for _ in range(unique)
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def measure(func, dates):
+    start = time.perf_counter()
+    for value in dates:
+        func(value)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(dates) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='pubDate 解析微基准')
+    parser.add_argument('--count', type=int, default=50000, help='解析的日期数量（默认 50000）')
+    parser.add_argument('--unique', type=int, default=2000, help='不同日期字符串的数量（默认 2000）')
+    args = parser.parse_args()
+
+    dates = generate_dates(args.count, args.unique)
+    unique_dates = list(dict.fromkeys(dates))
+
+    results = [('strptime 循环（原实现）', measure(legacy_parse_date, dates))]
+
+    parse_rss_date.cache_clear()
+    results.append(('快速解析（全部不重复，无缓存命中）', measure(parse_rss_date, unique_dates)))
+
+    parse_rss_date.cache_clear()
+    results.append(('快速解析 + LRU 缓存', measure(parse_rss_date, dates)))
+
+    print(f"日期数量: {len(dates)}，不同字符串: {len(unique_dates)}")
+    for name, (elapsed, rate) in results:
+        print(f"  {name:<28} {elapsed * 1000:9.1f} ms  {rate:12,.0f} 条/秒")
+    info = parse_rss_date.cache_info()
+    print(f"  缓存命中 {info.hits}，未命中 {info.misses}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+基准测试用的本地假模型后端
+模拟 Bedrock 调用延迟，并按比例注入 ThrottlingException；批量翻译提示返回按条目编号组织的 JSON（保留翻译记忆句段中的占位符）；
+模拟提示缓存：缓存点之前的前缀在 TTL 内再次出现时按缓存读取计量，响应中返回与 Bedrock 相同结构的 token 用量
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from typing import Dict, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bedrock_backend import BedrockBackend, ThrottlingError, request_prompt  # noqa: E402
+from content_extractor import estimate_tokens  # noqa: E402
+
+BATCH_ITEM_PATTERN = re.compile(r'^\[(\d+)\] (.*)$', re.MULTILINE)
+# 翻译记忆句段中的区域/服务名称占位符，译文中原样保留
+PLACEHOLDER_PATTERN = re.compile(r'<[RS]\d+>')
+
+# Bedrock 提示缓存条目的存活时间（每次命中后重新计时）
+PROMPT_CACHE_TTL = 300
+
+
+class FakeBedrockBackend(BedrockBackend):
+    name = 'fake'
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.5, throttle_rate: float = 0.0,
+                 seed: int = 42, min_cache_tokens: int = 0):
+        """latency 为平均延迟（秒），jitter 为延迟的相对抖动，throttle_rate 为限流概率，
+        min_cache_tokens 为可缓存前缀的最小 token 数（真实模型有最小长度要求，默认不限制）
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.min_cache_tokens = min_cache_tokens
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._prompt_cache: Dict[Tuple[str, str], float] = {}
+        self.calls: Dict[str, int] = {}
+        self.throttled = 0
+
+    @staticmethod
+    def _cached_prefix(body: Dict) -> str:
+        """返回系统提示中缓存点之前的文本，没有缓存点时返回空字符串"""
+        prefix = []
+        for block in body.get('system') or []:
+            if 'cachePoint' in block:
+                return ''.join(prefix)
+            prefix.append(block.get('text', ''))
+            if 'cache_control' in block:
+                return ''.join(prefix)
+        return ''
+
+    def _usage(self, model_id: str, body: Dict, prompt: str, text: str) -> Dict:
+        """按模型格式计量 token：缓存点之前的前缀首次出现为缓存写入，TTL 内再次出现为缓存读取"""
+        prefix = self._cached_prefix(body)
+        prefix_tokens = estimate_tokens(prefix) if prefix else 0
+        cache_read = cache_write = 0
+        if prefix_tokens and prefix_tokens >= self.min_cache_tokens:
+            now = time.monotonic()
+            key = (model_id, prefix)
+            with self._lock:
+                if self._prompt_cache.get(key, 0) > now:
+                    cache_read = prefix_tokens
+                else:
+                    cache_write = prefix_tokens
+                self._prompt_cache[key] = now + PROMPT_CACHE_TTL
+        input_tokens = max(0, estimate_tokens(prompt) - cache_read - cache_write)
+        output_tokens = estimate_tokens(text)
+        if 'anthropic' in model_id:
+            return {'input_tokens': input_tokens, 'output_tokens': output_tokens,
+                    'cache_read_input_tokens': cache_read, 'cache_creation_input_tokens': cache_write}
+        return {'inputTokens': input_tokens, 'outputTokens': output_tokens,
+                'cacheReadInputTokenCount': cache_read, 'cacheWriteInputTokenCount': cache_write}
+
+    def invoke(self, model_id: str, body: Dict, timeout: float = 30) -> Dict:
+        with self._lock:
+            self.calls[model_id] = self.calls.get(model_id, 0) + 1
+            throttle = self._rng.random() < self.throttle_rate
+            delay = self.latency * (1 + self.jitter * (2 * self._rng.random() - 1))
+        time.sleep(max(0.0, delay))
+        if throttle:
+            with self._lock:
+                self.throttled += 1
+            raise ThrottlingError('ThrottlingException: Too many requests (injected)')
+
+        prompt = request_prompt(body)
+        items = BATCH_ITEM_PATTERN.findall(prompt)
+        if items and 'JSON' in prompt:
+            text = json.dumps({item_id: f"第 {item_id} 条的中文翻译{''.join(PLACEHOLDER_PATTERN.findall(line))}。"
+                               for item_id, line in items}, ensure_ascii=False)
+        else:
+            text = "本文介绍了 AWS 服务的新功能及其应用场景（基准测试假后端生成）。"
+
+        usage = self._usage(model_id, body, prompt, text)
+        if 'anthropic' in model_id:
+            return {'content': [{'type': 'text', 'text': text}], 'usage': usage}
+        return {'output': {'message': {'role': 'assistant', 'content': [{'text': text}]}}, 'usage': usage}
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+合成 RSS feed 生成器
+按 AWS 博客 feed 的结构生成任意规模的 RSS，用于解析吞吐和端到端基准
+
+用法: python3 benchmarks/feed_generator.py --items 2000 --body-bytes 20000 -o large.xml
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+PARAGRAPHS = [
+    "Amazon SageMaker now supports distributed training on managed clusters with automatic "
+    "checkpointing, which lets teams resume long-running jobs after interruptions without losing progress.",
+    "In this post, we show how to build a retrieval augmented generation pipeline with Amazon Bedrock "
+    "Knowledge Bases, Amazon OpenSearch Serverless and AWS Lambda.",
+    "The solution uses Amazon DynamoDB global tables to replicate data across Regions with "
+    "single-digit millisecond latency and an RPO measured in seconds.",
+    "We walk through the architecture, the AWS CloudFormation templates, and the cost model, and "
+    "discuss how to monitor the workload with Amazon CloudWatch.",
+    "Customers can enable the feature from the AWS Management Console, the AWS CLI, or the AWS SDKs "
+    "at no additional cost in all commercial Regions.",
+]
+
+AUTHOR_BIO = ("<h3>About the authors</h3><p><strong>Jane Doe</strong> is a Senior Solutions Architect "
+              "at AWS who helps customers design machine learning platforms.</p>")
+
+CODE_BLOCK = ("<pre><code class=\"lang-python\">import boto3\nclient = boto3.client('bedrock-runtime')\n"
+              "response = client.invoke_model(modelId='model', body='{}')\n</code></pre>")
+
+
+def _body(rng: random.Random, body_bytes: int) -> str:
+    """生成约 body_bytes 字节的 HTML 正文（正文段落 + 代码块 + 作者简介）"""
+    parts = []
+    size = 0
+    while size < body_bytes:
+        paragraph = f"<p>{rng.choice(PARAGRAPHS)}</p>"
+        if rng.random() < 0.15:
+            paragraph += CODE_BLOCK
+        parts.append(paragraph)
+        size += len(paragraph)
+    parts.append(AUTHOR_BIO)
+    return ''.join(parts)
+
+
+def generate_feed(items: int = 200, body_bytes: int = 8000, whats_new: bool = False,
+                  newest: datetime = datetime(2025, 8, 23, 18, 0, 0),
+                  interval_minutes: int = 180, seed: int = 42) -> str:
+    """生成按发布时间倒序排列的 RSS 字符串
+
+    whats_new=True 时只有简短的 description（与 What's New feed 一致），否则包含 content:encoded 正文。
+    """
+    rng = random.Random(seed)
+    entries = []
+    for i in range(items):
+        pub_date = newest - timedelta(minutes=interval_minutes * i)
+        title = f"{'Amazon service update' if whats_new else 'Building on AWS'} #{i}"
+        if whats_new:
+            link = f"https://aws.amazon.com/about-aws/whats-new/2025/08/update-{i}/"
+            extra = ''
+            description = escape(f"{rng.choice(PARAGRAPHS)} {rng.choice(PARAGRAPHS)}")
+        else:
+            link = f"https://aws.amazon.com/blogs/machine-learning/post-{i}/"
+            extra = (f"<dc:creator><![CDATA[Jane Doe]]></dc:creator>\n"
+                     f"<content:encoded><![CDATA[{_body(rng, body_bytes)}]]></content:encoded>\n")
+            description = escape(rng.choice(PARAGRAPHS))
+        entries.append(
+            f"<item>\n<title>{escape(title)}</title>\n<link>{link}</link>\n"
+            f"<guid isPermaLink=\"false\">{link}</guid>\n"
+            f"<pubDate>{pub_date.strftime('%a, %d %b %Y %H:%M:%S +0000')}</pubDate>\n"
+            f"<description>{description}</description>\n{extra}</item>\n"
+        )
+
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/">\n<channel>\n'
+            '<title>Synthetic AWS Blog</title>\n<link>https://aws.amazon.com/blogs/</link>\n'
+            + ''.join(entries) + '</channel>\n</rss>\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成 RSS feed')
+    parser.add_argument('--items', type=int, default=2000, help='文章数 (默认: 2000)')
+    parser.add_argument('--body-bytes', type=int, default=8000, help='每篇正文字节数 (默认: 8000)')
+    parser.add_argument('--whats-new', action='store_true', help="生成只有 description 的 What's New feed")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', default=None, help='输出文件 (默认: stdout)')
+    args = parser.parse_args()
+
+    feed = generate_feed(args.items, args.body_bytes, args.whats_new, seed=args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(feed)
+    else:
+        sys.stdout.write(feed)
+
+
+if __name__ == '__main__':
+    main()
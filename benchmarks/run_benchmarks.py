@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+离线端到端基准测试
+使用录制的 RSS fixture、合成大 feed 和本地假模型后端（可配置延迟和注入限流），
+测量解析吞吐、摘要生成延迟、每篇文章的模型调用次数和完整分析流程耗时，结果输出为 JSON
+
+用法:
+    python3 benchmarks/run_benchmarks.py                       # 运行全部场景，JSON 输出到 stdout
+    python3 benchmarks/run_benchmarks.py --scenarios parse -o result.json
+    python3 benchmarks/run_benchmarks.py --latency 0.2 --throttle-rate 0.05
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fake_backend import FakeBedrockBackend  # noqa: E402
+from feed_generator import generate_feed  # noqa: E402
+from metrics import get_metrics, percentile  # noqa: E402
+
+# fixture 覆盖的日期范围
+START_DATE = '2025-08-17T00:00:00Z'
+END_DATE = '2025-08-23T23:59:59Z'
+
+FIXTURES = {
+    'machine-learning': 'machine-learning.xml',
+    'whats-new': 'whats-new.xml'
+}
+
+SCENARIOS = ('dates', 'parse', 'summarize', 'end_to_end')
+
+
+def latency_summary(samples):
+    """返回延迟样本的统计（秒）"""
+    return {
+        'count': len(samples),
+        'mean': statistics.mean(samples) if samples else None,
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'max': max(samples) if samples else None
+    }
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, FIXTURES[name]), 'rb') as f:
+        return f.read()
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def bench_dates(args):
+    """pubDate 解析吞吐（strptime 原实现 vs 快速路径 + LRU）"""
+    from bench_dates import generate_dates, legacy_parse_date
+    from date_utils import parse_rss_date
+
+    dates = generate_dates(50000, 2000, seed=args.seed)
+    results = {}
+    for name, func in (('legacy_strptime', legacy_parse_date), ('fast_path', parse_rss_date)):
+        parse_rss_date.cache_clear()
+        start = time.perf_counter()
+        for value in dates:
+            func(value)
+        elapsed = time.perf_counter() - start
+        results[name] = {'seconds': elapsed, 'dates_per_second': len(dates) / elapsed}
+    results['count'] = len(dates)
+    return results
+
+
+def bench_parse(args):
+    """parse_rss_items 吞吐：录制的 fixture 与合成大 feed，完整范围和窄范围（提前停止）"""
+    from rss_parser import AWSBlogRSSParser
+
+    feeds = {name: read_fixture(name) for name in FIXTURES}
+    feeds['synthetic_large'] = generate_feed(args.large_items, args.body_bytes, seed=args.seed).encode('utf-8')
+
+    parser = AWSBlogRSSParser()
+    results = {}
+    for name, feed in feeds.items():
+        for label, start_date in (('full_range', '2000-01-01T00:00:00Z'), ('last_week', START_DATE)):
+            timings = []
+            articles = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                articles = parser.parse_rss_items(feed, start_date, END_DATE)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            results[f"{name}/{label}"] = {
+                'bytes': len(feed),
+                'articles': len(articles),
+                'seconds_best': best,
+                'seconds_median': statistics.median(timings),
+                'mb_per_second': len(feed) / best / 1e6,
+                'articles_per_second': len(articles) / best if articles else 0.0
+            }
+            log(f"parse {name}/{label}: {len(articles)} 篇，{best * 1000:.1f} ms")
+    return results
+
+
+def bench_summarize(args):
+    """逐篇调用 generate_chinese_summary 的延迟和模型调用次数（无缓存）"""
+    import blog_analyzer
+    from bedrock_backend import set_backend
+
+    parser_articles = _fixture_articles('machine-learning')
+    backend = FakeBedrockBackend(args.latency, throttle_rate=args.throttle_rate, seed=args.seed,
+                                 min_cache_tokens=args.min_cache_tokens)
+    set_backend(backend)
+    blog_analyzer.configure_rate_limits(concurrency=args.concurrency)
+
+    get_metrics().reset()
+    samples = []
+    start = time.perf_counter()
+    for article in parser_articles:
+        call_start = time.perf_counter()
+        blog_analyzer.generate_chinese_summary(
+            article['title'],
+            blog_analyzer.select_content_source(article, 'machine-learning'),
+            'machine-learning',
+            link=article['link']
+        )
+        samples.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'articles': len(parser_articles),
+        'seconds': elapsed,
+        'latency': latency_summary(samples),
+        'model_calls': dict(backend.calls),
+        'calls_per_article': backend.total_calls() / len(parser_articles),
+        'throttled': backend.throttled,
+        'prompt_cache_hit_rate': get_metrics().prompt_cache_hit_rate()
+    }
+
+
+def bench_end_to_end(args):
+    """完整分析流程：本地 HTTP 服务提供 fixture，获取 → 解析 → 并发生成摘要 → 渲染报告"""
+    import blog_analyzer
+    import pipeline
+    from bedrock_backend import set_backend
+    from rss_parser import AWSBlogRSSParser
+
+    server, base_url = start_fixture_server()
+    try:
+        backend = FakeBedrockBackend(args.latency, throttle_rate=args.throttle_rate, seed=args.seed,
+                                     min_cache_tokens=args.min_cache_tokens)
+        set_backend(backend)
+        blog_analyzer.configure_rate_limits(concurrency=args.concurrency)
+
+        parser = AWSBlogRSSParser()
+        parser.feeds = {name: f"{base_url}/{name}/" for name in FIXTURES}
+
+        get_metrics().reset()
+        start = time.perf_counter()
+        articles = pipeline.fetch_articles(','.join(FIXTURES), START_DATE, END_DATE, parser=parser)
+        fetched = time.perf_counter()
+        report = io.StringIO()
+        pipeline.write_report(report, articles, ','.join(FIXTURES), START_DATE, END_DATE,
+                              concurrency=args.concurrency)
+        finished = time.perf_counter()
+
+        return {
+            'articles': len(articles),
+            'fetch_parse_seconds': fetched - start,
+            'summarize_render_seconds': finished - fetched,
+            'total_seconds': finished - start,
+            'report_bytes': len(report.getvalue().encode('utf-8')),
+            'bytes_downloaded': parser.bytes_downloaded,
+            'model_calls': dict(backend.calls),
+            'calls_per_article': backend.total_calls() / len(articles) if articles else 0.0,
+            'throttled': backend.throttled,
+            'metrics': get_metrics().snapshot()
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _fixture_articles(name):
+    from rss_parser import AWSBlogRSSParser
+    return AWSBlogRSSParser().parse_rss_items(read_fixture(name), START_DATE, END_DATE)
+
+
+def start_fixture_server():
+    """启动提供 /<fixture 名>/ 的本地 HTTP 服务，返回 (server, base_url)"""
+    feeds = {f"/{name}/": read_fixture(name) for name in FIXTURES}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            body = feeds.get(self.path)
+            self.send_response(200 if body is not None else 404)
+            body = body or b''
+            self.send_header('Content-Type', 'application/rss+xml')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+BENCHMARKS = {
+    'dates': bench_dates,
+    'parse': bench_parse,
+    'summarize': bench_summarize,
+    'end_to_end': bench_end_to_end
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线端到端基准测试（输出 JSON）')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"逗号分隔的场景 (默认: {','.join(SCENARIOS)})")
+    parser.add_argument('--large-items', type=int, default=2000, help='合成大 feed 的文章数 (默认: 2000)')
+    parser.add_argument('--body-bytes', type=int, default=8000, help='合成文章正文字节数 (默认: 8000)')
+    parser.add_argument('--latency', type=float, default=0.05, help='假后端平均延迟，秒 (默认: 0.05)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='假后端注入限流的概率 (默认: 0)')
+    parser.add_argument('--concurrency', type=int, default=8, help='摘要生成并发数 (默认: 8)')
+    parser.add_argument('--min-cache-tokens', type=int, default=0,
+                        help='假后端可缓存前缀的最小 token 数，模拟真实模型的提示缓存门槛 (默认: 0)')
+    parser.add_argument('--repeat', type=int, default=3, help='解析场景重复次数 (默认: 3)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', default=None, help='结果 JSON 文件 (默认: stdout)')
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [s for s in scenarios if s not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+
+    result = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'scenarios': {}
+    }
+    for name in scenarios:
+        log(f"运行场景 {name}...")
+        result['scenarios'][name] = BENCHMARKS[name](args)
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        log(f"结果已写入 {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+本地 Bedrock 流式端点替身服务
+提供 endpoint 后端使用的 REST 路径，文本由假后端生成（可配置延迟和注入限流）：
+- POST /model/<model_id>/invoke                     返回完整响应 JSON
+- POST /model/<model_id>/invoke-with-response-stream 以分块传输逐段返回事件，每行一个 JSON
+  （真实 Bedrock 使用二进制 event stream 编码，这里只保留其中 chunk 的 JSON 内容）
+
+用法:
+    python3 benchmarks/stream_server.py --port 8765 --token-delay 0.05
+    BEDROCK_ENDPOINT_URL=http://127.0.0.1:8765 python3 blog_analyzer.py --backend endpoint --stream ...
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bedrock_backend import ThrottlingError, response_text  # noqa: E402
+from fake_backend import FakeBedrockBackend  # noqa: E402
+
+# 每个流式事件包含的字符数（约等于一个中文 token 的几倍）
+DEFAULT_CHUNK_CHARS = 4
+
+
+def stream_events(model_id, text, chunk_chars=DEFAULT_CHUNK_CHARS, usage=None):
+    """把完整文本切分为 Claude（content_block_delta）或 Nova（contentBlockDelta）格式的流式事件
+
+    usage 为完整响应中的 token 用量：Claude 在 message_start 中返回输入用量、在 message_delta 中返回输出用量，
+    Nova 在最后的 metadata 事件中返回全部用量。
+    """
+    usage = usage or {}
+    pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+    if 'anthropic' in model_id:
+        input_usage = {k: v for k, v in usage.items() if k != 'output_tokens'}
+        yield {'type': 'message_start', 'message': {'usage': input_usage}}
+        for piece in pieces:
+            yield {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': piece}}
+        yield {'type': 'message_delta', 'usage': {'output_tokens': usage.get('output_tokens', 0)}}
+        yield {'type': 'message_stop'}
+    else:
+        yield {'messageStart': {'role': 'assistant'}}
+        for piece in pieces:
+            yield {'contentBlockDelta': {'contentBlockIndex': 0, 'delta': {'text': piece}}}
+        yield {'messageStop': {'stopReason': 'end_turn'}}
+        yield {'metadata': {'usage': usage}}
+
+
+def start_stream_server(backend=None, token_delay=0.0, chunk_chars=DEFAULT_CHUNK_CHARS,
+                        host='127.0.0.1', port=0):
+    """在后台线程启动替身服务，返回 (server, base_url)
+
+    backend 生成完整文本（其延迟即首个事件前的等待时间），之后每个事件间隔 token_delay 秒。
+    """
+    backend = backend or FakeBedrockBackend()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, body, content_type='application/json'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            parts = self.path.strip('/').split('/')
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if len(parts) != 3 or parts[0] != 'model' or parts[2] not in ('invoke', 'invoke-with-response-stream'):
+                self._send(404, b'{"message": "not found"}')
+                return
+            model_id = urllib.parse.unquote(parts[1])
+
+            try:
+                response = backend.invoke(model_id, body)
+            except ThrottlingError as e:
+                self._send(429, json.dumps({'message': str(e)}).encode('utf-8'))
+                return
+
+            if parts[2] == 'invoke':
+                self._send(200, json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            events = stream_events(model_id, response_text(response), chunk_chars, response.get('usage'))
+            for index, event in enumerate(events):
+                if index and token_delay:
+                    time.sleep(token_delay)
+                self._write_chunk(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+            self._write_chunk(b'')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地 Bedrock 流式端点替身服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口 (默认: 8765)')
+    parser.add_argument('--latency', type=float, default=0.3, help='首个事件前的平均延迟，秒 (默认: 0.3)')
+    parser.add_argument('--token-delay', type=float, default=0.05, help='事件间隔，秒 (默认: 0.05)')
+    parser.add_argument('--chunk-chars', type=int, default=DEFAULT_CHUNK_CHARS,
+                        help=f'每个事件的字符数 (默认: {DEFAULT_CHUNK_CHARS})')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='注入限流 (HTTP 429) 的概率 (默认: 0)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    backend = FakeBedrockBackend(args.latency, throttle_rate=args.throttle_rate, seed=args.seed)
+    server, base_url = start_stream_server(backend, args.token_delay, args.chunk_chars, args.host, args.port)
+    print(f"流式端点替身服务已启动: {base_url}（Ctrl+C 停止）", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,197 +5,690 @@ AWS Blog RSS 分析器
 支持智能内容选择和差异化处理
 """
 
+import argparse
 import json
-import os
-import subprocess
 import sys
-import urllib.request
-from datetime import datetime
-import re
 import time
 
-def invoke_bedrock_model(content, title, blog_type=""):
-    """调用 Bedrock Claude 3.7 Sonnet 生成中文摘要或翻译"""
-    max_retries = 3
-    base_delay = 2
-    
-    for attempt in range(max_retries):
-        try:
-            # 根据博客类型选择不同的处理方式
-            if blog_type in ['whats-new', 'news']:
-                # What's New 类型使用翻译
-                prompt = f"""请将以下AWS What's New更新内容翻译成中文。要求：
-1. 准确翻译技术术语和服务名称
-2. 保持原文的信息完整性
-3. 使用专业的技术语言
-4. 保持简洁明了
+from bedrock_backend import (
+    ModelInvocationError, ThrottlingError, get_backend, request_prompt, response_text, response_usage
+)
+from content_extractor import estimate_tokens, extract_text
+from deadline import EXTRACT, FALLBACK, degrade_level, request_timeout
+from extractive_summarizer import summarize as extract_key_sentences
+from metrics import get_metrics
+from model_router import DEFAULT_POLICY, POLICIES, ModelProfile, ModelRouter, get_router, set_router
+from rate_limiter import ERROR, SUCCESS, THROTTLED, get_circuit_breaker, get_model_limiter
+from translation_memory import fill_placeholders, get_translation_memory, normalize_segment, split_segments
 
-标题：{title}
+# Bedrock 模型 ID
+CLAUDE_MODEL_ID = 'us.anthropic.claude-3-7-sonnet-20250219-v1:0'
+NOVA_LITE_MODEL_ID = 'us.amazon.nova-lite-v1:0'
 
-内容：
-{content[:1500]}
+# 各模型的按量价格（美元 / 1000 token：输入、输出、缓存读取、缓存写入），用于估算运行成本
+MODEL_PROFILES = {
+    CLAUDE_MODEL_ID: ModelProfile('Claude 3.7 Sonnet', 0.003, 0.015, 0.0003, 0.00375),
+    NOVA_LITE_MODEL_ID: ModelProfile('Nova Lite', 0.00006, 0.00024, 0.000015)
+}
 
-请提供中文翻译："""
-            else:
-                # 其他类型使用摘要
-                prompt = f"""请为以下AWS技术博客生成一个150-200字的中文摘要。要求：
+# 使用翻译（而非摘要）处理的博客类型
+TRANSLATE_BLOG_TYPES = ['whats-new', 'news']
+
+# 各模型默认请求速率（次/分钟）
+DEFAULT_CLAUDE_RPM = 250
+DEFAULT_NOVA_RPM = 40
+DEFAULT_CONCURRENCY = 8
+
+# Claude 连续限流多少次后熔断（直接使用 Nova Lite），熔断多少秒后发送探测请求
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RECOVERY_SECONDS = 30
+
+# 备用模型生成的摘要只短期缓存，过期后重新尝试主模型
+FALLBACK_CACHE_TTL = 6 * 3600
+
+# What's New/News 条目较短，默认每次请求批量翻译的条目数（1 表示逐条翻译）
+DEFAULT_TRANSLATE_BATCH_SIZE = 10
+# 批量翻译的回复 token 上限
+BATCH_MAX_TOKENS = 4096
+# 翻译记忆未命中的句段每次请求最多翻译的句数
+SEGMENT_BATCH_SIZE = 40
+
+# 送入模型的正文 token 预算（由 content_extractor 按段落信息量选取，不再按字符截断）
+SUMMARY_TOKEN_BUDGET = 600
+TRANSLATE_TOKEN_BUDGET = 400
+# 本地抽取式摘要（时间预算不足、模型全部失败或离线模式）的 token 预算
+EXTRACT_TOKEN_BUDGET = 120
+
+# 离线模式：不调用模型，只使用已缓存的摘要或本地抽取式摘要
+_offline = False
+
+# 提示分为稳定的指令前缀（系统提示，其后设置缓存点）和每篇文章的内容后缀：
+# 指令前缀在所有请求中完全相同，Bedrock 提示缓存命中时不再重新处理这部分输入
+SUMMARY_INSTRUCTIONS = """请为用户提供的AWS技术博客生成一个150-200字的中文摘要。要求：
 1. 突出主要技术特性和功能
 2. 说明实际应用价值和场景
 3. 使用专业的技术语言
-4. 不要包含英文原文
+4. 不要包含英文原文"""
 
-博客标题：{title}
+TRANSLATE_INSTRUCTIONS = """请将用户提供的AWS What's New更新内容翻译成中文。要求：
+1. 准确翻译技术术语和服务名称
+2. 保持原文的信息完整性
+3. 使用专业的技术语言
+4. 保持简洁明了"""
 
-博客内容：
-{content[:2000]}
+BATCH_TRANSLATE_INSTRUCTIONS = """请将用户提供的多条AWS What's New更新内容分别翻译成中文。要求：
+1. 准确翻译技术术语和服务名称
+2. 保持原文的信息完整性
+3. 使用专业的技术语言
+4. 保持简洁明了
+5. 只输出一个 JSON 对象，键为方括号中的条目编号（字符串），值为对应条目的中文翻译，不要输出其他内容"""
 
-请生成中文摘要："""
+SEGMENT_TRANSLATE_INSTRUCTIONS = """请将用户提供的多个AWS What's New句子分别翻译成中文。要求：
+1. 准确翻译技术术语
+2. 尖括号占位符（如 <R1>、<S2>）代表区域或服务名称，原样保留在译文中的对应位置，不要翻译、增删或改写
+3. 每条只翻译该句本身，使用专业的技术语言，保持简洁明了
+4. 只输出一个 JSON 对象，键为方括号中的句子编号（字符串），值为对应句子的中文翻译，不要输出其他内容"""
+
+NOVA_SUMMARY_INSTRUCTIONS = "请为用户提供的AWS博客生成150字左右的中文摘要。"
+NOVA_TRANSLATE_INSTRUCTIONS = "请将用户提供的AWS更新内容翻译成简洁的中文。"
+
+def claude_request_body(prompt, system=None, max_tokens=300):
+    """构建 Claude 3.7 Sonnet 的请求体，系统提示之后设置缓存点（cache_control）"""
+    request_body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "temperature": 0.3,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    }
+    if system:
+        request_body["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+    return request_body
 
-            # 构建 Claude 3.7 Sonnet 的请求体格式
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 300,
-                "temperature": 0.3,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
+def nova_request_body(prompt, system=None, max_tokens=200):
+    """构建 Nova Lite 的请求体，系统提示之后设置缓存点（cachePoint）"""
+    request_body = {
+        "messages": [
+            {
+                "role": "user",
+                "content": [{"text": prompt}]
             }
+        ],
+        "inferenceConfig": {
+            "maxTokens": max_tokens,
+            "temperature": 0.3
+        }
+    }
+    if system:
+        request_body["system"] = [{"text": system}, {"cachePoint": {"type": "default"}}]
+    return request_body
+
+def record_usage(model_id, response, request_body):
+    """累计 token 用量和估算成本指标（提示缓存读取/写入的 token 单独计数）
+    
+    响应中没有用量信息时（如 aws CLI 或桩后端）按提示和生成文本的长度估算。
+    """
+    usage = response_usage(response)
+    if not usage:
+        usage = {'input_tokens': estimate_tokens(request_prompt(request_body)),
+                 'output_tokens': estimate_tokens(response_text(response))}
+    metrics = get_metrics()
+    labels = {'model': model_id}
+    for field in ('input_tokens', 'output_tokens', 'cache_read_tokens', 'cache_write_tokens'):
+        if usage.get(field):
+            metrics.increment(f'bedrock_{field}_total', usage[field], labels=labels)
+    metrics.increment('bedrock_cost_usd_total', get_model_router().cost(model_id, usage), labels=labels)
+
+def configure_routing(policy=DEFAULT_POLICY):
+    """按策略名（quality/balanced/cost）配置模型路由，并清空各模型的实时统计"""
+    set_router(ModelRouter(CLAUDE_MODEL_ID, NOVA_LITE_MODEL_ID, MODEL_PROFILES, POLICIES[policy]))
+
+def get_model_router():
+    """返回进程内共享的模型路由器（未配置时使用默认策略）"""
+    router = get_router()
+    if router is None:
+        configure_routing()
+        router = get_router()
+    return router
+
+def record_call(model_id, started, outcome):
+    """把一次模型调用的耗时和结果计入路由器的实时统计"""
+    get_model_router().record(model_id, time.perf_counter() - started, outcome)
+
+def print_routing_summary():
+    """输出各模型的请求数、错误数、平均延迟和估算成本到 stderr"""
+    router = get_model_router()
+    metrics = get_metrics()
+    parts = []
+    for model_id, stats in router.stats().items():
+        if not stats['requests']:
+            continue
+        latency = f"{stats['latency']:.2f}s" if stats['latency'] is not None else '-'
+        cost = metrics.counter('bedrock_cost_usd_total', {'model': model_id})
+        parts.append(f"{router.name(model_id)} {stats['requests']} 次（错误 {stats['errors']}，"
+                     f"平均延迟 {latency}，估算成本 ${cost:.4f}）")
+    if parts:
+        print(f"模型路由 ({router.policy.name}): {'; '.join(parts)}", file=sys.stderr)
+
+def get_processing_mode(blog_type):
+    """返回处理方式：What's New/News 为翻译，其他为摘要"""
+    return 'translate' if blog_type in TRANSLATE_BLOG_TYPES else 'summary'
+
+def select_content_source(article, blog_type):
+    """根据博客类型和可用内容选择最佳内容源"""
+    if blog_type in TRANSLATE_BLOG_TYPES:
+        # What's New 和 News 只有 description，直接使用
+        return article['description']
+    # 其他博客优先使用 content_encoded，回退到 description
+    return article.get('content_encoded', '') or article['description']
+
+def flatten_feed_results(feed_results):
+    """把 {博客类型: {articles, error, ...}} 合并为按发布时间倒序的文章列表，每篇标记来源 feed"""
+    articles = []
+    for feed_type, feed_result in feed_results.items():
+        if feed_result.get('error'):
+            print(f"{feed_type} 获取失败，已跳过: {feed_result['error']}", file=sys.stderr)
+            continue
+        for article in feed_result.get('articles', []):
+            article['feed'] = feed_type
+            articles.append(article)
+    return sorted(articles, key=lambda x: x['pub_date'], reverse=True)
+
+def configure_rate_limits(claude_rpm=DEFAULT_CLAUDE_RPM, nova_rpm=DEFAULT_NOVA_RPM,
+                          concurrency=DEFAULT_CONCURRENCY):
+    """配置各模型的令牌桶限流和自适应并发上限（所有并发线程共享），并重置 Claude 熔断器"""
+    from rate_limiter import configure_circuit_breaker, configure_model_limit
+    
+    configure_model_limit(CLAUDE_MODEL_ID, claude_rpm, max_concurrency=concurrency)
+    configure_model_limit(NOVA_LITE_MODEL_ID, nova_rpm, max_concurrency=concurrency)
+    configure_circuit_breaker(CLAUDE_MODEL_ID, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_SECONDS)
+
+def invoke_streaming(model_id, request_body, on_delta, timeout=30):
+    """流式调用模型，每段文本到达时回调 on_delta(text)，返回与 invoke 结构相同的完整响应（Claude 格式）"""
+    parts = []
+    usage = {}
+    start = time.perf_counter()
+    for text in get_backend().invoke_stream(model_id, request_body, timeout=timeout, on_usage=usage.update):
+        if not parts:
+            get_metrics().observe('bedrock_first_token', time.perf_counter() - start)
+        parts.append(text)
+        on_delta(text)
+    return {'content': [{'type': 'text', 'text': ''.join(parts)}],
+            'usage': {'input_tokens': usage.get('input_tokens'), 'output_tokens': usage.get('output_tokens'),
+                      'cache_read_input_tokens': usage.get('cache_read_tokens'),
+                      'cache_creation_input_tokens': usage.get('cache_write_tokens')}}
 
-            # 调用 AWS CLI 调用 Bedrock
-            cmd = [
-                'aws', 'bedrock-runtime', 'invoke-model',
-                '--model-id', 'us.anthropic.claude-3-7-sonnet-20250219-v1:0',
-                '--body', json.dumps(request_body),
-                '--cli-binary-format', 'raw-in-base64-out',
-                '/tmp/bedrock_response.json'
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode != 0:
-                if "ThrottlingException" in result.stderr and attempt < max_retries - 1:
-                    delay = base_delay * (2 ** attempt)  # 指数退避
-                    print(f"请求被限流，等待 {delay} 秒后重试...", file=sys.stderr)
+def invoke_claude(prompt, max_tokens=300, on_delta=None, system=None):
+    """调用 Bedrock Claude 3.7 Sonnet，返回生成的文本或 None（调用方改用 Nova Lite）
+    
+    限流时不做固定等待：限流器降低并发上限，重试在获得并发槽位后立即发出；
+    持续限流时熔断器打开，直接返回 None，直到探测请求成功。
+    传入 on_delta 时使用流式调用，生成的文本边到达边回调 on_delta(text)。
+    system 为稳定的指令前缀，作为带缓存点的系统提示发送，prompt 为每次请求不同的内容。
+    """
+    max_retries = 3
+    base_delay = 2
+    
+    request_body = claude_request_body(prompt, system, max_tokens)
+    
+    metrics = get_metrics()
+    breaker = get_circuit_breaker(CLAUDE_MODEL_ID)
+    with metrics.timer('invoke_bedrock_model'):
+        for attempt in range(max_retries):
+            # 时间预算即将用完时不再重试，由调用方改用备用路径
+            if attempt and degrade_level():
+                return None
+            if not breaker.allow():
+                metrics.increment('bedrock_short_circuited_total', labels={'model': CLAUDE_MODEL_ID})
+                return None
+            try:
+                # 通过可插拔后端调用 Bedrock（默认 boto3 连接池，回退 aws CLI）
+                metrics.increment('bedrock_requests_total', labels={'model': CLAUDE_MODEL_ID})
+                started = time.perf_counter()
+                try:
+                    with get_model_limiter(CLAUDE_MODEL_ID):
+                        if on_delta is None:
+                            response = get_backend().invoke(CLAUDE_MODEL_ID, request_body,
+                                                            timeout=request_timeout(30))
+                        else:
+                            response = invoke_streaming(CLAUDE_MODEL_ID, request_body, on_delta,
+                                                        timeout=request_timeout(30))
+                except ThrottlingError as e:
+                    breaker.record(THROTTLED)
+                    record_call(CLAUDE_MODEL_ID, started, THROTTLED)
+                    metrics.increment('bedrock_throttled_total', labels={'model': CLAUDE_MODEL_ID})
+                    if attempt < max_retries - 1:
+                        metrics.increment('bedrock_retries_total')
+                        continue
+                    print(f"Bedrock API 调用失败: {e}", file=sys.stderr)
+                    metrics.increment('bedrock_errors_total', labels={'model': CLAUDE_MODEL_ID})
+                    return None
+                except ModelInvocationError as e:
+                    breaker.record(ERROR)
+                    record_call(CLAUDE_MODEL_ID, started, ERROR)
+                    print(f"Bedrock API 调用失败: {e}", file=sys.stderr)
+                    metrics.increment('bedrock_errors_total', labels={'model': CLAUDE_MODEL_ID})
+                    return None
+                breaker.record(SUCCESS)
+                record_call(CLAUDE_MODEL_ID, started, SUCCESS)
+                record_usage(CLAUDE_MODEL_ID, response, request_body)
+                
+                # 提取生成的文本
+                if 'content' in response and len(response['content']) > 0:
+                    return response['content'][0].get('text', '').strip()
+                
+                return None
+                
+            except Exception as e:
+                breaker.record(ERROR)
+                record_call(CLAUDE_MODEL_ID, started, ERROR)
+                metrics.increment('bedrock_errors_total', labels={'model': CLAUDE_MODEL_ID})
+                if attempt < max_retries - 1 and not degrade_level():
+                    delay = base_delay * (2 ** attempt)
+                    print(f"生成摘要时出错: {e}，等待 {delay} 秒后重试...", file=sys.stderr)
+                    metrics.increment('bedrock_retries_total')
+                    metrics.increment('bedrock_backoff_seconds_total', delay)
                     time.sleep(delay)
                     continue
                 else:
-                    print(f"Bedrock API 调用失败: {result.stderr}", file=sys.stderr)
+                    print(f"生成摘要时出错: {e}", file=sys.stderr)
                     return None
-            
-            # 读取响应
-            with open('/tmp/bedrock_response.json', 'r', encoding='utf-8') as f:
-                response = json.load(f)
-            
-            # 提取生成的摘要
-            if 'content' in response and len(response['content']) > 0:
-                summary = response['content'][0].get('text', '').strip()
-                return summary
-            
-            return None
-            
-        except Exception as e:
-            if attempt < max_retries - 1:
-                delay = base_delay * (2 ** attempt)
-                print(f"生成摘要时出错: {e}，等待 {delay} 秒后重试...", file=sys.stderr)
-                time.sleep(delay)
-                continue
-            else:
-                print(f"生成摘要时出错: {e}", file=sys.stderr)
-                return None
     
     return None
 
-def generate_chinese_summary(title, content, blog_type=""):
-    """基于内容使用 Bedrock 生成中文摘要或翻译"""
+def invoke_bedrock_model(content, title, blog_type="", on_delta=None):
+    """调用 Bedrock Claude 3.7 Sonnet 生成中文摘要或翻译（传入 on_delta 时流式输出）"""
+    # 根据博客类型选择不同的处理方式：指令作为缓存的前缀，标题和内容作为后缀
+    if blog_type in TRANSLATE_BLOG_TYPES:
+        # What's New 类型使用翻译
+        system = TRANSLATE_INSTRUCTIONS
+        prompt = f"""标题：{title}
+
+内容：
+{content}
+
+请提供中文翻译："""
+    else:
+        # 其他类型使用摘要
+        system = SUMMARY_INSTRUCTIONS
+        prompt = f"""博客标题：{title}
+
+博客内容：
+{content}
+
+请生成中文摘要："""
+    
+    return invoke_claude(prompt, on_delta=on_delta, system=system)
+
+def invoke_bedrock_translation_batch(items, model_id=CLAUDE_MODEL_ID):
+    """一次请求翻译多条 What's New 条目
+    
+    items 为 [(条目编号, 标题, 内容)]，要求模型返回以条目编号为键的 JSON 对象；
+    返回 {条目编号: 中文翻译}，只包含格式正确的条目，缺失或格式错误的条目由调用方单独重试。
+    """
+    entries = "\n\n".join(
+        f"[{item_id}] 标题：{title}\n内容：{content}" for item_id, title, content in items
+    )
+    prompt = f"""共 {len(items)} 条更新：
+
+{entries}
+
+请输出 JSON："""
+    
+    max_tokens = min(300 * len(items), BATCH_MAX_TOKENS)
+    if model_id == CLAUDE_MODEL_ID:
+        text = invoke_claude(prompt, max_tokens=max_tokens, system=BATCH_TRANSLATE_INSTRUCTIONS)
+    else:
+        text = invoke_nova(prompt, system=BATCH_TRANSLATE_INSTRUCTIONS, max_tokens=max_tokens)
+    return parse_batch_translations(text, [item_id for item_id, _, _ in items])
+
+def invoke_segment_translation(templates, model_id=CLAUDE_MODEL_ID):
+    """一次请求翻译多个句段模板（区域/服务名称为占位符），返回 {句段模板: 译文模板}，只包含格式正确的句段"""
+    item_ids = [str(i) for i in range(1, len(templates) + 1)]
+    entries = "\n".join(f"[{item_id}] {template}" for item_id, template in zip(item_ids, templates))
+    prompt = f"""共 {len(templates)} 个句子：
+
+{entries}
+
+请输出 JSON："""
+    
+    max_tokens = min(80 * len(templates), BATCH_MAX_TOKENS)
+    if model_id == CLAUDE_MODEL_ID:
+        text = invoke_claude(prompt, max_tokens=max_tokens, system=SEGMENT_TRANSLATE_INSTRUCTIONS)
+    else:
+        text = invoke_nova(prompt, system=SEGMENT_TRANSLATE_INSTRUCTIONS, max_tokens=max_tokens)
+    translations = parse_batch_translations(text, item_ids)
+    return {templates[int(item_id) - 1]: translation for item_id, translation in translations.items()}
+
+def translate_from_memory(entries, model_id=None):
+    """用翻译记忆翻译多篇 What's New/News 条目，entries 为 [(键, 清理后的正文)]
+    
+    正文按句切分，已记忆的句段在本地填回区域/服务名称；未命中的句段去重后每 SEGMENT_BATCH_SIZE 句
+    合并为一次请求发给 model_id（None 时只查询不请求），占位符完整的译文写入翻译记忆。
+    返回 {键: 译文}，只包含所有句段都有译文的条目，其余条目由调用方整条翻译。
+    """
+    memory = get_translation_memory()
+    if memory is None:
+        return {}
+    metrics = get_metrics()
+    plans = []
+    # 未命中的句段模板 → 第一次出现的原句
+    missing = {}
+    for key, content in entries:
+        parts = []
+        for segment in split_segments(content):
+            translation, result = memory.lookup(segment)
+            metrics.increment('translation_memory_segments_total', labels={'result': result})
+            if translation is None:
+                template, names = normalize_segment(segment)
+                missing.setdefault(template, segment)
+                parts.append((template, names))
+            else:
+                parts.append(translation)
+        if parts:
+            plans.append((key, parts))
+    
+    learned = {}
+    if missing and model_id is not None:
+        templates = list(missing)
+        for start in range(0, len(templates), SEGMENT_BATCH_SIZE):
+            chunk = templates[start:start + SEGMENT_BATCH_SIZE]
+            for template, translation in invoke_segment_translation(chunk, model_id).items():
+                if memory.add(missing[template], translation, model_id):
+                    learned[template] = translation.strip()
+    
+    results = {}
+    for key, parts in plans:
+        pending = [part for part in parts if not isinstance(part, str)]
+        if any(template not in learned for template, _ in pending):
+            continue
+        results[key] = ''.join(part if isinstance(part, str) else fill_placeholders(learned[part[0]], part[1])
+                               for part in parts)
+        metrics.increment('translation_memory_articles_total',
+                          labels={'source': 'model' if pending else 'memory'})
+    return results
+
+def parse_batch_translations(text, item_ids):
+    """从模型输出中解析 {条目编号: 翻译}，忽略多余、缺失和非字符串的条目"""
+    if not text:
+        return {}
+    # 模型可能在 JSON 外包裹 ```json 代码块或说明文字
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    
+    translations = {}
+    for item_id in item_ids:
+        value = data.get(item_id)
+        if isinstance(value, str) and value.strip():
+            translations[item_id] = value.strip()
+    return translations
+
+def clean_article_content(content, title="", blog_type=""):
+    """提取正文：去掉代码、导航和作者介绍等内容，在该处理方式的 token 预算内保留信息量最高的段落"""
+    budget = TRANSLATE_TOKEN_BUDGET if blog_type in TRANSLATE_BLOG_TYPES else SUMMARY_TOKEN_BUDGET
+    return extract_text(content, budget, title)
+
+def set_offline(enabled=True):
+    """开启/关闭离线模式（进程内共享）"""
+    global _offline
+    _offline = enabled
+
+def is_offline():
+    return _offline
+
+def generate_chinese_summary(title, content, blog_type="", link="", cache=None, fingerprint=None,
+                             on_delta=None):
+    """基于内容使用 Bedrock 生成中文摘要或翻译（可选使用摘要缓存）
+    
+    fingerprint 为文章的近似重复指纹：缓存中有交叉发布的同一篇文章时直接复用其摘要。
+    on_delta 为流式输出回调：未命中缓存时 Claude 生成的文本边到达边回调。
+    离线模式（set_offline）下缓存未命中时使用本地抽取式摘要。
+    """
     if not content or len(content) < 50:
         return "暂无足够内容生成摘要。"
     
-    # 清理内容（移除 HTML 标签）
-    clean_content = re.sub(r'<[^>]+>', ' ', content)
-    clean_content = re.sub(r'[{}"\[\]]', '', clean_content)
-    clean_content = re.sub(r'\s+', ' ', clean_content).strip()
+    clean_content = clean_article_content(content, title, blog_type)
+    if not clean_content:
+        return "暂无足够内容生成摘要。"
     
-    # 调用 Bedrock 生成摘要或翻译
-    bedrock_result = invoke_bedrock_model(clean_content, title, blog_type)
+    # 优先查询摘要缓存（Claude 结果优先；Nova Lite 备用结果只在短期内有效）
+    mode = get_processing_mode(blog_type)
+    cache_link = link or title
+    if cache is not None:
+        cached = cache.get(cache_link, clean_content, [CLAUDE_MODEL_ID, NOVA_LITE_MODEL_ID], mode)
+        if cached:
+            return cached
+        cached = lookup_near_duplicate(cache, fingerprint, mode, blog_type)
+        if cached:
+            return cached
     
-    if bedrock_result:
-        return bedrock_result
+    return generate_uncached_summary(title, clean_content, blog_type, cache_link, cache, fingerprint,
+                                     on_delta)
+
+def generate_degraded_summary(title, content, blog_type="", link="", cache=None, fingerprint=None,
+                              level=FALLBACK):
+    """时间预算不足时的摘要：缓存命中时照常使用，否则 FALLBACK 直接使用 Nova Lite，EXTRACT 使用本地原文摘录
     
-    # 如果 Claude 3.7 调用失败，使用 Nova Lite 备用
-    print("Claude 3.7 调用失败，使用 Nova Lite 备用生成", file=sys.stderr)
+    返回 (摘要, 实际使用的降级方式)，缓存命中或内容不足时降级方式为 None。
+    """
+    if not content or len(content) < 50:
+        return "暂无足够内容生成摘要。", None
     
-    nova_lite_result = invoke_nova_lite_fallback(clean_content, title, blog_type)
-    if nova_lite_result:
-        return nova_lite_result
+    clean_content = clean_article_content(content, title, blog_type)
+    if not clean_content:
+        return "暂无足够内容生成摘要。", None
     
-    # 最后的简化备用逻辑
-    print("Nova Lite 也失败，使用最简备用逻辑", file=sys.stderr)
-    if blog_type in ['whats-new', 'news']:
-        return f"AWS 发布了关于 {title} 的更新。"
-    else:
-        return f"本文介绍了 {title} 相关的 AWS 服务更新和技术特性。"
-
-def generate_markdown_report(blog_type, articles, start_date, end_date):
-    """生成 Markdown 报告"""
-    blog_names = {
-        'aws': 'AWS 主博客',
-        'machine-learning': '机器学习',
-        'database': '数据库',
-        'security': '安全',
-        'compute': '计算服务',
-        'storage': '存储服务',
-        'networking': '网络和内容分发'
-    }
+    mode = get_processing_mode(blog_type)
+    cache_link = link or title
+    if cache is not None:
+        cached = cache.get(cache_link, clean_content, [CLAUDE_MODEL_ID, NOVA_LITE_MODEL_ID], mode)
+        if cached:
+            return cached, None
+        cached = lookup_near_duplicate(cache, fingerprint, mode, blog_type)
+        if cached:
+            return cached, None
     
-    # 格式化日期
-    start_dt = datetime.fromisoformat(start_date.replace('Z', ''))
-    end_dt = datetime.fromisoformat(end_date.replace('Z', ''))
+    metrics = get_metrics()
+    if level == FALLBACK:
+        nova_lite_result = invoke_nova_lite_fallback(clean_content, title, blog_type)
+        if nova_lite_result:
+            metrics.increment('degraded_total', labels={'level': FALLBACK})
+            if cache is not None:
+                cache.put(cache_link, clean_content, NOVA_LITE_MODEL_ID, mode, nova_lite_result,
+                          ttl=FALLBACK_CACHE_TTL, fingerprint=fingerprint, source=blog_type)
+            return nova_lite_result, FALLBACK
     
-    report = f"""# AWS {blog_names.get(blog_type, blog_type)} 博客分析报告
+    # 原文摘录不写入缓存，下次运行重新生成
+    metrics.increment('degraded_total', labels={'level': EXTRACT})
+    return extractive_summary(content, title, blog_type), EXTRACT
 
-**分析时间范围**: {start_dt.strftime('%Y年%m月%d日')} 至 {end_dt.strftime('%Y年%m月%d日')}
-**文章总数**: {len(articles)}
-**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+def extractive_summary(content, title="", blog_type=""):
+    """本地抽取式摘要（不调用模型）：提取正文后用 TextRank 选出最重要的几句，在很小的 token 预算内按原顺序输出"""
+    text = extract_text(content, SUMMARY_TOKEN_BUDGET, title)
+    return extract_key_sentences(text, title, EXTRACT_TOKEN_BUDGET) or fallback_summary(title, blog_type)
 
-## 博客文章列表
+def lookup_near_duplicate(cache, fingerprint, mode, blog_type):
+    """在缓存中查找其他 feed 中交叉发布的同一篇文章（近似重复指纹）的摘要"""
+    if not fingerprint:
+        return None
+    cached = cache.get_similar(fingerprint, [CLAUDE_MODEL_ID, NOVA_LITE_MODEL_ID], mode,
+                               exclude_source=blog_type)
+    if cached:
+        get_metrics().increment('near_duplicates_total', labels={'scope': 'cache'})
+    return cached
 
-"""
+def translate_with_memory(entries, cache=None):
+    """先用翻译记忆翻译 [(键, 清理后的正文, 缓存键, 指纹, 来源 feed)]，返回 {键: 译文}
     
-    for i, article in enumerate(articles, 1):
-        # 格式化日期
-        pub_date = datetime.fromisoformat(article['pub_date'])
-        formatted_date = pub_date.strftime('%Y年%m月%d日')
-        
-        # 生成中文摘要
-        summary = generate_chinese_summary(
-            article['title'], 
-            article['description'], 
-            article.get('content', '')
-        )
-        
-        # 清理摘要中的标题标记，避免与报告结构冲突
-        if summary:
-            # 移除开头的 # 标题标记
-            summary = re.sub(r'^#+\s*', '', summary.strip())
-            # 移除中间的 # 标题标记，替换为粗体
-            summary = re.sub(r'\n#+\s*([^\n]+)', r'\n**\1**', summary)
-        
-        report += f"""### {i}. {article['title']}
-- **作者**: {article['author']}
-- **发布时间**: {formatted_date}
-- **链接**: {article['link']}
+    未记忆的句段发给路由为其中最长条目选择的首选模型，离线模式下只使用已记忆的句段；
+    联网运行时译文写入摘要缓存。未设置翻译记忆时返回空字典。
+    """
+    if get_translation_memory() is None or not entries:
+        return {}
+    model_id = None
+    if not is_offline():
+        model_id = get_model_router().route(
+            'translate', max(estimate_tokens(content) for _, content, _, _, _ in entries))[0]
+    translated = translate_from_memory([(key, content) for key, content, _, _, _ in entries], model_id)
+    metrics = get_metrics()
+    for key, content, cache_link, fingerprint, source in entries:
+        if key not in translated:
+            continue
+        metrics.increment('summaries_generated_total')
+        if cache is not None and model_id is not None:
+            cache.put(cache_link, content, model_id, 'translate', translated[key],
+                      fingerprint=fingerprint, source=source)
+    return translated
+
+def generate_uncached_summary(title, clean_content, blog_type, cache_link, cache=None, fingerprint=None,
+                              on_delta=None, use_memory=True):
+    """按模型路由的顺序（默认长篇摘要 Claude 3.7 → Nova Lite，较短的翻译 Nova Lite → Claude 3.7）
+    依次尝试各模型，全部失败时使用本地抽取式摘要；模型结果写入缓存。离线模式下直接使用本地抽取式摘要
+    
+    翻译类条目先查询翻译记忆（use_memory 为 False 时跳过，如已由 translate_articles 查询过）。
+    """
+    mode = get_processing_mode(blog_type)
+    metrics = get_metrics()
+    if mode == 'translate' and use_memory:
+        translated = translate_with_memory([(cache_link, clean_content, cache_link, fingerprint, blog_type)], cache)
+        if cache_link in translated:
+            return translated[cache_link]
+    if is_offline():
+        # 离线模式的摘要不写入缓存，之后联网运行时重新用模型生成
+        metrics.increment('extractive_summaries_total', labels={'reason': 'offline'})
+        return extractive_summary(clean_content, title, blog_type)
+    metrics.increment('summaries_generated_total')
+    router = get_model_router()
+    
+    models = router.route(mode, estimate_tokens(clean_content))
+    for position, model_id in enumerate(models):
+        if position:
+            print(f"{router.name(models[position - 1])} 调用失败，使用 {router.name(model_id)} 备用生成",
+                  file=sys.stderr)
+        # 只有 Claude 支持流式输出，Nova Lite 生成完成后整篇写出
+        if model_id == CLAUDE_MODEL_ID:
+            result = invoke_bedrock_model(clean_content, title, blog_type, on_delta)
+        else:
+            result = invoke_nova_lite_fallback(clean_content, title, blog_type)
+        if not result:
+            continue
+        if position:
+            metrics.increment('fallbacks_total', labels={'model': model_id})
+        if cache is not None:
+            # 备用模型的结果只短期缓存，过期后重新尝试首选模型
+            cache.put(cache_link, clean_content, model_id, mode, result,
+                      ttl=FALLBACK_CACHE_TTL if position else None, fingerprint=fingerprint, source=blog_type)
+        return result
+    
+    # 最后一级备用：本地抽取式摘要（不写入缓存，下次运行会重新尝试模型）
+    print("所有模型均失败，使用本地抽取式摘要", file=sys.stderr)
+    metrics.increment('fallbacks_total', labels={'model': 'extractive'})
+    metrics.increment('extractive_summaries_total', labels={'reason': 'fallback'})
+    return extractive_summary(clean_content, title, blog_type)
 
-**中文摘要**:
-{summary}
+def translate_articles(articles, blog_type, cache=None):
+    """批量翻译多篇 What's New/News 文章，返回与输入顺序一致的翻译列表
+    
+    缓存命中的条目不进入批量请求；设置了翻译记忆时先按句段翻译，所有句段都有译文的条目不再整条翻译。
+    批量结果中缺失或格式错误的条目按单篇流程（按模型路由依次尝试 → 本地抽取式摘要）重新生成；
+    离线模式下不发送批量请求。
+    """
+    results = [None] * len(articles)
+    pending = []
+    for position, article in enumerate(articles):
+        article_type = article.get('feed', blog_type)
+        content = select_content_source(article, article_type)
+        if not content or len(content) < 50:
+            results[position] = "暂无足够内容生成摘要。"
+            continue
+        clean_content = clean_article_content(content, article['title'], article_type)
+        if not clean_content:
+            results[position] = "暂无足够内容生成摘要。"
+            continue
+        cache_link = article['link'] or article['title']
+        if cache is not None:
+            cached = cache.get(cache_link, clean_content, [CLAUDE_MODEL_ID, NOVA_LITE_MODEL_ID], 'translate')
+            if cached:
+                results[position] = cached
+                continue
+            cached = lookup_near_duplicate(cache, article.get('simhash'), 'translate', article_type)
+            if cached:
+                results[position] = cached
+                continue
+        pending.append((position, article_type, clean_content, cache_link))
+    
+    # 先用翻译记忆：只有未记忆的句段发给模型，所有句段都有译文的条目不再整条翻译
+    translated = translate_with_memory(
+        [(position, clean_content, cache_link, articles[position].get('simhash'), article_type)
+         for position, article_type, clean_content, cache_link in pending], cache)
+    if translated:
+        for position, translation in translated.items():
+            results[position] = translation
+        pending = [entry for entry in pending if entry[0] not in translated]
+    
+    if len(pending) > 1 and not is_offline():
+        items = [(str(i + 1), articles[position]['title'], clean_content)
+                 for i, (position, _, clean_content, _) in enumerate(pending)]
+        # 批量请求使用路由为其中最长条目选择的首选模型，缺失的条目单独生成时再按路由依次尝试
+        model_id = get_model_router().route(
+            'translate', max(estimate_tokens(clean_content) for _, _, clean_content in items))[0]
+        translations = invoke_bedrock_translation_batch(items, model_id)
+        retry = []
+        for (item_id, _, _), entry in zip(items, pending):
+            position, article_type, clean_content, cache_link = entry
+            translation = translations.get(item_id)
+            if translation:
+                results[position] = translation
+                get_metrics().increment('summaries_generated_total')
+                if cache is not None:
+                    cache.put(cache_link, clean_content, model_id, 'translate', translation,
+                              fingerprint=articles[position].get('simhash'), source=article_type)
+            else:
+                retry.append(entry)
+        if retry:
+            print(f"批量翻译中 {len(retry)}/{len(pending)} 条缺失或格式错误，单独重新生成", file=sys.stderr)
+        pending = retry
+    
+    for position, article_type, clean_content, cache_link in pending:
+        results[position] = generate_uncached_summary(
+            articles[position]['title'], clean_content, article_type, cache_link, cache,
+            articles[position].get('simhash'), use_memory=False
+        )
+    return results
 
----
+def fallback_summary(title, blog_type=""):
+    """模型全部不可用时的模板摘要"""
+    if blog_type in TRANSLATE_BLOG_TYPES:
+        return f"AWS 发布了关于 {title} 的更新。"
+    else:
+        return f"本文介绍了 {title} 相关的 AWS 服务更新和技术特性。"
 
-"""
+def generate_markdown_report(blog_type, articles, start_date, end_date):
+    """根据已生成的摘要渲染完整 Markdown 报告（不再调用模型）
     
-    return report
+    保留为兼容接口，供需要一次性获得完整报告字符串的调用方使用；
+    命令行流程直接使用 MarkdownReportWriter 增量输出。
+    """
+    import io
+    from report_writer import MarkdownReportWriter
+    
+    buffer = io.StringIO()
+    writer = MarkdownReportWriter(buffer, blog_type, start_date, end_date)
+    writer.write_header(len(articles))
+    for i, article in enumerate(articles, 1):
+        writer.write_article(i, article)
+    return buffer.getvalue()
 
 def print_help():
     """打印帮助信息"""
@@ -203,15 +696,60 @@ def print_help():
 AWS Blog RSS Analyzer v2.0 - 智能内容处理和差异化AI分析
 
 用法:
-    python blog_analyzer.py <blog_type> <start_date> <end_date>
+    python blog_analyzer.py <blog_type> <start_date> <end_date> [选项]
     python blog_analyzer.py -h|--help
     python blog_analyzer.py -v|--version
 
 参数:
     blog_type    博客类型 (whats-new, machine-learning, database, etc.)
+                 多个类型用逗号分隔 (如 aws,database)，或使用 all 分析全部 feed
     start_date   开始日期 (ISO格式: 2025-08-17T00:00:00Z)
     end_date     结束日期 (ISO格式: 2025-08-23T23:59:59Z)
 
+选项:
+    --no-cache                  不使用摘要缓存
+    --cache-path PATH           摘要缓存文件 (默认: ~/.cache/aws-blog-rss-analyzer/summaries.sqlite3)
+    --cache-max-entries N       缓存条目上限，超出后淘汰最久未使用的条目 (默认: 5000)
+    --cache-max-age-days DAYS   缓存条目最长保留天数 (默认: 30)
+    --no-translation-memory     不使用 What's New/News 的句段级翻译记忆 (每条整条翻译)
+    --tm-path PATH              翻译记忆文件 (默认: ~/.cache/aws-blog-rss-analyzer/translation_memory.sqlite3)
+    -o, --output PATH           将报告写入文件 (默认输出到 stdout)
+    --concurrency N             并发生成摘要的线程数 (默认: 8)
+    --claude-rpm N              Claude 3.7 Sonnet 请求速率上限，次/分钟 (默认: 250)
+    --nova-rpm N                Nova Lite 请求速率上限，次/分钟 (默认: 40)
+    --feed-max-age SECONDS      RSS 本地缓存在该时间内直接复用，不访问网络 (默认: 0，
+                                每次发送条件请求，未变化时复用 304 响应)
+    --backend NAME              模型调用后端: auto, boto3, cli, endpoint, stub (默认: auto，
+                                安装 boto3 时进程内调用并复用连接，否则使用 aws CLI；endpoint
+                                调用 BEDROCK_ENDPOINT_URL 指定的 HTTP 端点)
+    --translate-batch-size N    What's New/News 每次请求批量翻译的条目数 (默认: 10，
+                                1 表示逐条翻译)
+    --no-archive                不使用本地文章归档 (默认把解析过的文章写入归档，
+                                超出 feed 窗口的日期范围从归档查询)
+    --archive-path PATH         文章归档文件 (默认: ~/.cache/aws-blog-rss-analyzer/articles.sqlite3)
+    --metrics-json PATH         运行结束时写出各阶段耗时 (p50/p95/p99)、重试/限流/备用次数等指标 (JSON)
+    --metrics-prom PATH         运行结束时写出 Prometheus textfile (供 node_exporter 采集)
+    --stream                    流式输出：正在写出的文章的摘要随模型生成逐段写出 (首字节延迟
+                                从整篇生成时间降到亚秒级)
+    --no-dedup                  不合并跨 feed 交叉发布的近似重复文章 (默认按 SimHash 指纹合并，
+                                每组只生成一次摘要并列出所有来源链接)
+    --job [PATH]                使用持久化任务队列 (默认: ~/.cache/aws-blog-rss-analyzer/jobs.sqlite3)：
+                                每篇文章完成后立即写入队列，中断后重新运行只处理未完成的文章；
+                                多个进程 (可在共享同一卷的不同机器上) 指定同一队列文件即可分担任务
+    --job-id ID                 任务标识 (默认由博客类型和日期范围生成，相同参数的运行加入同一任务)
+    --worker-id ID              工作进程标识 (默认: 主机名:进程号)
+    --no-wait                   本进程认领不到新文章时立即退出，不等待其他进程完成 (不生成报告)
+    --deadline SECONDS          整次运行的时间预算：按发布时间从新到旧处理，剩余时间不足 20% 时其余文章
+                                改用 Nova Lite，临近截止时改用本地原文摘录，按时输出完整报告并列出降级条目
+    --max-articles N            最多处理 N 篇文章 (合并重复后保留发布时间最新的 N 篇)
+    --routing POLICY            模型路由策略 (默认: balanced)：
+                                quality  始终先用 Claude 3.7 Sonnet，失败后使用 Nova Lite
+                                balanced 较短的 What's New/News 条目先用 Nova Lite，长篇摘要先用 Claude；
+                                         Claude 平均延迟超过 Nova Lite 3 倍时较长的翻译也先用 Nova Lite
+                                cost     所有文章先用 Nova Lite，失败后使用 Claude
+    --offline                   离线模式：不调用模型 (不消耗配额)，缓存中没有的摘要用本地 TextRank 抽取正文关键句；
+                                RSS 优先使用本地缓存的 feed 副本 (不论新旧)
+
 支持的博客类型:
     whats-new, news          - AWS更新和新闻 (使用翻译)
     machine-learning         - 机器学习博客 (使用摘要)
@@ -223,158 +761,277 @@ AWS Blog RSS Analyzer v2.0 - 智能内容处理和差异化AI分析
     • 智能内容选择 (content:encoded vs description)
     • 差异化处理 (翻译 vs 摘要)
     • 双重AI备用 (Claude 3.7 + Nova Lite)
-    • 智能限流处理
+    • 智能限流处理 (并发生成 + 每模型令牌桶限流)
+    • 持久化摘要缓存 (重复运行直接复用已生成的摘要)
+    • 流式报告输出 (每篇摘要完成后立即写出)
+    • 跨 feed 去重 (交叉发布的近似重复文章只生成一次摘要)
+    • 可恢复的任务队列 (多进程分担长时间回填，崩溃后从中断处继续)
+    • 限时运行 (时间预算用尽前逐步降级，按时输出完整报告)
+    • 模型路由 (按内容长度、博客类型和实时延迟/错误率选择模型，统计每个模型的成本)
+    • 本地抽取式摘要 (模型全部失败时的最后一级备用，--offline 时不调用模型即时生成报告)
+    • 句段级翻译记忆 (What's New 中重复的句子只翻译一次，区域/服务名称不同的句子也直接复用)
 
 示例:
     python blog_analyzer.py whats-new 2025-08-17T00:00:00Z 2025-08-23T23:59:59Z
     python blog_analyzer.py machine-learning 2025-08-20T00:00:00Z 2025-08-24T23:59:59Z
+    python blog_analyzer.py all 2025-07-01T00:00:00Z 2025-07-31T23:59:59Z --job /mnt/shared/jobs.sqlite3 -o july.md
+    python blog_analyzer.py aws,whats-new 2025-08-17T00:00:00Z 2025-08-23T23:59:59Z --deadline 120 --max-articles 40
 """)
 
-def main():
-    if len(sys.argv) == 2 and sys.argv[1] in ['-h', '--help']:
+def build_arg_parser():
+    """构建命令行参数解析器（帮助信息由 print_help 提供）"""
+    parser = argparse.ArgumentParser(prog='blog_analyzer.py', add_help=False)
+    parser.add_argument('blog_type')
+    parser.add_argument('start_date')
+    parser.add_argument('end_date')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--cache-path', default=None)
+    parser.add_argument('--cache-max-entries', type=int, default=5000)
+    parser.add_argument('--cache-max-age-days', type=float, default=30)
+    parser.add_argument('--no-translation-memory', action='store_true')
+    parser.add_argument('--tm-path', default=None)
+    parser.add_argument('-o', '--output', default=None)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--claude-rpm', type=float, default=DEFAULT_CLAUDE_RPM)
+    parser.add_argument('--nova-rpm', type=float, default=DEFAULT_NOVA_RPM)
+    parser.add_argument('--feed-max-age', type=float, default=0)
+    parser.add_argument('--backend', default=None, choices=['auto', 'boto3', 'cli', 'endpoint', 'stub'])
+    parser.add_argument('--translate-batch-size', type=int, default=DEFAULT_TRANSLATE_BATCH_SIZE)
+    parser.add_argument('--no-archive', action='store_true')
+    parser.add_argument('--archive-path', default=None)
+    parser.add_argument('--metrics-json', default=None)
+    parser.add_argument('--metrics-prom', default=None)
+    parser.add_argument('--no-dedup', action='store_true')
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--job', nargs='?', const='', default=None)
+    parser.add_argument('--job-id', default=None)
+    parser.add_argument('--worker-id', default=None)
+    parser.add_argument('--no-wait', action='store_true')
+    parser.add_argument('--deadline', type=float, default=None)
+    parser.add_argument('--max-articles', type=int, default=None)
+    parser.add_argument('--routing', default=DEFAULT_POLICY, choices=sorted(POLICIES))
+    parser.add_argument('--offline', action='store_true')
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    
+    if len(argv) == 1 and argv[0] in ['-h', '--help']:
         print_help()
         sys.exit(0)
     
-    if len(sys.argv) == 2 and sys.argv[1] in ['-v', '--version']:
+    if len(argv) == 1 and argv[0] in ['-v', '--version']:
         print("AWS Blog RSS Analyzer v2.0")
         print("支持智能内容处理和差异化AI分析")
         sys.exit(0)
     
-    if len(sys.argv) != 4:
-        print("Usage: python blog_analyzer.py <blog_type> <start_date> <end_date>")
+    try:
+        args = build_arg_parser().parse_args(argv)
+    except SystemExit:
+        print("Usage: python blog_analyzer.py <blog_type> <start_date> <end_date> [options]")
         print("Use -h or --help for more information")
         sys.exit(1)
     
-    blog_type = sys.argv[1]
-    start_date = sys.argv[2] 
-    end_date = sys.argv[3]
-    
-    # 1. 获取 RSS 文章列表
-    print("正在使用RSS解析器获取文章列表...", file=sys.stderr)
-    
-    # 使用相对路径，更灵活
-    import os
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    rss_parser_path = os.path.join(script_dir, 'rss_parser.py')
+    blog_type = args.blog_type
+    start_date = args.start_date
+    end_date = args.end_date
     
-    result = subprocess.run([
-        'python3', rss_parser_path,
-        blog_type, start_date, end_date
-    ], capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        print(f"RSS 解析失败: {result.stderr}", file=sys.stderr)
+    if args.job is not None and (args.deadline is not None or args.max_articles is not None):
+        print("--deadline/--max-articles 不能与 --job 同时使用（任务队列按完整文章列表分工）", file=sys.stderr)
         sys.exit(1)
-    
-    try:
-        articles = json.loads(result.stdout)
-    except json.JSONDecodeError:
-        print("JSON 解析失败", file=sys.stderr)
+    if args.job is not None and args.offline:
+        print("--offline 不能与 --job 同时使用（离线摘要不应作为任务结果保存）", file=sys.stderr)
         sys.exit(1)
-    
-    if not articles:
-        print("未找到指定日期范围内的文章", file=sys.stderr)
+    if args.offline:
+        set_offline()
+    if args.deadline is not None:
+        # 时间预算从启动时开始计算（包括获取 RSS 的时间）
+        from deadline import Deadline, set_deadline
+        try:
+            set_deadline(Deadline(args.deadline))
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+    if args.max_articles is not None and args.max_articles < 1:
+        print(f"--max-articles 必须大于 0: {args.max_articles}", file=sys.stderr)
         sys.exit(1)
     
-    print(f"找到 {len(articles)} 篇文章，直接使用 RSS 内容生成摘要...", file=sys.stderr)
-    
-    # 2. 直接使用 RSS description 生成摘要 - 考虑限流，分批处理
-    print(f"正在使用 Claude 3.7 Sonnet 生成摘要...", file=sys.stderr)
+    import pipeline
     
-    # 如果文章数量较多，分批处理避免限流
-    batch_size = 10  # 每批处理10篇文章
-    processed = 0
+    queue = None
+    job_id = None
+    if args.job is not None:
+        from job_queue import JobQueue, make_job_id
+        try:
+            queue = JobQueue(args.job or None)
+        except Exception as e:
+            print(f"任务队列不可用: {e}", file=sys.stderr)
+            sys.exit(1)
+        job_id = args.job_id or make_job_id(blog_type, start_date, end_date)
     
-    for i in range(0, len(articles), batch_size):
-        batch = articles[i:i+batch_size]
+    # 1. 进程内获取并解析 RSS 文章列表（多个博客类型时合并为一个列表）
+    #    任务队列中已有该任务时直接加入，不再获取
+    if queue is not None and queue.get_job(job_id) is not None:
+        counts = queue.progress(job_id)
+        print(f"加入已有任务 {job_id}: {counts['done']}/{sum(counts.values())} 篇已完成", file=sys.stderr)
+    else:
+        print("正在使用RSS解析器获取文章列表...", file=sys.stderr)
         
-        for article in batch:
-            # 根据博客类型和可用内容选择最佳源
-            if blog_type in ['whats-new', 'news']:
-                # What's New 和 News 只有 description，直接使用
-                content_source = article['description']
-            else:
-                # 其他博客优先使用 content_encoded，回退到 description
-                content_source = article.get('content_encoded', '') or article['description']
-            
-            summary = generate_chinese_summary(
-                article['title'], 
-                content_source, 
-                blog_type
-            )
-            article['summary'] = summary
-            processed += 1
-            
-            # 每处理一篇文章后短暂延迟，避免超过限流
-            # 注释掉延迟以加快演示速度
-            # if processed < len(articles):
-            #     time.sleep(0.3)  # 300ms延迟，确保不超过250次/分钟
+        parser = pipeline.create_parser(
+            max_age=float('inf') if args.offline else args.feed_max_age, use_archive=not args.no_archive, archive_path=args.archive_path
+        )
+        try:
+            articles = pipeline.fetch_articles(blog_type, start_date, end_date, parser=parser)
+        except ValueError as e:
+            print(f"RSS 解析失败: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            parser.close()
         
-        # 批次间延迟
-        if i + batch_size < len(articles):
-            print(f"已处理 {min(i + batch_size, len(articles))}/{len(articles)} 篇文章，短暂休息避免限流...", file=sys.stderr)
-            time.sleep(2)  # 批次间2秒延迟
+        if not articles:
+            print("未找到指定日期范围内的文章", file=sys.stderr)
+            sys.exit(1)
+        
+        print(f"找到 {len(articles)} 篇文章，直接使用 RSS 内容生成摘要...", file=sys.stderr)
+        
+        if queue is not None:
+            # 多个进程同时创建同一任务时只有第一个生效，其余进程直接加入
+            if pipeline.enqueue_job(queue, job_id, articles, blog_type, start_date, end_date,
+                                    dedup=not args.no_dedup):
+                print(f"已创建任务 {job_id}", file=sys.stderr)
     
-    # 4. 生成报告
-    report = generate_markdown_report(blog_type, articles, start_date, end_date)
-    print(report)
-
-def invoke_nova_lite_fallback(content, title, blog_type=""):
-    """使用 Nova Lite 作为备用模型生成摘要"""
+    cache = None
+    if not args.no_cache:
+        from summary_cache import SummaryCache
+        try:
+            cache = SummaryCache(args.cache_path, args.cache_max_entries, args.cache_max_age_days)
+        except Exception as e:
+            print(f"摘要缓存不可用，继续无缓存运行: {e}", file=sys.stderr)
+    
+    memory = None
+    if not args.no_translation_memory:
+        from translation_memory import TranslationMemory, set_translation_memory
+        try:
+            memory = TranslationMemory(args.tm_path)
+            set_translation_memory(memory)
+        except Exception as e:
+            print(f"翻译记忆不可用，继续整条翻译: {e}", file=sys.stderr)
+    
+    configure_rate_limits(args.claude_rpm, args.nova_rpm, args.concurrency)
+    configure_routing(args.routing)
+    if args.backend:
+        from bedrock_backend import create_backend, set_backend
+        set_backend(create_backend(args.backend))
+    
+    # 2. 报告输出与摘要生成分离：先写头部，每篇摘要完成后立即写出
+    #    使用任务队列时摘要先写入队列，全部完成后再按原顺序渲染报告
+    output = None
     try:
-        # 根据博客类型选择处理方式
-        if blog_type in ['whats-new', 'news']:
-            prompt = f"""请将以下AWS更新内容翻译成中文：
+        if args.offline:
+            print("离线模式：使用缓存的摘要或本地抽取式摘要，不调用模型...", file=sys.stderr)
+        else:
+            print(f"正在生成摘要（模型路由策略: {args.routing}）...", file=sys.stderr)
+        if queue is not None:
+            pipeline.process_job(queue, job_id, blog_type, cache, worker=args.worker_id,
+                                 concurrency=args.concurrency, batch_size=args.translate_batch_size,
+                                 wait=not args.no_wait)
+            if not queue.is_finished(job_id):
+                print(f"任务 {job_id} 仍有其他进程在处理，本进程退出（不生成报告）", file=sys.stderr)
+                return
+            output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+            pipeline.write_job_report(output, queue, job_id)
+        else:
+            output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+            # 线程池并发生成摘要，各模型的请求速率由令牌桶控制，结果按原顺序写出
+            pipeline.write_report(output, articles, blog_type, start_date, end_date,
+                                  cache=cache, concurrency=args.concurrency,
+                                  batch_size=args.translate_batch_size, dedup=not args.no_dedup,
+                                  stream_summaries=args.stream, max_articles=args.max_articles)
+    finally:
+        # 无论是否出错都关闭报告文件和缓存，已写出的条目保留在报告中
+        if output is not None and output is not sys.stdout:
+            output.close()
+            print(f"报告已写入 {args.output}", file=sys.stderr)
+        
+        if cache is not None:
+            cache.print_stats()
+            cache.close()
+        
+        if memory is not None:
+            set_translation_memory(None)
+            # 只处理摘要类博客时没有查询翻译记忆，不输出统计
+            stats = memory.stats()
+            if stats['exact_hits'] + stats['normalized_hits'] + stats['misses']:
+                memory.print_stats()
+            memory.close()
+        
+        if queue is not None:
+            queue.close()
+        
+        export_metrics(args.metrics_json, args.metrics_prom)
 
-标题：{title}
-内容：{content[:1000]}
+def export_metrics(json_path=None, prom_path=None):
+    """输出指标摘要，并按需写出 JSON 和 Prometheus textfile（写出失败不影响报告）"""
+    metrics = get_metrics()
+    metrics.print_summary()
+    print_routing_summary()
+    for path, write in ((json_path, metrics.write_json), (prom_path, metrics.write_prometheus)):
+        if not path:
+            continue
+        try:
+            write(path)
+        except OSError as e:
+            print(f"指标写出失败: {path}: {e}", file=sys.stderr)
 
-请提供简洁的中文翻译："""
-        else:
-            prompt = f"""请为以下AWS博客生成中文摘要：
+def invoke_nova_lite_fallback(content, title, blog_type=""):
+    """使用 Nova Lite 生成摘要或翻译（低成本模型：路由优先时为首选，否则作为备用）"""
+    # 根据博客类型选择处理方式
+    if blog_type in ['whats-new', 'news']:
+        system = NOVA_TRANSLATE_INSTRUCTIONS
+        prompt = f"""标题：{title}
+内容：{content}
 
-标题：{title}
-内容：{content[:1000]}
+请提供简洁的中文翻译："""
+    else:
+        system = NOVA_SUMMARY_INSTRUCTIONS
+        prompt = f"""标题：{title}
+内容：{content}
 
 请生成150字左右的中文摘要："""
+    
+    return invoke_nova(prompt, system)
 
+def invoke_nova(prompt, system=None, max_tokens=200):
+    """调用 Bedrock Nova Lite，返回生成的文本或 None"""
+    try:
         # Nova Lite 请求格式
-        request_body = {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [{"text": prompt}]
-                }
-            ],
-            "inferenceConfig": {
-                "maxTokens": 200,
-                "temperature": 0.3
-            }
-        }
+        request_body = nova_request_body(prompt, system, max_tokens)
 
-        cmd = [
-            'aws', 'bedrock-runtime', 'invoke-model',
-            '--model-id', 'us.amazon.nova-lite-v1:0',
-            '--body', json.dumps(request_body),
-            '--cli-binary-format', 'raw-in-base64-out',
-            '/tmp/nova_lite_response.json'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=20)
+        metrics = get_metrics()
+        metrics.increment('bedrock_requests_total', labels={'model': NOVA_LITE_MODEL_ID})
+        started = time.perf_counter()
+        try:
+            with metrics.timer('invoke_nova_lite_fallback'), get_model_limiter(NOVA_LITE_MODEL_ID):
+                response = get_backend().invoke(NOVA_LITE_MODEL_ID, request_body, timeout=request_timeout(20))
+        except Exception as e:
+            record_call(NOVA_LITE_MODEL_ID, started, THROTTLED if isinstance(e, ThrottlingError) else ERROR)
+            raise
+        record_call(NOVA_LITE_MODEL_ID, started, SUCCESS)
+        record_usage(NOVA_LITE_MODEL_ID, response, request_body)
         
-        if result.returncode == 0:
-            with open('/tmp/nova_lite_response.json', 'r', encoding='utf-8') as f:
-                response = json.load(f)
-            
-            if 'output' in response and 'message' in response['output']:
-                content_list = response['output']['message'].get('content', [])
-                if content_list and len(content_list) > 0:
-                    return content_list[0].get('text', '').strip()
+        if 'output' in response and 'message' in response['output']:
+            content_list = response['output']['message'].get('content', [])
+            if content_list and len(content_list) > 0:
+                return content_list[0].get('text', '').strip()
         
         return None
         
     except Exception as e:
-        print(f"Nova Lite 备用生成失败: {e}", file=sys.stderr)
+        print(f"Nova Lite 生成失败: {e}", file=sys.stderr)
+        if isinstance(e, ThrottlingError):
+            get_metrics().increment('bedrock_throttled_total', labels={'model': NOVA_LITE_MODEL_ID})
+        get_metrics().increment('bedrock_errors_total', labels={'model': NOVA_LITE_MODEL_ID})
         return None
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+AWS Blog RSS Analyzer 统一命令行入口
+子命令对应的模块按需导入，-h / -v 不加载解析器和模型后端
+"""
+
+import importlib
+import sys
+
+VERSION = "AWS Blog RSS Analyzer v2.0"
+
+# 子命令 -> (实现模块, 说明)
+COMMANDS = {
+    'fetch': ('rss_parser', '获取并解析 RSS，输出文章 JSON（同 rss_parser.py）'),
+    'analyze': ('blog_analyzer', '生成中文摘要/翻译的 Markdown 报告（同 blog_analyzer.py）'),
+    'watch': ('watcher', '监视模式：自适应轮询 feed，新文章摘要追加到滚动报告（同 watcher.py）'),
+    'analytics': ('analytics', '按 feed 和周统计归档文章的服务名/词频和 TF-IDF 趋势，导出列式数据（同 analytics.py）')
+}
+
+
+def print_help():
+    """打印帮助信息"""
+    print(f"""
+{VERSION}
+
+用法:
+    python cli.py <command> [参数...]
+    python cli.py <command> -h
+    python cli.py -h|--help
+    python cli.py -v|--version
+
+命令:""")
+    for name, (_, description) in COMMANDS.items():
+        print(f"    {name:<10}{description}")
+    print("""
+示例:
+    python cli.py fetch aws,database 2025-08-17T00:00:00Z 2025-08-23T23:59:59Z
+    python cli.py analyze whats-new 2025-08-17T00:00:00Z 2025-08-23T23:59:59Z -o report.md
+    python cli.py watch all --report aws-blog-watch-%Y-%m-%d.md
+    python cli.py analytics whats-new --start 2025-07-01T00:00:00Z --export whats-new.parquet
+""")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if not argv or argv[0] in ['-h', '--help']:
+        print_help()
+        sys.exit(0 if argv else 1)
+
+    if argv[0] in ['-v', '--version']:
+        print(VERSION)
+        sys.exit(0)
+
+    command = argv[0]
+    if command not in COMMANDS:
+        print(f"未知命令: {command}。可用命令: {', '.join(COMMANDS)}", file=sys.stderr)
+        sys.exit(1)
+
+    module = importlib.import_module(COMMANDS[command][0])
+    module.main(argv[1:])
+
+
+if __name__ == "__main__":
+    main()
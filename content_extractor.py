@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+文章正文提取
+单次遍历 HTML，跳过脚本、代码块、导航等非正文内容，遇到"About the authors"等作者介绍时停止；
+按段落信息量排序，在 token 预算内选出最有价值的段落并按原顺序输出，替代正则清理 + 按字符截断
+"""
+
+import math
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+# 默认的输入 token 预算（约 2400 个英文字符）
+DEFAULT_TOKEN_BUDGET = 600
+
+# 候选段落收集到预算的多少倍后停止解析（留出排序的余地，又不必解析完整篇长文）
+CANDIDATE_FACTOR = 2
+
+# 内容整体跳过的标签
+SKIP_TAGS = {
+    'script', 'style', 'noscript', 'pre', 'code', 'nav', 'header', 'footer', 'aside',
+    'form', 'button', 'svg', 'iframe', 'figure', 'template', 'select', 'textarea'
+}
+
+# 块级标签：开始或结束时切分段落
+BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'table', 'tr', 'td', 'th', 'dd', 'dt', 'br', 'hr'
+}
+
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+# 到达作者介绍/相关链接等尾部内容时停止
+STOP_SECTION = re.compile(
+    r'^\s*(about the authors?|about the contributors?|related (posts|resources)|关于作者|作者简介)\s*:?\s*$',
+    re.IGNORECASE
+)
+
+# 会干扰提示词（尤其是批量翻译的 JSON）的符号
+PROMPT_UNSAFE = re.compile(r'[{}"\[\]]')
+WHITESPACE = re.compile(r'\s+')
+CJK_CHAR = re.compile(r'[　-鿿가-힯＀-￯]')
+WORD = re.compile(r"[A-Za-z][A-Za-z0-9\-]+")
+PROPER_NOUN = re.compile(r"\b(?:AWS|Amazon|[A-Z][a-z]+[A-Z]\w*|[A-Z]{2,})\b")
+NUMBER = re.compile(r'\d')
+
+# 信息量低的段落（引导语、行动号召）
+BOILERPLATE = re.compile(
+    r'(in this post,? (we|you|i)|to learn more|get started (with|today)|try it out|'
+    r'leave (a|your) (comment|feedback)|thanks for reading|subscribe)'
+)
+
+
+class _StopParsing(Exception):
+    """已收集到足够的段落或到达尾部内容"""
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计 token 数：中日韩字符约 1 个 token，其他字符约 4 个字符 1 个 token"""
+    if text.isascii():
+        return math.ceil(len(text) / 4)
+    cjk = len(CJK_CHAR.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class _ParagraphCollector(HTMLParser):
+    def __init__(self, candidate_budget: int):
+        super().__init__(convert_charrefs=True)
+        self.candidate_budget = candidate_budget
+        self.paragraphs: List[str] = []
+        self.tokens = 0
+        self._buffer: List[str] = []
+        self._skip_depth = 0
+        self._in_heading = False
+
+    def _flush(self):
+        text = WHITESPACE.sub(' ', ''.join(self._buffer)).strip()
+        self._buffer = []
+        if not text:
+            return
+        if STOP_SECTION.match(text):
+            raise _StopParsing()
+        if self._in_heading:
+            # 标题不作为候选段落，只用于识别尾部内容
+            return
+        self.paragraphs.append(text)
+        self.tokens += estimate_tokens(text)
+        if self.tokens >= self.candidate_budget:
+            raise _StopParsing()
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+            self._in_heading = tag in HEADING_TAGS
+
+    def handle_startendtag(self, tag, attrs):
+        if not self._skip_depth and tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+            return
+        if self._skip_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+            if tag in HEADING_TAGS:
+                self._in_heading = False
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._buffer.append(data)
+
+    def finish(self):
+        try:
+            self.close()
+            self._flush()
+        except _StopParsing:
+            pass
+
+
+def _score(paragraph: str, position: int, title_words: set) -> float:
+    """段落信息量：与标题重合的词、服务名等专有名词和数字越多越好，越靠前越重要"""
+    words = paragraph.count(' ') + 1
+    if words < 6 and paragraph.isascii():
+        return 0.0
+    lowered = paragraph.lower()
+    overlap = sum(lowered.count(w) for w in title_words)
+    proper = len(PROPER_NOUN.findall(paragraph))
+    numbers = min(len(NUMBER.findall(paragraph)), 6)
+    density = (2 * overlap + proper + 0.5 * numbers) / math.sqrt(words)
+    score = density + 1.0 / (1 + 0.3 * position)
+    if BOILERPLATE.search(lowered):
+        score *= 0.3
+    return score
+
+
+def extract_paragraphs(html: str, candidate_budget: int) -> List[str]:
+    """单次遍历 HTML，返回正文段落（跳过非正文标签，遇到尾部内容或候选预算用完时停止）"""
+    collector = _ParagraphCollector(candidate_budget)
+    try:
+        collector.feed(html)
+    except _StopParsing:
+        return collector.paragraphs
+    collector.finish()
+    return collector.paragraphs
+
+
+def extract_text(html: str, token_budget: int = DEFAULT_TOKEN_BUDGET, title: Optional[str] = None) -> str:
+    """提取正文并在 token 预算内选出信息量最高的段落，按原顺序拼接返回"""
+    if not html:
+        return ''
+    paragraphs = extract_paragraphs(html, token_budget * CANDIDATE_FACTOR)
+    paragraphs = [PROMPT_UNSAFE.sub('', p).strip() for p in paragraphs]
+    paragraphs = [p for p in paragraphs if p]
+    if not paragraphs:
+        return ''
+
+    costs = [estimate_tokens(p) for p in paragraphs]
+    if sum(costs) <= token_budget:
+        return '\n'.join(paragraphs)
+
+    title_words = {w.lower() for w in WORD.findall(title or '') if len(w) > 3}
+    ranked = sorted(range(len(paragraphs)),
+                    key=lambda i: _score(paragraphs[i], i, title_words), reverse=True)
+
+    selected = []
+    used = 0
+    for index in ranked:
+        if used + costs[index] > token_budget:
+            continue
+        selected.append(index)
+        used += costs[index]
+
+    if not selected:
+        # 单个段落就超出预算时，截取最重要段落的开头
+        return paragraphs[ranked[0]][:token_budget * 4]
+    return '\n'.join(paragraphs[i] for i in sorted(selected))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+RSS 日期解析
+手写的 RFC 822 pubDate 快速解析（常见格式），其余格式回退到 email.utils；
+结果统一换算为 UTC 的 naive datetime，并对重复字符串做 LRU 缓存
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Optional
+
+_MONTHS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+# RFC 822 时区名称 -> UTC 偏移（分钟）
+_TZ_OFFSETS = {
+    'GMT': 0, 'UT': 0, 'UTC': 0, 'Z': 0,
+    'EST': -300, 'EDT': -240, 'CST': -360, 'CDT': -300,
+    'MST': -420, 'MDT': -360, 'PST': -480, 'PDT': -420
+}
+
+
+def _parse_fast(date_str: str) -> Optional[datetime]:
+    """解析 "Fri, 22 Aug 2025 17:54:38 +0000" / "... GMT" 等常见格式，不匹配时返回 None"""
+    parts = date_str.split()
+    if parts and parts[0].endswith(','):
+        parts = parts[1:]
+    if len(parts) not in (4, 5):
+        return None
+
+    day, month_name, year, clock = parts[:4]
+    zone = parts[4] if len(parts) == 5 else 'GMT'
+
+    month = _MONTHS.get(month_name[:3].title())
+    if month is None:
+        return None
+
+    if zone[0] in '+-' and len(zone) == 5 and zone[1:].isdigit():
+        offset = int(zone[1:3]) * 60 + int(zone[3:5])
+        if zone[0] == '-':
+            offset = -offset
+    else:
+        offset = _TZ_OFFSETS.get(zone.upper())
+        if offset is None:
+            return None
+
+    fields = clock.split(':')
+    if len(fields) not in (2, 3):
+        return None
+    try:
+        year_value = int(year)
+        if year_value < 100:
+            year_value += 2000
+        parsed = datetime(
+            year_value, month, int(day),
+            int(fields[0]), int(fields[1]), int(fields[2]) if len(fields) == 3 else 0
+        )
+    except ValueError:
+        return None
+
+    return parsed - timedelta(minutes=offset) if offset else parsed
+
+
+@lru_cache(maxsize=8192)
+def parse_rss_date(date_str: Optional[str]) -> Optional[datetime]:
+    """解析 RSS pubDate，返回 UTC 的 naive datetime，无法解析时返回 None"""
+    if not date_str:
+        return None
+    date_str = date_str.strip()
+
+    parsed = _parse_fast(date_str)
+    if parsed is not None:
+        return parsed
+
+    # 少见格式交给标准库处理
+    try:
+        parsed = parsedate_to_datetime(date_str)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_iso_datetime(value: str) -> datetime:
+    """解析命令行的 ISO 日期（如 2025-08-17T00:00:00Z 或带 +08:00 偏移），返回 UTC 的 naive datetime"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+运行时间预算
+--deadline 指定整次运行（获取 + 摘要 + 报告）的墙钟预算：
+- 剩余时间降到预算的一定比例以下时，尚未生成的文章直接使用 Nova Lite 备用模型（FALLBACK）
+- 剩余时间只够写出报告时，改用本地原文摘录，不再调用模型（EXTRACT）
+- 模型调用的超时不超过截止前的剩余时间，进行中的请求不会拖过截止时间
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+FALLBACK = 'fallback'
+EXTRACT = 'extract'
+
+# 剩余时间低于预算的该比例时改用备用模型
+DEFAULT_FALLBACK_FRACTION = 0.2
+# 为写出报告预留的秒数（不超过预算的 10%）
+DEFAULT_RESERVE_SECONDS = 5.0
+# 模型调用的最短超时（秒）
+MIN_REQUEST_TIMEOUT = 0.5
+
+
+class Deadline:
+    def __init__(self, seconds: float, fallback_fraction: float = DEFAULT_FALLBACK_FRACTION,
+                 reserve: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if seconds <= 0:
+            raise ValueError(f"时间预算必须大于 0: {seconds}")
+        self.seconds = seconds
+        self.fallback_fraction = fallback_fraction
+        self.reserve = min(DEFAULT_RESERVE_SECONDS, seconds * 0.1) if reserve is None else reserve
+        self.clock = clock
+        self.started = clock()
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def remaining(self) -> float:
+        return max(0.0, self.seconds - self.elapsed())
+
+    def degrade_level(self) -> Optional[str]:
+        """返回当前应使用的降级方式：None（正常）、FALLBACK 或 EXTRACT"""
+        remaining = self.remaining()
+        if remaining <= self.reserve:
+            return EXTRACT
+        if remaining <= self.seconds * self.fallback_fraction:
+            return FALLBACK
+        return None
+
+    def timeout(self, default: float) -> float:
+        """模型调用的超时：不超过 default，也不超过为写出报告预留时间之前的剩余时间"""
+        return max(MIN_REQUEST_TIMEOUT, min(default, self.remaining() - self.reserve))
+
+
+_deadline: Optional[Deadline] = None
+_deadline_lock = threading.Lock()
+
+
+def set_deadline(deadline: Optional[Deadline]):
+    """设置进程内共享的时间预算（None 表示不限时）"""
+    global _deadline
+    with _deadline_lock:
+        _deadline = deadline
+
+
+def get_deadline() -> Optional[Deadline]:
+    with _deadline_lock:
+        return _deadline
+
+
+def request_timeout(default: float) -> float:
+    """按当前时间预算限制模型调用的超时"""
+    deadline = get_deadline()
+    return default if deadline is None else deadline.timeout(default)
+
+
+def degrade_level() -> Optional[str]:
+    """当前应使用的降级方式，未设置时间预算时为 None"""
+    deadline = get_deadline()
+    return None if deadline is None else deadline.degrade_level()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+本地抽取式摘要
+不调用模型：把正文切分为句子，以句子的 TF-IDF 向量余弦相似度构建句子图，
+用 TextRank（偏向与标题相关的句子）给句子打分，在 token 预算内选出得分最高的句子并按原顺序输出。
+每篇文章只需几毫秒，作为模型全部失败时的最后一级备用和 --offline 模式的摘要方式。
+安装 numpy 时用矩阵运算，否则使用纯 Python 实现（结果相同）
+"""
+
+import math
+import re
+from collections import Counter
+from typing import List, Optional
+
+from content_extractor import BOILERPLATE, estimate_tokens
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 numpy 时使用纯 Python 实现（文章的句子数不多，同样在毫秒级完成）
+    np = None
+
+# 默认摘要的 token 预算和最多句子数
+DEFAULT_TOKEN_BUDGET = 120
+DEFAULT_MAX_SENTENCES = 3
+
+# 只对正文前这么多个句子建图（句子图为 O(n²)，正文已由 content_extractor 按信息量裁剪过）
+MAX_SENTENCES = 60
+# 少于这么多个词的句子（小标题、图注等）不单独入选
+MIN_SENTENCE_WORDS = 5
+
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+# 英文句末标点后接空白和大写字母/数字/引号时切分；中文句末标点后直接切分；换行总是切分
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"“(])|(?<=[。！？；])|\n+')
+TERM = re.compile(r'[a-z][a-z0-9\-]+|[0-9]+(?:\.[0-9]+)?|[一-鿿]')
+STOP_WORDS = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'of', 'to', 'in', 'on', 'for', 'with', 'by', 'at', 'from', 'as',
+    'is', 'are', 'was', 'were', 'be', 'been', 'it', 'its', 'this', 'that', 'these', 'those', 'you', 'your',
+    'we', 'our', 'can', 'will', 'also', 'now', 'has', 'have', 'which', 'when', 'how', 'more', 'into', 'than',
+    'amazon', 'aws'
+}
+
+
+def split_sentences(text: str) -> List[str]:
+    """把文本切分为句子（去掉首尾空白和空句）"""
+    sentences = (s.strip() for s in SENTENCE_BOUNDARY.split(text or ''))
+    return [s for s in sentences if s]
+
+
+def sentence_terms(sentence: str) -> List[str]:
+    """句子的词项：英文为去除停用词后的小写词和数字，中文为相邻两个汉字组成的词"""
+    tokens = TERM.findall(sentence.lower())
+    terms = [t for t in tokens if len(t) > 1 and t not in STOP_WORDS]
+    cjk = [t for t in tokens if len(t) == 1 and '一' <= t <= '鿿']
+    terms.extend(a + b for a, b in zip(cjk, cjk[1:]))
+    return terms
+
+
+def _tfidf_vectors(term_lists: List[List[str]]) -> List[dict]:
+    """每个句子的 L2 归一化 TF-IDF 向量 {词项: 权重}（IDF 以本文的句子为文档集合）"""
+    n = len(term_lists)
+    df = Counter(term for terms in term_lists for term in set(terms))
+    vectors = []
+    for terms in term_lists:
+        weights = {term: count * (math.log((1 + n) / (1 + df[term])) + 1)
+                   for term, count in Counter(terms).items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        vectors.append({term: w / norm for term, w in weights.items()} if norm else {})
+    return vectors
+
+
+def _cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(term, 0.0) for term, w in a.items())
+
+
+def _textrank_python(similarity: List[List[float]], bias: List[float]) -> List[float]:
+    n = len(similarity)
+    row_sums = [sum(row) for row in similarity]
+    scores = list(bias)
+    for _ in range(MAX_ITERATIONS):
+        # 没有相似句子的句子把得分按偏好分布分给所有句子
+        dangling = sum(scores[j] for j in range(n) if not row_sums[j])
+        updated = [
+            (1 - DAMPING) * bias[i] + DAMPING * (
+                dangling * bias[i]
+                + sum(similarity[j][i] * scores[j] / row_sums[j] for j in range(n) if row_sums[j])
+            )
+            for i in range(n)
+        ]
+        delta = sum(abs(u - s) for u, s in zip(updated, scores))
+        scores = updated
+        if delta < TOLERANCE:
+            break
+    return scores
+
+
+def _textrank_numpy(similarity: List[List[float]], bias: List[float]) -> List[float]:
+    matrix = np.asarray(similarity, dtype=float)
+    bias = np.asarray(bias, dtype=float)
+    row_sums = matrix.sum(axis=1)
+    dangling = row_sums == 0
+    transition = np.divide(matrix, row_sums[:, None], out=np.zeros_like(matrix), where=~dangling[:, None])
+    scores = bias.copy()
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) * bias + DAMPING * (scores[dangling].sum() * bias + transition.T @ scores)
+        delta = np.abs(updated - scores).sum()
+        scores = updated
+        if delta < TOLERANCE:
+            break
+    return scores.tolist()
+
+
+def rank_sentences(sentences: List[str], title: Optional[str] = None,
+                   use_numpy: Optional[bool] = None) -> List[float]:
+    """TextRank 句子得分（总和为 1）：随机游走按句子相似度转移，跳转时偏向与标题相似的句子"""
+    if not sentences:
+        return []
+    use_numpy = np is not None if use_numpy is None else use_numpy
+    if use_numpy and np is None:
+        raise ImportError("numpy 未安装")
+
+    vectors = _tfidf_vectors([sentence_terms(s) for s in sentences] + [sentence_terms(title or '')])
+    title_vector = vectors.pop()
+    n = len(sentences)
+    similarity = [[_cosine(vectors[i], vectors[j]) if i != j else 0.0 for j in range(n)] for i in range(n)]
+    bias = [1.0 + _cosine(vector, title_vector) for vector in vectors]
+    total = sum(bias)
+    bias = [b / total for b in bias]
+    return (_textrank_numpy if use_numpy else _textrank_python)(similarity, bias)
+
+
+def summarize(text: str, title: Optional[str] = None, token_budget: int = DEFAULT_TOKEN_BUDGET,
+              max_sentences: int = DEFAULT_MAX_SENTENCES, use_numpy: Optional[bool] = None) -> str:
+    """从正文（纯文本）中选出 TextRank 得分最高的句子，在 token 预算内按原顺序拼接返回"""
+    sentences = split_sentences(text)[:MAX_SENTENCES]
+    if not sentences:
+        return ''
+    # 引导语、行动号召和过短的句子不入选（全部不符合时仍从所有句子中选择）
+    candidates = [i for i, s in enumerate(sentences)
+                  if len(s.split()) >= MIN_SENTENCE_WORDS or not s.isascii()]
+    candidates = [i for i in candidates if not BOILERPLATE.search(sentences[i].lower())] or candidates
+    candidates = candidates or list(range(len(sentences)))
+
+    scores = rank_sentences(sentences, title, use_numpy)
+    ranked = sorted(candidates, key=lambda i: (-round(scores[i], 12), i))
+    selected = []
+    used = 0
+    for index in ranked:
+        cost = estimate_tokens(sentences[index])
+        if used + cost > token_budget:
+            continue
+        selected.append(index)
+        used += cost
+        if len(selected) >= max_sentences:
+            break
+
+    if not selected:
+        # 单个句子就超出预算时，截取得分最高的句子的开头
+        return sentences[ranked[0]][:token_budget * 4].rstrip() + '…'
+    separator = ' ' if all(sentences[i].isascii() for i in selected) else ''
+    return separator.join(sentences[i] for i in sorted(selected))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+RSS Feed HTTP 缓存
+按 feed URL 在本地保存响应体以及 ETag/Last-Modified，用于条件请求和 304 复用
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+from summary_cache import get_cache_dir
+
+
+class FeedHTTPCache:
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.path.join(get_cache_dir(), 'http')
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _paths(self, url: str):
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, name)
+        return base + '.json', base + '.xml'
+
+    def _write_atomic(self, path: str, data: bytes):
+        # 先写临时文件再替换，避免并发运行读到写了一半的文件
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, url: str) -> Optional[Dict]:
+        """读取缓存元数据（etag, last_modified, fetched_at, size），不存在时返回 None"""
+        meta_path, body_path = self._paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        """读取缓存的响应体（已解压）"""
+        _, body_path = self._paths(url)
+        try:
+            with open(body_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, url: str, body: bytes, etag: Optional[str] = None,
+              last_modified: Optional[str] = None):
+        """保存响应体和验证器"""
+        meta_path, body_path = self._paths(url)
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+            'size': len(body)
+        }
+        self._write_atomic(body_path, body)
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def touch(self, url: str):
+        """收到 304 后刷新缓存时间"""
+        meta = self.load(url)
+        if meta is None:
+            return
+        meta['fetched_at'] = time.time()
+        meta_path, _ = self._paths(url)
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
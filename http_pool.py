@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+HTTP keep-alive 连接池
+按 (scheme, host, port) 复用 http.client 连接，多个 feed 请求共享到 aws.amazon.com 的 TLS 连接
+每个主机同时最多 max_per_host 个连接，超出的请求等待空闲连接并复用，
+因此并发获取 20+ 个 feed 时只建立 max_per_host 次 TLS 握手
+支持 gzip 流式解压、重定向和 HTTPS 代理隧道
+"""
+
+import http.client
+import ssl
+import threading
+import urllib.parse
+import urllib.request
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# 复用的连接可能已被服务端关闭，这些异常出现时换新连接重试一次
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError
+)
+
+
+class PooledResponse:
+    def __init__(self, pool: 'HTTPConnectionPool', key: Tuple, conn: http.client.HTTPConnection,
+                 response: http.client.HTTPResponse, url: str):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.headers = response.headers
+        self.bytes_read = 0  # 网络传输的字节数（压缩后），供调用方统计下载量
+        self._closed = False
+
+    def iter_chunks(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """逐块读取响应体，gzip 编码时透明解压"""
+        decoder = None
+        if self.headers.get('Content-Encoding', '').lower() == 'gzip':
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        while True:
+            chunk = self._response.read(chunk_size)
+            if not chunk:
+                break
+            self.bytes_read += len(chunk)
+            if decoder is not None:
+                chunk = decoder.decompress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+        if decoder is not None:
+            tail = decoder.flush()
+            if tail:
+                yield tail
+
+    def iter_lines(self) -> Iterator[bytes]:
+        """逐行读取响应体，每行到达后立即产出（用于分块传输的流式响应，不支持 gzip）"""
+        while True:
+            line = self._response.readline()
+            if not line:
+                break
+            self.bytes_read += len(line)
+            yield line
+
+    def read(self) -> bytes:
+        """读取完整响应体（已解压）"""
+        return b''.join(self.iter_chunks())
+
+    def close(self):
+        """完整读取的响应把连接归还连接池，否则关闭连接"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool._release(self._key, self._conn)
+        else:
+            self._conn.close()
+            self._pool._release_slot(self._key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class HTTPConnectionPool:
+    def __init__(self, max_per_host: int = 4, timeout: float = 60):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle: Dict[Tuple, List[http.client.HTTPConnection]] = {}
+        # 每个主机的在用连接槽位，限制同时打开的连接数
+        self._slots: Dict[Tuple, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    def _new_connection(self, scheme: str, host: str, port: int,
+                        timeout: float) -> http.client.HTTPConnection:
+        """创建连接；通过 HTTP 代理访问 http URL 时需要在请求行中使用绝对 URL"""
+        absolute_url = False
+        proxy = urllib.request.getproxies().get(scheme)
+        if proxy and not urllib.request.proxy_bypass(host):
+            proxy_url = urllib.parse.urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+            proxy_port = proxy_url.port or 80
+            if scheme == 'https':
+                # HTTPS 通过 CONNECT 隧道，隧道建立后同样可以 keep-alive
+                conn = http.client.HTTPSConnection(
+                    proxy_url.hostname, proxy_port, timeout=timeout, context=self._ssl_context
+                )
+                conn.set_tunnel(host, port)
+            else:
+                conn = http.client.HTTPConnection(proxy_url.hostname, proxy_port, timeout=timeout)
+                absolute_url = True
+        elif scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+        conn.absolute_url = absolute_url
+        return conn
+
+    def _slot(self, key: Tuple) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def _release_slot(self, key: Tuple):
+        self._slot(key).release()
+
+    def _acquire(self, key: Tuple, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """等待连接槽位后取出空闲连接或新建连接，返回 (连接, 是否复用)"""
+        self._slot(key).acquire()
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.connections_reused += 1
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self.connections_created += 1
+        return self._new_connection(key[0], key[1], key[2], timeout), False
+
+    def _release(self, key: Tuple, conn: http.client.HTTPConnection):
+        """归还连接到空闲列表并释放槽位"""
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+        self._release_slot(key)
+
+    def urlopen(self, url: str, headers: Optional[Dict[str, str]] = None,
+                timeout: Optional[float] = None, max_redirects: int = 5,
+                method: str = 'GET', body: Optional[bytes] = None) -> PooledResponse:
+        """发送请求（默认 GET），返回 PooledResponse（调用方负责 close 或使用 with）"""
+        timeout = timeout or self.timeout
+        headers = dict(headers or {})
+
+        for _ in range(max_redirects + 1):
+            parts = urllib.parse.urlsplit(url)
+            scheme = parts.scheme.lower()
+            port = parts.port or (443 if scheme == 'https' else 80)
+            key = (scheme, parts.hostname, port)
+            path = urllib.parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+
+            response = None
+            for attempt in range(2):
+                conn, reused = self._acquire(key, timeout)
+                try:
+                    conn.request(method, url if conn.absolute_url else path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    break
+                except STALE_CONNECTION_ERRORS:
+                    conn.close()
+                    self._release_slot(key)
+                    if not reused or attempt == 1:
+                        raise
+                except Exception:
+                    conn.close()
+                    self._release_slot(key)
+                    raise
+
+            pooled = PooledResponse(self, key, conn, response, url)
+            location = response.headers.get('Location')
+            if response.status in REDIRECT_CODES and location:
+                pooled.read()
+                pooled.close()
+                url = urllib.parse.urljoin(url, location)
+                if response.status not in (307, 308):
+                    method, body = 'GET', None
+                continue
+            return pooled
+
+        raise http.client.HTTPException(f"Too many redirects: {url}")
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+_default_pool: Optional[HTTPConnectionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> HTTPConnectionPool:
+    """返回进程内共享的连接池"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = HTTPConnectionPool()
+        return _default_pool
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+AWS Blog 摘要任务队列
+基于 SQLite 的持久化任务日志：一次分析（博客类型 + 日期范围）为一个任务，每篇文章为一个子任务，
+状态为 pending → running → done（或多次未完成后 failed）。
+多个工作进程（可在共享同一卷的不同机器上）以租约方式认领子任务：认领时写入工作进程标识和租约到期时间，
+处理期间定期续约；进程崩溃后租约过期，子任务重新可被认领。重新运行同一任务时只处理未完成的文章。
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from summary_cache import get_cache_dir
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# 认领后多少秒内未续约视为工作进程已退出
+DEFAULT_LEASE_SECONDS = 300
+# 认领多少次仍未完成的子任务标记为 failed（避免导致进程崩溃的文章被反复认领）
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def default_worker_id() -> str:
+    """工作进程标识：主机名 + 进程号"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def make_job_id(blog_type: str, start_date: str, end_date: str) -> str:
+    """同一博客类型和日期范围的分析对应同一个任务"""
+    raw = '\x1f'.join([blog_type, start_date, end_date])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class JobQueue:
+    def __init__(self, path: Optional[str] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        if path is None:
+            path = os.path.join(get_cache_dir(), 'jobs.sqlite3')
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        # 自动提交模式，认领时显式 BEGIN IMMEDIATE 加写锁；多个进程之间由 SQLite 文件锁互斥
+        # （共享卷上不使用 WAL，WAL 依赖共享内存，不能跨机器）
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                blog_type TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                article TEXT NOT NULL,
+                state TEXT NOT NULL,
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                summary TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (job_id, state);
+        """)
+
+    def _write(self, operation):
+        """在写事务中执行 operation(conn)，返回其结果"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """返回任务信息 {blog_type, start_date, end_date, total}，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blog_type, start_date, end_date, total FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('blog_type', 'start_date', 'end_date', 'total'), row))
+
+    def create_job(self, job_id: str, blog_type: str, start_date: str, end_date: str,
+                   articles: Sequence[Dict], total: Optional[int] = None) -> bool:
+        """创建任务，每篇文章一个子任务（按列表顺序编号）；任务已存在时不做修改并返回 False
+
+        total 为合并近似重复之前的文章数（报告头部显示合并数量），默认为 len(articles)。
+        """
+        now = time.time()
+
+        def create(conn):
+            if conn.execute("SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)).fetchone():
+                return False
+            conn.execute(
+                "INSERT INTO jobs (job_id, blog_type, start_date, end_date, total, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, blog_type, start_date, end_date, len(articles) if total is None else total, now)
+            )
+            conn.executemany(
+                "INSERT INTO tasks (job_id, position, article, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, position, json.dumps(article, ensure_ascii=False), PENDING, now)
+                 for position, article in enumerate(articles)]
+            )
+            return True
+
+        return self._write(create)
+
+    def claim(self, job_id: str, worker: str, limit: int = 1) -> List[Tuple[int, Dict]]:
+        """认领最多 limit 个待处理或租约已过期的子任务，返回 [(编号, 文章)]（按编号顺序）"""
+        now = time.time()
+
+        def claim(conn):
+            # 租约过期且已达到最大认领次数的子任务不再重试
+            conn.execute(
+                "UPDATE tasks SET state = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE job_id = ? AND state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, job_id, RUNNING, now, self.max_attempts)
+            )
+            rows = conn.execute(
+                "SELECT position, article FROM tasks WHERE job_id = ? "
+                "AND (state = ? OR (state = ? AND lease_expires < ?)) ORDER BY position LIMIT ?",
+                (job_id, PENDING, RUNNING, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE job_id = ? AND position = ?",
+                [(RUNNING, worker, now + self.lease_seconds, now, job_id, position) for position, _ in rows]
+            )
+            return [(position, json.loads(article)) for position, article in rows]
+
+        return self._write(claim)
+
+    def renew(self, job_id: str, worker: str) -> int:
+        """延长该工作进程所有进行中子任务的租约，返回续约的子任务数"""
+        now = time.time()
+        return self._write(lambda conn: conn.execute(
+            "UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE job_id = ? AND state = ? AND worker = ?",
+            (now + self.lease_seconds, now, job_id, RUNNING, worker)
+        ).rowcount)
+
+    def complete(self, job_id: str, position: int, summary: str):
+        """记录子任务的摘要（租约过期后被其他进程重复处理时，以先完成的结果为准）"""
+        now = time.time()
+        self._write(lambda conn: conn.execute(
+            "UPDATE tasks SET state = ?, summary = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE job_id = ? AND position = ? AND state != ?",
+            (DONE, summary, now, job_id, position, DONE)
+        ))
+
+    def release(self, job_id: str, worker: str):
+        """放弃该工作进程所有进行中的子任务（如被中断），立即交给其他进程"""
+        now = time.time()
+        self._write(lambda conn: conn.execute(
+            "UPDATE tasks SET state = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE job_id = ? AND state = ? AND worker = ?",
+            (PENDING, now, job_id, RUNNING, worker)
+        ))
+
+    def progress(self, job_id: str) -> Dict[str, int]:
+        """返回各状态的子任务数"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY state", (job_id,)
+            ).fetchall()
+        counts = {state: 0 for state in (PENDING, RUNNING, DONE, FAILED)}
+        counts.update(dict(rows))
+        return counts
+
+    def is_finished(self, job_id: str) -> bool:
+        counts = self.progress(job_id)
+        return counts[PENDING] == 0 and counts[RUNNING] == 0
+
+    def results(self, job_id: str) -> List[Dict]:
+        """按编号返回所有文章，已完成的文章带 summary 字段"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT article, summary FROM tasks WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+        articles = []
+        for article, summary in rows:
+            article = json.loads(article)
+            if summary is not None:
+                article['summary'] = summary
+            articles.append(article)
+        return articles
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LeaseKeeper:
+    """后台定期续约（间隔为租约时长的 1/3），处理耗时超过租约的批次时子任务不会被其他进程抢走"""
+
+    def __init__(self, queue: JobQueue, job_id: str, worker: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker = worker
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            try:
+                self.queue.renew(self.job_id, self.worker)
+            except sqlite3.Error:
+                # 共享卷暂时不可用时下次再续约
+                pass
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
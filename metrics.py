@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+运行指标
+记录各阶段耗时（p50/p95/p99）和计数器（重试、限流、备用模型、下载字节数等），
+运行结束时导出为 JSON 摘要或 Prometheus textfile（供 node_exporter textfile collector 采集）
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Prometheus 指标名前缀
+METRIC_PREFIX = 'aws_blog_rss'
+
+QUANTILES = (50, 95, 99)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """线性插值百分位数，q 取 0-100"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations: Dict[str, List[float]] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self.started_at = time.time()
+
+    def observe(self, stage: str, seconds: float):
+        """记录一次阶段耗时（秒）"""
+        with self._lock:
+            self._durations.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """记录 with 块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None):
+        """计数器加 value"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counter(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
+        """返回计数器的值；不指定 labels 时返回所有标签之和"""
+        with self._lock:
+            if labels is not None:
+                return self._counters.get((name, _label_key(labels)), 0)
+            return sum(v for (n, _), v in self._counters.items() if n == name)
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict:
+        """返回各阶段耗时统计、计数器和派生指标"""
+        with self._lock:
+            durations = {stage: list(values) for stage, values in self._durations.items()}
+            counters = dict(self._counters)
+
+        stages = {}
+        for stage, values in durations.items():
+            stages[stage] = {
+                'count': len(values),
+                'total': sum(values),
+                'mean': sum(values) / len(values),
+                **{f'p{q}': percentile(values, q) for q in QUANTILES},
+                'max': max(values)
+            }
+
+        counter_values: Dict[str, Dict] = {}
+        for (name, key), value in counters.items():
+            label = ','.join(f'{k}={v}' for k, v in key) or 'total'
+            counter_values.setdefault(name, {})[label] = value
+
+        generated = self.counter('summaries_generated_total')
+        fallbacks = self.counter('fallbacks_total')
+        return {
+            'started_at': self.started_at,
+            'elapsed_seconds': time.time() - self.started_at,
+            'stages': stages,
+            'counters': counter_values,
+            'fallback_rate': fallbacks / generated if generated else 0.0,
+            'prompt_cache_hit_rate': self.prompt_cache_hit_rate(),
+            'translation_memory_hit_rate': self.translation_memory_hit_rate()
+        }
+
+    def prompt_cache_hit_rate(self) -> float:
+        """输入 token 中由提示缓存读取的比例"""
+        cache_read = self.counter('bedrock_cache_read_tokens_total')
+        prompt_tokens = (self.counter('bedrock_input_tokens_total') + cache_read
+                         + self.counter('bedrock_cache_write_tokens_total'))
+        return cache_read / prompt_tokens if prompt_tokens else 0.0
+
+    def translation_memory_hit_rate(self) -> float:
+        """翻译记忆的句段命中率（精确命中 + 归一化命中）"""
+        segments = self.counter('translation_memory_segments_total')
+        misses = self.counter('translation_memory_segments_total', {'result': 'miss'})
+        return (segments - misses) / segments if segments else 0.0
+
+    def to_prometheus(self) -> str:
+        """按 Prometheus 文本格式输出（阶段耗时为 summary，计数器为 counter）"""
+        with self._lock:
+            durations = {stage: list(values) for stage, values in self._durations.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        duration_name = f'{METRIC_PREFIX}_stage_duration_seconds'
+        lines.append(f'# HELP {duration_name} Duration of each pipeline stage.')
+        lines.append(f'# TYPE {duration_name} summary')
+        for stage, values in sorted(durations.items()):
+            key = (('stage', stage),)
+            for q in QUANTILES:
+                lines.append(f'{duration_name}{_format_labels(key, {"quantile": str(q / 100)})} '
+                             f'{percentile(values, q):.6f}')
+            lines.append(f'{duration_name}_sum{_format_labels(key)} {sum(values):.6f}')
+            lines.append(f'{duration_name}_count{_format_labels(key)} {len(values)}')
+
+        names = sorted({name for name, _ in counters})
+        for name in names:
+            metric = f'{METRIC_PREFIX}_{name}'
+            lines.append(f'# TYPE {metric} counter')
+            for (counter_name, key), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f'{metric}{_format_labels(key)} {value:g}')
+
+        generated = self.counter('summaries_generated_total')
+        fallback_rate = self.counter('fallbacks_total') / generated if generated else 0.0
+        lines.append(f'# TYPE {METRIC_PREFIX}_fallback_rate gauge')
+        lines.append(f'{METRIC_PREFIX}_fallback_rate {fallback_rate:.6f}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_prompt_cache_hit_rate gauge')
+        lines.append(f'{METRIC_PREFIX}_prompt_cache_hit_rate {self.prompt_cache_hit_rate():.6f}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_translation_memory_hit_rate gauge')
+        lines.append(f'{METRIC_PREFIX}_translation_memory_hit_rate {self.translation_memory_hit_rate():.6f}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge')
+        lines.append(f'{METRIC_PREFIX}_last_run_timestamp_seconds {time.time():.0f}')
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path: str):
+        """写出 JSON 摘要"""
+        _atomic_write(path, json.dumps(self.snapshot(), indent=2, ensure_ascii=False) + '\n')
+
+    def write_prometheus(self, path: str):
+        """写出 Prometheus textfile（先写临时文件再替换，避免采集到半个文件）"""
+        _atomic_write(path, self.to_prometheus())
+
+    def print_summary(self):
+        """输出各阶段耗时摘要到 stderr"""
+        snapshot = self.snapshot()
+        parts = [f"{stage} p50 {s['p50']:.2f}s/p95 {s['p95']:.2f}s (x{s['count']})"
+                 for stage, s in sorted(snapshot['stages'].items())]
+        if parts:
+            print(f"阶段耗时: {'; '.join(parts)}", file=sys.stderr)
+        print(f"模型重试 {self.counter('bedrock_retries_total'):g} 次，"
+              f"限流 {self.counter('bedrock_throttled_total'):g} 次，"
+              f"备用率 {snapshot['fallback_rate']:.0%}，"
+              f"下载 {self.counter('rss_bytes_downloaded_total'):g} 字节", file=sys.stderr)
+        cache_read = self.counter('bedrock_cache_read_tokens_total')
+        cache_write = self.counter('bedrock_cache_write_tokens_total')
+        prompt_tokens = self.counter('bedrock_input_tokens_total') + cache_read + cache_write
+        if prompt_tokens:
+            print(f"输入 token {prompt_tokens:g}（提示缓存读取 {cache_read:g}，写入 {cache_write:g}，"
+                  f"缓存命中 {snapshot['prompt_cache_hit_rate']:.0%}），"
+                  f"输出 token {self.counter('bedrock_output_tokens_total'):g}", file=sys.stderr)
+        degraded = self.counter('degraded_total')
+        if degraded:
+            print(f"时间预算不足降级 {degraded:g} 篇（备用模型 {self.counter('degraded_total', {'level': 'fallback'}):g}，"
+                  f"原文摘录 {self.counter('degraded_total', {'level': 'extract'}):g}）", file=sys.stderr)
+        segments = self.counter('translation_memory_segments_total')
+        if segments:
+            print(f"翻译记忆句段 {segments:g} 个（精确命中 "
+                  f"{self.counter('translation_memory_segments_total', {'result': 'exact'}):g}，归一化命中 "
+                  f"{self.counter('translation_memory_segments_total', {'result': 'normalized'}):g}，"
+                  f"命中率 {snapshot['translation_memory_hit_rate']:.0%}），"
+                  f"完全由翻译记忆生成 {self.counter('translation_memory_articles_total', {'source': 'memory'}):g} 篇",
+                  file=sys.stderr)
+        extracted = self.counter('extractive_summaries_total')
+        if extracted:
+            print(f"本地抽取式摘要 {extracted:g} 篇（离线 {self.counter('extractive_summaries_total', {'reason': 'offline'}):g}，"
+                  f"模型全部失败 {self.counter('extractive_summaries_total', {'reason': 'fallback'}):g}）",
+                  file=sys.stderr)
+        skipped = self.counter('bedrock_short_circuited_total')
+        if skipped:
+            print(f"熔断期间跳过主模型调用 {skipped:g} 次", file=sys.stderr)
+        saved = self.counter('near_duplicates_total')
+        if saved:
+            print(f"近似重复合并节省摘要生成 {saved:g} 次（本次运行 "
+                  f"{self.counter('near_duplicates_total', {'scope': 'run'}):g}，"
+                  f"缓存 {self.counter('near_duplicates_total', {'scope': 'cache'}):g}）", file=sys.stderr)
+
+
+def _atomic_write(path: str, text: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """返回进程内共享的指标注册表"""
+    return _metrics
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+模型路由
+按文章的处理方式（翻译/摘要）、内容长度和各模型的实时延迟/错误率，为每篇文章决定模型的尝试顺序：
+- quality:  始终先用主模型（Claude 3.7 Sonnet），失败后使用低成本模型（原有行为）
+- balanced: 较短的翻译类条目先用低成本模型（Nova Lite），长篇摘要仍先用主模型（默认）
+- cost:     所有文章先用低成本模型，失败后使用主模型
+并按响应中的 token 用量估算每个模型的成本
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from rate_limiter import SUCCESS
+
+# 实时统计的平滑系数（越大越偏重最近的请求）
+EWMA_ALPHA = 0.2
+# 至少有这么多次请求后才根据实时统计调整路由
+MIN_SAMPLES = 5
+
+
+class ModelProfile:
+    """模型的显示名称和按量价格（美元 / 1000 token）"""
+
+    def __init__(self, name: str, input_price: float, output_price: float,
+                 cache_read_price: Optional[float] = None, cache_write_price: Optional[float] = None):
+        self.name = name
+        self.input_price = input_price
+        self.output_price = output_price
+        self.cache_read_price = input_price if cache_read_price is None else cache_read_price
+        self.cache_write_price = input_price if cache_write_price is None else cache_write_price
+
+    def cost(self, usage: Dict[str, int]) -> float:
+        """按 token 用量（bedrock_backend.usage_tokens 的字段）估算一次请求的成本"""
+        return (usage.get('input_tokens', 0) * self.input_price
+                + usage.get('output_tokens', 0) * self.output_price
+                + usage.get('cache_read_tokens', 0) * self.cache_read_price
+                + usage.get('cache_write_tokens', 0) * self.cache_write_price) / 1000
+
+
+class ModelStats:
+    """单个模型的实时统计：请求数、错误数、延迟和错误率的指数加权移动平均"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+
+    def record(self, seconds: float, ok: bool):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        else:
+            # 只有成功的请求计入延迟（失败的请求可能立即返回，也可能等到超时）
+            self.latency = seconds if self.latency is None else \
+                (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * seconds
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA * (0.0 if ok else 1.0)
+
+
+class RoutingPolicy:
+    """路由策略
+
+    cheap_modes 中的处理方式在内容不超过 short_tokens（None 表示不限长度）时先用低成本模型；
+    这些处理方式的较长内容在主模型的平均延迟超过低成本模型的 latency_ratio 倍时也先用低成本模型；
+    低成本模型的错误率超过 max_error_rate 时改为先用主模型（主模型持续失败由熔断器处理）。
+    """
+
+    def __init__(self, name: str, cheap_modes: Tuple[str, ...] = (), short_tokens: Optional[int] = None,
+                 latency_ratio: Optional[float] = None, max_error_rate: float = 0.5):
+        self.name = name
+        self.cheap_modes = cheap_modes
+        self.short_tokens = short_tokens
+        self.latency_ratio = latency_ratio
+        self.max_error_rate = max_error_rate
+
+
+# What's New 条目通常只有一两段（正文 token 预算为 400），超过 300 token 的视为较长内容
+POLICIES = {
+    'quality': RoutingPolicy('quality'),
+    'balanced': RoutingPolicy('balanced', cheap_modes=('translate',), short_tokens=300, latency_ratio=3.0),
+    'cost': RoutingPolicy('cost', cheap_modes=('translate', 'summary'))
+}
+DEFAULT_POLICY = 'balanced'
+
+
+class ModelRouter:
+    def __init__(self, primary: str, cheap: str, profiles: Dict[str, ModelProfile],
+                 policy: RoutingPolicy = POLICIES[DEFAULT_POLICY]):
+        self.primary = primary
+        self.cheap = cheap
+        self.profiles = profiles
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._stats = {model_id: ModelStats() for model_id in (primary, cheap)}
+
+    def _healthy(self, model_id: str) -> bool:
+        """请求数不足 MIN_SAMPLES 或错误率不超过 max_error_rate"""
+        stats = self._stats[model_id]
+        return stats.requests < MIN_SAMPLES or stats.error_rate <= self.policy.max_error_rate
+
+    def _primary_slow(self) -> bool:
+        primary, cheap = self._stats[self.primary], self._stats[self.cheap]
+        if self.policy.latency_ratio is None or primary.latency is None or cheap.latency is None:
+            return False
+        if primary.requests < MIN_SAMPLES or cheap.requests < MIN_SAMPLES:
+            return False
+        return primary.latency > self.policy.latency_ratio * cheap.latency
+
+    def route(self, mode: str, tokens: int) -> List[str]:
+        """返回该文章依次尝试的模型 ID"""
+        policy = self.policy
+        with self._lock:
+            prefer_cheap = False
+            if mode in policy.cheap_modes:
+                short = policy.short_tokens is None or tokens <= policy.short_tokens
+                prefer_cheap = short or self._primary_slow()
+            if prefer_cheap and self._healthy(self.cheap):
+                return [self.cheap, self.primary]
+        return [self.primary, self.cheap]
+
+    def record(self, model_id: str, seconds: float, outcome: str):
+        """记录一次模型调用的耗时和结果（rate_limiter 的 SUCCESS/THROTTLED/ERROR）"""
+        with self._lock:
+            self._stats.setdefault(model_id, ModelStats()).record(seconds, outcome == SUCCESS)
+
+    def cost(self, model_id: str, usage: Dict[str, int]) -> float:
+        profile = self.profiles.get(model_id)
+        return profile.cost(usage) if profile else 0.0
+
+    def name(self, model_id: str) -> str:
+        profile = self.profiles.get(model_id)
+        return profile.name if profile else model_id
+
+    def stats(self) -> Dict[str, Dict]:
+        """各模型的请求数、错误数、平均延迟（EWMA）和错误率"""
+        with self._lock:
+            return {model_id: {'requests': s.requests, 'errors': s.errors,
+                               'latency': s.latency, 'error_rate': s.error_rate}
+                    for model_id, s in self._stats.items()}
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def set_router(router: ModelRouter):
+    global _router
+    with _router_lock:
+        _router = router
+
+
+def get_router() -> Optional[ModelRouter]:
+    with _router_lock:
+        return _router
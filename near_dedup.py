@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+跨 feed 近似重复检测
+解析时为每篇文章计算 64 位 SimHash 指纹（标题 + 正文的词 3-gram），按 4 段 16 位分桶建立索引：
+汉明距离不超过 3 的两个指纹至少有一段完全相同，因此只需比较同桶的候选。
+只合并来自不同 feed 的文章（同一 feed 中模板化的短更新可能很相似，但并不是同一篇），
+交叉发布到多个博客的同一篇文章只生成一次摘要
+"""
+
+import hashlib
+import re
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // BANDS
+
+# 汉明距离不超过该值视为近似重复（必须小于 BANDS 才能保证分桶不漏检）
+DEFAULT_MAX_DISTANCE = 3
+
+# 词 n-gram 长度；只处理正文开头（交叉发布的文章开头即相同，不必处理全文）
+SHINGLE_SIZE = 3
+MAX_CHARS = 3000
+MAX_WORDS = 300
+# 特征太少的短文本（如一句话的更新）指纹不可靠，不计算指纹
+MIN_SHINGLES = 8
+
+TAG = re.compile(r'<[^>]+>')
+ENTITY = re.compile(r'&[#\w]+;')
+TOKEN = re.compile(r'[a-z0-9]+|[一-鿿]')
+
+# BIT_TABLES[j] 把字节映射为其第 j 位（从高位数起）的值，用于按列统计哈希位
+BIT_TABLES = [bytes((b >> (7 - j)) & 1 for b in range(256)) for j in range(8)]
+
+
+def _tokens(text: str) -> List[str]:
+    text = ENTITY.sub(' ', TAG.sub(' ', text[:MAX_CHARS])).lower()
+    return TOKEN.findall(text)[:MAX_WORDS]
+
+
+def simhash(text: str) -> Optional[int]:
+    """计算文本的 64 位 SimHash，特征不足时返回 None"""
+    words = _tokens(text)
+    shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+
+    # 所有特征的 8 字节哈希拼接后按字节列切片，再逐位查表计数（切片、translate 和 count 都在 C 中完成）
+    digests = b''.join(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest() for s in shingles)
+    half = len(shingles) / 2
+    value = 0
+    for offset in range(FINGERPRINT_BITS // 8):
+        column = digests[offset::8]
+        for table in BIT_TABLES:
+            value = (value << 1) | (column.translate(table).count(1) > half)
+    return value
+
+
+def fingerprint_article(title: str, content: str) -> Optional[str]:
+    """返回文章指纹（16 位十六进制字符串，可直接写入 JSON 和数据库），无法计算时返回 None"""
+    value = simhash(f"{title or ''} {content or ''}")
+    return None if value is None else format(value, '016x')
+
+
+def parse_fingerprint(value) -> Optional[int]:
+    """把十六进制指纹转换为整数，无效值返回 None"""
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value, 16) if value else None
+    except ValueError:
+        return None
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def band_keys(fingerprint: int) -> List[Tuple[int, int]]:
+    """返回指纹的 (段号, 段值) 列表"""
+    mask = (1 << BAND_BITS) - 1
+    return [(band, (fingerprint >> (band * BAND_BITS)) & mask) for band in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """内存中的指纹分桶索引"""
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, Hashable]]] = {}
+
+    def find(self, fingerprint: int,
+             accept: Callable[[Hashable], bool] = lambda key: True) -> Optional[Hashable]:
+        """返回 accept(key) 为真的近似重复条目中最小的键，没有时返回 None"""
+        best = None
+        for band in band_keys(fingerprint):
+            for other, key in self._buckets.get(band, ()):
+                if hamming_distance(fingerprint, other) <= self.max_distance and accept(key):
+                    if best is None or key < best:
+                        best = key
+        return best
+
+    def add(self, key: Hashable, fingerprint: int):
+        for band in band_keys(fingerprint):
+            self._buckets.setdefault(band, []).append((fingerprint, key))
+
+
+def group_near_duplicates(articles: List[Dict], partition: Callable[[Dict], Hashable] = lambda a: None,
+                          max_distance: int = DEFAULT_MAX_DISTANCE) -> List[List[int]]:
+    """把文章下标按近似重复分组，每组第一个下标为代表文章；各组按代表文章的下标排序
+
+    只有 partition(article) 相同的文章才会合并（如翻译和摘要两种处理方式）；
+    指纹相近的文章只在来源 feed 不同时合并，链接相同的文章即使没有指纹也合并。
+    """
+    indexes: Dict[Hashable, NearDuplicateIndex] = {}
+    by_link: Dict[Tuple[Hashable, str], int] = {}
+    groups: Dict[int, List[int]] = {}
+
+    for position, article in enumerate(articles):
+        part = partition(article)
+        link_key = (part, article.get('link') or '')
+        representative = by_link.get(link_key) if link_key[1] else None
+
+        fingerprint = parse_fingerprint(article.get('simhash'))
+        index = indexes.setdefault(part, NearDuplicateIndex(max_distance))
+        if representative is None and fingerprint is not None:
+            feed = article.get('feed')
+            representative = index.find(fingerprint, lambda key: articles[key].get('feed') != feed)
+
+        if representative is None:
+            groups[position] = [position]
+            if fingerprint is not None:
+                index.add(position, fingerprint)
+            if link_key[1]:
+                by_link[link_key] = position
+        else:
+            groups[representative].append(position)
+    return [groups[key] for key in sorted(groups)]
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+AWS Blog 分析流水线
+fetch → parse → select content → summarize → render 的进程内接口，
+rss_parser.py、blog_analyzer.py 和 cli.py 都是它的薄封装，文章不经过子进程和 JSON 往返
+"""
+
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, TextIO, Union
+
+from blog_analyzer import (
+    DEFAULT_CONCURRENCY, DEFAULT_TRANSLATE_BATCH_SIZE, fallback_summary, flatten_feed_results,
+    generate_chinese_summary, generate_degraded_summary, get_processing_mode, is_offline,
+    select_content_source, translate_articles
+)
+from deadline import degrade_level
+from near_dedup import fingerprint_article, group_near_duplicates
+from rss_parser import AWSBlogRSSParser
+
+
+def split_blog_types(spec: str) -> List[str]:
+    """解析逗号分隔的博客类型"""
+    return [t.strip() for t in spec.split(',') if t.strip()]
+
+
+def create_parser(use_http_cache: bool = True, max_age: float = 0, use_archive: bool = True,
+                  archive_path: Optional[str] = None) -> AWSBlogRSSParser:
+    """创建 RSS 解析器，HTTP 缓存或文章归档不可用时继续无缓存/无归档运行"""
+    http_cache = None
+    if use_http_cache:
+        from http_cache import FeedHTTPCache
+        try:
+            http_cache = FeedHTTPCache()
+        except OSError as e:
+            print(f"HTTP 缓存不可用，继续无缓存运行: {e}", file=sys.stderr)
+
+    archive = None
+    if use_archive:
+        from article_archive import ArticleArchive
+        try:
+            archive = ArticleArchive(archive_path)
+        except Exception as e:
+            print(f"文章归档不可用，继续无归档运行: {e}", file=sys.stderr)
+
+    return AWSBlogRSSParser(http_cache=http_cache, max_age=max_age, archive=archive)
+
+
+def fetch(blog_type_spec: str, start_date: str, end_date: str,
+          parser: Optional[AWSBlogRSSParser] = None,
+          workers: int = 8) -> Union[List[Dict], Dict[str, Dict]]:
+    """获取并解析文章
+
+    单个博客类型返回文章列表；多个类型（逗号分隔）或 all 返回
+    {博客类型: {url, aliases, articles, error}}，含未知类型时抛出 ValueError。
+    """
+    parser = parser or create_parser()
+    blog_types = split_blog_types(blog_type_spec)
+    if len(blog_types) == 1 and blog_types[0] != 'all':
+        return parser.get_blog_articles(blog_types[0], start_date, end_date)
+    return parser.get_multi_blog_articles(blog_types, start_date, end_date, max_workers=workers)
+
+
+def fetch_articles(blog_type_spec: str, start_date: str, end_date: str,
+                   parser: Optional[AWSBlogRSSParser] = None, workers: int = 8) -> List[Dict]:
+    """获取文章并合并为按发布时间倒序的列表（多 feed 时每篇标记来源 feed）"""
+    result = fetch(blog_type_spec, start_date, end_date, parser=parser, workers=workers)
+    if isinstance(result, dict):
+        return flatten_feed_results(result)
+    return result
+
+
+def summarize_article(article: Dict, blog_type: str, cache=None,
+                      on_delta: Optional[Callable[[str], None]] = None) -> str:
+    """为单篇文章选择内容源并生成摘要，出错时返回模板摘要（传入 on_delta 时流式回调生成的文本）
+
+    时间预算即将用完时按降级方式生成，实际降级的文章记录 degraded 字段（fallback/extract）。
+    """
+    # 多 feed 报告中按文章所属 feed 决定翻译或摘要
+    article_type = article.get('feed', blog_type)
+    try:
+        level = degrade_level()
+        if level:
+            summary, degraded = generate_degraded_summary(
+                article['title'],
+                select_content_source(article, article_type),
+                article_type,
+                link=article['link'],
+                cache=cache,
+                fingerprint=article.get('simhash'),
+                level=level
+            )
+            if degraded:
+                article['degraded'] = degraded
+            return summary
+        return generate_chinese_summary(
+            article['title'],
+            select_content_source(article, article_type),
+            article_type,
+            link=article['link'],
+            cache=cache,
+            fingerprint=article.get('simhash'),
+            on_delta=on_delta
+        )
+    except Exception as e:
+        # 单篇文章出错（如缓存数据库被锁）不影响其他文章
+        print(f"生成摘要时出错: {article['title']}: {e}", file=sys.stderr)
+        return fallback_summary(article['title'], article_type)
+
+
+def collapse_duplicates(articles: List[Dict], blog_type: str) -> List[Dict]:
+    """合并跨 feed 交叉发布的近似重复文章，返回每组的代表文章（保持原顺序）
+
+    代表文章的 duplicates 字段记录同组其他文章的 {feed, title, link}，报告中列出全部来源链接；
+    只有处理方式（翻译/摘要）相同的文章才会合并。
+    """
+    from metrics import get_metrics
+
+    for article in articles:
+        # 旧版本归档中的文章没有指纹
+        if 'simhash' not in article:
+            article_type = article.get('feed', blog_type)
+            fingerprint = fingerprint_article(article['title'], select_content_source(article, article_type))
+            if fingerprint is not None:
+                article['simhash'] = fingerprint
+
+    groups = group_near_duplicates(
+        articles, partition=lambda a: get_processing_mode(a.get('feed', blog_type))
+    )
+    collapsed = []
+    for group in groups:
+        representative = articles[group[0]]
+        if len(group) > 1:
+            representative['duplicates'] = [
+                {'feed': articles[i].get('feed', blog_type), 'title': articles[i]['title'],
+                 'link': articles[i]['link']}
+                for i in group[1:]
+            ]
+        collapsed.append(representative)
+
+    saved = len(articles) - len(collapsed)
+    if saved:
+        get_metrics().increment('near_duplicates_total', saved, labels={'scope': 'run'})
+        print(f"发现 {saved} 篇跨 feed 近似重复文章，合并后节省 {saved} 次摘要生成", file=sys.stderr)
+    return collapsed
+
+
+def plan_batches(articles: List[Dict], blog_type: str,
+                 batch_size: int = DEFAULT_TRANSLATE_BATCH_SIZE) -> List[List[int]]:
+    """把文章下标分组：翻译类文章按出现顺序每 batch_size 篇一组（多 feed 报告中不一定相邻），
+    其余每篇单独一组；各组按首篇文章的下标排序
+    """
+    groups = []
+    current = None
+    for index, article in enumerate(articles):
+        if batch_size > 1 and get_processing_mode(article.get('feed', blog_type)) == 'translate':
+            if current is None or len(current) >= batch_size:
+                current = []
+                groups.append(current)
+            current.append(index)
+        else:
+            groups.append([index])
+    return groups
+
+
+def summarize_group(articles: List[Dict], blog_type: str, cache=None,
+                    on_delta: Optional[Callable[[str], None]] = None) -> List[str]:
+    """生成一组文章的摘要：多篇翻译类文章合并为一次请求（不流式输出），单篇按原流程处理
+
+    时间预算即将用完时逐篇按降级方式处理。
+    """
+    if len(articles) == 1:
+        return [summarize_article(articles[0], blog_type, cache, on_delta)]
+    if degrade_level():
+        return [summarize_article(article, blog_type, cache) for article in articles]
+    try:
+        return translate_articles(articles, blog_type, cache)
+    except Exception as e:
+        print(f"批量翻译出错，逐篇处理: {e}", file=sys.stderr)
+        return [summarize_article(article, blog_type, cache) for article in articles]
+
+
+def summarize_articles(articles: List[Dict], blog_type: str, cache=None,
+                       concurrency: int = DEFAULT_CONCURRENCY,
+                       on_result: Optional[Callable[[int, Dict], None]] = None,
+                       batch_size: int = DEFAULT_TRANSLATE_BATCH_SIZE,
+                       on_delta: Optional[Callable[[int, str], None]] = None) -> List[Dict]:
+    """并发生成摘要并写入每篇文章的 summary 字段，按输入顺序回调 on_result(index, article)
+
+    传入 on_delta 时单篇生成的摘要流式输出，每段文本到达时在工作线程中回调 on_delta(index, text)。
+    """
+    from scheduler import run_ordered
+
+    groups = plan_batches(articles, blog_type, batch_size)
+    # 批量组中的文章不一定相邻，已完成的文章按下标顺序回调
+    finished = set()
+    next_index = 0
+
+    def handle(_, group, summaries):
+        nonlocal next_index
+        for index, summary in zip(group, summaries):
+            articles[index]['summary'] = summary
+            finished.add(index)
+        while next_index in finished:
+            finished.discard(next_index)
+            if on_result is not None:
+                on_result(next_index, articles[next_index])
+            next_index += 1
+
+    def work(group):
+        group_delta = None
+        if on_delta is not None and len(group) == 1:
+            group_delta = lambda text: on_delta(group[0], text)
+        return summarize_group([articles[i] for i in group], blog_type, cache, group_delta)
+
+    run_ordered(groups, work, concurrency, handle)
+    return articles
+
+
+def write_report(stream: TextIO, articles: List[Dict], blog_type: str, start_date: str,
+                 end_date: str, cache=None, concurrency: int = DEFAULT_CONCURRENCY,
+                 batch_size: int = DEFAULT_TRANSLATE_BATCH_SIZE, dedup: bool = True,
+                 stream_summaries: bool = False, max_articles: Optional[int] = None):
+    """先写出报告头部，再边生成摘要边按原顺序写出每篇文章，返回 MarkdownReportWriter
+
+    dedup 为 True 时跨 feed 的近似重复文章合并为一条，只生成一次摘要。
+    stream_summaries 为 True 时，下一篇待写出文章的摘要随模型生成逐段写出；
+    其后的文章先在内存中缓冲生成的文本，轮到它时一次写出缓冲的部分再继续流式输出。
+    max_articles 限制报告的文章数，只保留发布时间最新的文章；
+    设置了时间预算（deadline.set_deadline）时先处理排在前面的文章，降级的条目在报告末尾列出。
+    """
+    from metrics import get_metrics
+    from report_writer import MarkdownReportWriter
+
+    metrics = get_metrics()
+    total = len(articles)
+    if dedup:
+        articles = collapse_duplicates(articles, blog_type)
+    merged = total - len(articles)
+    omitted = 0
+    if max_articles is not None and len(articles) > max_articles:
+        articles = select_newest(articles, max_articles)
+        omitted = total - merged - len(articles)
+    writer = MarkdownReportWriter(stream, blog_type, start_date, end_date)
+    with metrics.timer('render_report'):
+        writer.write_header(len(articles), merged=merged, omitted=omitted, offline=is_offline())
+
+    lock = threading.Lock()
+    partial: Dict[int, List[str]] = {}
+    # head 为下一篇待写出文章的下标，streaming 为已开始流式写出的文章下标
+    head = 0
+    streaming = None
+
+    def start_streaming(index):
+        nonlocal streaming
+        writer.begin_article(index + 1, articles[index])
+        streaming = index
+        for text in partial.pop(index, ()):
+            writer.write_partial(text)
+
+    def on_delta(index, text):
+        with lock:
+            if index != head:
+                partial.setdefault(index, []).append(text)
+                return
+            if streaming != index:
+                start_streaming(index)
+            writer.write_partial(text)
+
+    def on_result(index, article):
+        nonlocal head, streaming
+        with lock, metrics.timer('render_report'):
+            if streaming == index:
+                writer.end_article(article['summary'])
+                streaming = None
+            else:
+                writer.write_article(index + 1, article)
+            partial.pop(index, None)
+            head = index + 1
+            if head in partial:
+                start_streaming(head)
+        done = index + 1
+        if done % 10 == 0 and done < len(articles):
+            print(f"已处理 {done}/{len(articles)} 篇文章...", file=sys.stderr)
+
+    summarize_articles(articles, blog_type, cache, concurrency, on_result, batch_size,
+                       on_delta=on_delta if stream_summaries else None)
+    if writer.degraded:
+        writer.write_degraded_notice()
+        print(f"时间预算不足，{len(writer.degraded)} 篇文章降级处理: "
+              f"{', '.join(str(index) for index, _, _ in writer.degraded)}", file=sys.stderr)
+    return writer
+
+
+def select_newest(articles: List[Dict], limit: int) -> List[Dict]:
+    """保留发布时间最新的 limit 篇文章（保持原顺序）"""
+    newest = sorted(range(len(articles)), key=lambda i: articles[i]['pub_date'], reverse=True)[:limit]
+    return [articles[i] for i in sorted(newest)]
+
+
+def enqueue_job(queue, job_id: str, articles: List[Dict], blog_type: str, start_date: str,
+                end_date: str, dedup: bool = True) -> bool:
+    """把文章写入任务队列（合并近似重复后每篇一个子任务），任务已存在时返回 False"""
+    total = len(articles)
+    if dedup:
+        articles = collapse_duplicates(articles, blog_type)
+    return queue.create_job(job_id, blog_type, start_date, end_date, articles, total=total)
+
+
+def process_job(queue, job_id: str, blog_type: str, cache=None, worker: Optional[str] = None,
+                concurrency: int = DEFAULT_CONCURRENCY, batch_size: int = DEFAULT_TRANSLATE_BATCH_SIZE,
+                poll_interval: float = 5.0, wait: bool = True) -> int:
+    """作为一个工作进程处理任务：反复认领一批子任务并生成摘要，每篇完成后立即写回队列
+
+    其他工作进程仍持有租约时，wait 为 True 则每 poll_interval 秒检查一次，
+    直到所有子任务结束（期间接手租约过期的子任务）。返回本进程完成的文章数。
+    """
+    from job_queue import LeaseKeeper, default_worker_id
+
+    worker = worker or default_worker_id()
+    # 翻译类文章批量请求，一次认领足够凑满每个并发槽位的一批
+    if any(get_processing_mode(t) == 'translate' for t in split_blog_types(blog_type)):
+        claim_size = max(concurrency, 1) * max(batch_size, 1)
+    else:
+        claim_size = max(concurrency, 1)
+
+    processed = 0
+    try:
+        while True:
+            claimed = queue.claim(job_id, worker, claim_size)
+            if not claimed:
+                if not wait or queue.is_finished(job_id):
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            positions = [position for position, _ in claimed]
+            articles = [article for _, article in claimed]
+
+            def on_result(index, article):
+                queue.complete(job_id, positions[index], article['summary'])
+
+            with LeaseKeeper(queue, job_id, worker):
+                summarize_articles(articles, blog_type, cache, concurrency, on_result, batch_size)
+            processed += len(claimed)
+            counts = queue.progress(job_id)
+            print(f"任务 {job_id}: 已完成 {counts['done']}/{sum(counts.values())} 篇文章"
+                  f"（本进程 {processed} 篇）", file=sys.stderr)
+    except BaseException:
+        # 被中断时立即交还未完成的子任务，不必等待租约过期
+        queue.release(job_id, worker)
+        raise
+    return processed
+
+
+def write_job_report(stream: TextIO, queue, job_id: str):
+    """按原顺序渲染任务队列中的结果，未完成（failed）的文章使用备用摘要，返回 MarkdownReportWriter"""
+    from report_writer import MarkdownReportWriter
+
+    job = queue.get_job(job_id)
+    blog_type = job['blog_type']
+    articles = queue.results(job_id)
+    writer = MarkdownReportWriter(stream, blog_type, job['start_date'], job['end_date'])
+    writer.write_header(len(articles), merged=job['total'] - len(articles))
+    for index, article in enumerate(articles):
+        if 'summary' not in article:
+            article_type = article.get('feed', blog_type)
+            article['summary'] = fallback_summary(article['title'], article_type)
+        writer.write_article(index + 1, article)
+    return writer
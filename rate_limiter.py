@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Bedrock 模型限流器
+每个模型一个令牌桶（请求/分钟）加 AIMD 自适应并发上限，供并发摘要生成的所有线程共享；
+每个模型一个熔断器，持续限流时暂停调用该模型，由调用方直接使用备用模型
+"""
+
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from bedrock_backend import ThrottlingError
+
+# 调用结果（用于调整自适应并发上限）
+SUCCESS = 'success'
+THROTTLED = 'throttled'
+ERROR = 'error'
+
+# 熔断器默认参数：连续限流多少次后打开，打开多少秒后放行一个探测请求
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT = 30.0
+
+
+class AdaptiveConcurrency:
+    """AIMD 自适应并发上限
+
+    每次成功调用上限加 1/limit（约每轮并发加 1），被限流时上限减半；
+    同一轮中多个请求同时被限流只减一次（只有在上次减少之后开始的请求才会再次减少上限）。
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, backoff: float = 0.5):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.backoff = backoff
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.decreases = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def acquire(self):
+        """阻塞直到正在进行的请求数低于当前上限"""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self._local.generation = self.decreases
+
+    def release(self, outcome: str = SUCCESS) -> bool:
+        """释放并发槽位并按调用结果调整上限，上限被减少时返回 True"""
+        with self._cond:
+            self.in_flight -= 1
+            decreased = False
+            if outcome == THROTTLED:
+                current = getattr(self._local, 'generation', self.decreases) == self.decreases
+                if current and self.limit > self.min_limit:
+                    self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                    self.decreases += 1
+                    decreased = True
+            elif outcome == SUCCESS:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+            return decreased
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 max_concurrency: Optional[int] = None, name: str = ''):
+        self.name = name
+        self.rate = rate_per_minute / 60.0  # 每秒补充的令牌数
+        # 默认允许一次突发 max_concurrency 个请求，避免启动时逐个等待
+        self.capacity = capacity if capacity is not None else float(max(1, max_concurrency or 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+        self.concurrency = AdaptiveConcurrency(max_concurrency) if max_concurrency else None
+        self.waited = 0.0  # 累计等待令牌的时间（秒）
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """阻塞直到获得一个令牌和一个并发槽位"""
+        if self.concurrency is not None:
+            self.concurrency.acquire()
+        if self.rate <= 0:
+            return
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.waited += now - start
+                    return
+                self._cond.wait((1 - self.tokens) / self.rate)
+
+    def release(self, outcome: str = SUCCESS):
+        """释放并发槽位（令牌按速率自动补充，无需归还），按调用结果调整并发上限"""
+        if self.concurrency is not None and self.concurrency.release(outcome):
+            from metrics import get_metrics
+            get_metrics().increment('concurrency_decreases_total', labels={'model': self.name})
+            print(f"{self.name} 被限流，并发上限降为 {int(self.concurrency.limit)}", file=sys.stderr)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.release(SUCCESS)
+        else:
+            self.release(THROTTLED if issubclass(exc_type, ThrottlingError) else ERROR)
+        return False
+
+
+class CircuitBreaker:
+    """模型熔断器
+
+    closed: 正常调用；连续 failure_threshold 次限流后进入 open。
+    open: 不调用该模型，recovery_timeout 秒后进入 half_open。
+    half_open: 只放行一个探测请求，成功则恢复 closed，失败则重新 open。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str = '', failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _transition(self, state: str):
+        from metrics import get_metrics
+
+        self.state = state
+        get_metrics().increment('circuit_breaker_transitions_total', labels={'model': self.name, 'state': state})
+        messages = {
+            self.OPEN: f"持续限流，暂停调用 {self.name} {self.recovery_timeout:g} 秒，期间直接使用备用模型",
+            self.HALF_OPEN: f"发送探测请求检查 {self.name} 是否恢复",
+            self.CLOSED: f"{self.name} 已恢复，继续使用"
+        }
+        print(messages[state], file=sys.stderr)
+
+    def allow(self) -> bool:
+        """当前是否可以调用该模型（half_open 状态下只有探测请求返回 True）"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.recovery_timeout:
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = self._local.probe = True
+                return True
+            return False
+
+    def record(self, outcome: str):
+        """记录一次调用结果（由调用模型的线程记录）：成功则关闭熔断器，连续限流达到阈值或探测失败则打开"""
+        with self._lock:
+            probing = getattr(self._local, 'probe', False)
+            if probing:
+                self._probing = self._local.probe = False
+            if outcome == SUCCESS:
+                self.failures = 0
+                if self.state != self.CLOSED:
+                    self._transition(self.CLOSED)
+                return
+            if outcome == THROTTLED:
+                self.failures += 1
+            if (self.state == self.HALF_OPEN and probing) or (
+                    self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                self._transition(self.OPEN)
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_registry_lock = threading.Lock()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def configure_model_limit(model_id: str, rate_per_minute: float,
+                          max_concurrency: Optional[int] = None):
+    """为模型设置限流参数（rate_per_minute <= 0 表示不限速）"""
+    with _registry_lock:
+        _limiters[model_id] = TokenBucket(rate_per_minute, max_concurrency=max_concurrency, name=model_id)
+
+
+def get_model_limiter(model_id: str) -> TokenBucket:
+    """返回模型的限流器，未配置时返回不限速的限流器"""
+    with _registry_lock:
+        limiter = _limiters.get(model_id)
+        if limiter is None:
+            limiter = _limiters[model_id] = TokenBucket(0, name=model_id)
+        return limiter
+
+
+def configure_circuit_breaker(model_id: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                              recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT):
+    """为模型设置熔断器参数（同时重置熔断器状态）"""
+    with _registry_lock:
+        _breakers[model_id] = CircuitBreaker(model_id, failure_threshold, recovery_timeout)
+
+
+def get_circuit_breaker(model_id: str) -> CircuitBreaker:
+    """返回模型的熔断器，未配置时使用默认参数"""
+    with _registry_lock:
+        breaker = _breakers.get(model_id)
+        if breaker is None:
+            breaker = _breakers[model_id] = CircuitBreaker(model_id)
+        return breaker
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+AWS Blog Markdown 报告输出
+只消费已生成的摘要，按文章完成顺序增量写出报告；
+流式输出时当前文章的摘要随模型生成逐段写出
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from date_utils import parse_iso_datetime
+
+BLOG_NAMES = {
+    'aws': 'AWS 主博客',
+    'machine-learning': '机器学习',
+    'database': '数据库',
+    'security': '安全',
+    'compute': '计算服务',
+    'storage': '存储服务',
+    'networking': '网络和内容分发'
+}
+
+# 时间预算不足时降级处理的说明
+DEGRADED_NOTES = {
+    'fallback': '时间预算不足，本条由备用模型 Nova Lite 生成',
+    'extract': '时间预算不足，本条为原文摘录，未经模型处理'
+}
+
+
+# 离线模式的报告头部说明
+OFFLINE_NOTE = "\n**摘要方式**: 离线模式，未缓存的文章为本地抽取的原文关键句，未经模型处理"
+
+
+def clean_summary_markdown(summary: str) -> str:
+    """清理摘要中的标题标记，避免与报告结构冲突"""
+    if not summary:
+        return summary
+    # 移除开头的 # 标题标记
+    summary = re.sub(r'^#+\s*', '', summary.strip())
+    # 移除中间的 # 标题标记，替换为粗体
+    return re.sub(r'\n#+\s*([^\n]+)', r'\n**\1**', summary)
+
+
+class StreamingSummaryCleaner:
+    """流式版本的 clean_summary_markdown：逐段输入模型输出，返回可以立即写出的文本
+
+    去掉开头的空白和第一行的 # 标记，其余以 # 开头的行整行到达后替换为粗体；
+    末尾空白暂缓输出（常见输出的结果与 clean_summary_markdown(完整文本) 一致）。
+    """
+
+    def __init__(self):
+        self.raw: List[str] = []
+        self._started = False
+        self._first_line = True
+        self._line_start = True
+        self._heading: Optional[str] = None
+        self._pending = ''
+
+    def feed(self, text: str) -> str:
+        self.raw.append(text)
+        out = []
+        for ch in text:
+            if not self._started:
+                if ch.isspace():
+                    continue
+                self._started = True
+            if self._heading is not None:
+                if ch != '\n':
+                    self._heading += ch
+                    continue
+                out.append(self._finish_heading())
+            if ch.isspace():
+                self._pending += ch
+                if ch == '\n':
+                    self._first_line = False
+                self._line_start = ch == '\n'
+                continue
+            if ch == '#' and self._line_start:
+                out.append(self._pending)
+                self._pending = ''
+                self._heading = ''
+                continue
+            out.append(self._pending + ch)
+            self._pending = ''
+            self._line_start = False
+        return ''.join(out)
+
+    def _finish_heading(self) -> str:
+        content = self._heading.lstrip('#')
+        self._heading = None
+        self._line_start = False
+        if self._first_line:
+            return content.lstrip()
+        return f"**{content.lstrip()}**" if content.strip() else ''
+
+    def finish(self) -> str:
+        """输入结束，返回剩余待写出的文本"""
+        return self._finish_heading() if self._heading is not None else ''
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.raw)
+
+
+class MarkdownReportWriter:
+    def __init__(self, stream: TextIO, blog_type: str, start_date: str, end_date: str):
+        self.stream = stream
+        self.blog_type = blog_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.written = 0
+        # 降级处理的条目 (序号, 标题, 降级方式)
+        self.degraded: List[Tuple[int, str, str]] = []
+        self._cleaner: Optional[StreamingSummaryCleaner] = None
+
+    def _emit(self, text: str):
+        self.stream.write(text)
+        # 每段写出后立即刷新，让调用方尽早看到已完成的条目
+        self.stream.flush()
+
+    def write_header(self, total: int, merged: int = 0, omitted: int = 0, offline: bool = False):
+        """写出报告头部，merged 为合并到其他条目中的交叉发布文章数，omitted 为超出文章数上限未包含的文章数，
+        offline 为 True 时注明摘要未经模型处理
+        """
+        start_dt = parse_iso_datetime(self.start_date)
+        end_dt = parse_iso_datetime(self.end_date)
+        merged_note = f"（另有 {merged} 篇交叉发布的重复文章已合并）" if merged else ''
+        if omitted:
+            merged_note += f"（只包含最新的 {total} 篇，另有 {omitted} 篇未包含）"
+
+        self._emit(f"""# AWS {BLOG_NAMES.get(self.blog_type, self.blog_type)} 博客分析报告
+
+**分析时间范围**: {start_dt.strftime('%Y年%m月%d日')} 至 {end_dt.strftime('%Y年%m月%d日')}
+**文章总数**: {total}{merged_note}
+**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{OFFLINE_NOTE if offline else ''}
+
+## 博客文章列表
+
+""")
+
+    def write_article(self, index: int, article: Dict):
+        """写出单篇文章（需已包含 summary 字段）"""
+        summary = clean_summary_markdown(article.get('summary', ''))
+        note = ''
+        if article.get('degraded') in DEGRADED_NOTES:
+            note = f"\n\n*（{DEGRADED_NOTES[article['degraded']]}）*"
+            self.degraded.append((index, article['title'], article['degraded']))
+        self._emit(f"{self._article_head(index, article)}{summary}{note}\n\n---\n\n")
+        self.written += 1
+
+    def write_degraded_notice(self):
+        """在报告末尾列出降级处理的条目"""
+        if not self.degraded:
+            return
+        lines = [f"- {index}. {title}（{'备用模型' if level == 'fallback' else '原文摘录'}）"
+                 for index, title, level in self.degraded]
+        self._emit(f"## 降级条目\n\n时间预算不足，以下 {len(self.degraded)} 篇文章未使用主模型生成：\n\n"
+                   + '\n'.join(lines) + '\n')
+
+    def begin_article(self, index: int, article: Dict):
+        """流式输出：先写出文章信息，摘要随后由 write_partial 逐段写出"""
+        self._emit(self._article_head(index, article))
+        self._cleaner = StreamingSummaryCleaner()
+
+    def write_partial(self, text: str):
+        """流式输出：写出一段模型输出"""
+        cleaned = self._cleaner.feed(text)
+        if cleaned:
+            self._emit(cleaned)
+
+    def end_article(self, summary: str):
+        """流式输出结束；流式输出的内容与最终摘要不一致时（如中途失败后改用备用模型）补充最终摘要"""
+        tail = self._cleaner.finish()
+        streamed = self._cleaner.text.strip()
+        self._cleaner = None
+        if streamed != (summary or '').strip():
+            note = "\n\n*（以上为中断的部分输出）*\n\n" if streamed else ''
+            tail += note + clean_summary_markdown(summary or '')
+        self._emit(f"{tail}\n\n---\n\n")
+        self.written += 1
+
+    def _article_head(self, index: int, article: Dict) -> str:
+        """文章标题、来源、作者、发布时间和链接，以"中文摘要"标签结尾"""
+        pub_date = datetime.fromisoformat(article['pub_date'])
+        formatted_date = pub_date.strftime('%Y年%m月%d日')
+
+        # 多 feed 报告中标注文章来源
+        source = f"- **来源**: {article['feed']}\n" if article.get('feed') else ''
+        # 交叉发布的近似重复文章共用一条摘要，列出所有来源链接
+        duplicates = ''.join(f"  - {d['feed']}: {d['link']}\n" for d in article.get('duplicates', []))
+        if duplicates:
+            duplicates = f"- **同时发布于**:\n{duplicates}"
+
+        return f"""### {index}. {article['title']}
+{source}- **作者**: {article['author']}
+- **发布时间**: {formatted_date}
+- **链接**: {article['link']}
+{duplicates}
+**中文摘要**:
+"""
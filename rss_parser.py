@@ -4,15 +4,49 @@ AWS Blog RSS Parser
 基于 n8n RSS node 优化实现，支持智能内容选择
 """
 
-import urllib.request
+import argparse
+import threading
+import time
 import xml.etree.ElementTree as ET
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import json
 import sys
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+
+from date_utils import parse_iso_datetime, parse_rss_date
+from http_pool import get_default_pool
+from metrics import get_metrics
+from near_dedup import fingerprint_article
+
+# RSS 扩展命名空间中的字段
+DC_CREATOR = '{http://purl.org/dc/elements/1.1/}creator'
+CONTENT_ENCODED = '{http://purl.org/rss/1.0/modules/content/}encoded'
+ITEM_FIELDS = ('title', 'link', 'guid', 'pubDate', 'description', DC_CREATOR, CONTENT_ENCODED)
+
+# channel 级的轮询提示：RSS 2.0 的 ttl（分钟）和 Syndication 模块的更新周期
+SY_UPDATE_PERIOD = '{http://purl.org/rss/1.0/modules/syndication/}updatePeriod'
+SY_UPDATE_FREQUENCY = '{http://purl.org/rss/1.0/modules/syndication/}updateFrequency'
+FEED_HINT_TAGS = {'ttl': 'ttl', SY_UPDATE_PERIOD: 'update_period', SY_UPDATE_FREQUENCY: 'update_frequency'}
+
+# 每次从网络或缓存读取的块大小
+CHUNK_SIZE = 64 * 1024
 
 class AWSBlogRSSParser:
-    def __init__(self):
+    def __init__(self, http_cache=None, max_age: float = 0, pool=None, archive=None):
+        # 可选的 HTTP 缓存（FeedHTTPCache）：条件请求 + 本地副本，max_age 秒内不访问网络
+        self.http_cache = http_cache
+        self.max_age = max_age
+        # 可选的文章归档（ArticleArchive）：解析过的文章写入本地库，日期范围查询走索引
+        self.archive = archive
+        # keep-alive 连接池，默认使用进程内共享的连接池
+        self.pool = pool or get_default_pool()
+        # 网络实际下载的字节数（压缩后，不含缓存命中）
+        self.bytes_downloaded = 0
+        self._stats_lock = threading.Lock()
+        # feed 按发布时间倒序排列，连续遇到这么多篇早于开始日期的文章后停止读取（0 表示读完整个 feed）
+        self.early_stop_after = 3
+        
         # 基于 n8n RSS node 的优化 HTTP headers（已验证有效）
         self.headers = {
             'User-Agent': 'rss-parser',
@@ -45,95 +79,275 @@ class AWSBlogRSSParser:
             'news': 'https://aws.amazon.com/about-aws/whats-new/recent/feed/'
         }
     
+    def iter_feed_chunks(self, feed_url: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """逐块产出 feed 字节（支持 gzip、条件请求缓存和 keep-alive 连接复用），失败时抛出异常
+        
+        调用方提前关闭生成器时：未启用缓存则直接关闭连接不再下载；
+        启用缓存时读完剩余内容，保证本地副本完整可用于之后的条件请求。
+        """
+        cached = self.http_cache.load(feed_url) if self.http_cache else None
+        
+        # 缓存未过期时直接使用本地副本
+        if cached and self.max_age > 0 and time.time() - cached['fetched_at'] < self.max_age:
+            body = self.http_cache.read_body(feed_url)
+            if body is not None:
+                get_metrics().increment('rss_fetches_total', labels={'source': 'local'})
+                yield from _split_chunks(body, chunk_size)
+                return
+        
+        headers = dict(self.headers)
+        headers['Accept-Encoding'] = 'gzip'
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        with self.pool.urlopen(feed_url, headers=headers, timeout=60) as response:
+            # 304 Not Modified：使用本地副本
+            if response.status == 304 and cached:
+                response.read()
+                cached_body = self.http_cache.read_body(feed_url)
+                if cached_body is not None:
+                    self.http_cache.touch(feed_url)
+                    get_metrics().increment('rss_fetches_total', labels={'source': 'not_modified'})
+                    yield from _split_chunks(cached_body, chunk_size)
+                    return
+            
+            if response.status != 200:
+                raise IOError(f"HTTP Error {response.status}: {response.url}")
+            get_metrics().increment('rss_fetches_total', labels={'source': 'network'})
+            
+            buffer = [] if self.http_cache else None
+            completed = False
+            try:
+                for chunk in response.iter_chunks(chunk_size):
+                    if buffer is not None:
+                        buffer.append(chunk)
+                    yield chunk
+                completed = True
+            except GeneratorExit:
+                if buffer is not None:
+                    try:
+                        buffer.extend(response.iter_chunks(chunk_size))
+                        completed = True
+                    except Exception:
+                        pass
+                raise
+            finally:
+                with self._stats_lock:
+                    self.bytes_downloaded += response.bytes_read
+                get_metrics().increment('rss_bytes_downloaded_total', response.bytes_read)
+                if completed and buffer is not None:
+                    self.http_cache.store(
+                        feed_url, b''.join(buffer),
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+    
+    def fetch_feed(self, feed_url: str) -> bytes:
+        """获取完整的 feed 原始字节，失败时抛出异常"""
+        with get_metrics().timer('fetch_rss'):
+            return b''.join(self.iter_feed_chunks(feed_url))
+    
     def fetch_rss(self, feed_url: str) -> Optional[str]:
         """使用验证过的优化 headers 获取 RSS 内容"""
         try:
-            req = urllib.request.Request(feed_url, headers=self.headers)
-            with urllib.request.urlopen(req, timeout=60) as response:
-                return response.read().decode('utf-8')
+            return self.fetch_feed(feed_url).decode('utf-8')
         except Exception as e:
             print(f"Error fetching RSS: {e}", file=sys.stderr)
             return None
     
     def parse_date(self, date_str: str) -> Optional[datetime]:
-        """解析 RSS pubDate 格式（支持多种格式）"""
+        """解析 RSS pubDate，按时区偏移换算为 UTC 的 naive datetime"""
+        return parse_rss_date(date_str)
+    
+    def parse_rss_items(self, rss_content, start_date: str, end_date: str) -> List[Dict]:
+        """解析 RSS（str 或 bytes）并按日期过滤（基于验证的逻辑），解析失败时返回空列表"""
         try:
-            # 尝试多种日期格式
-            formats = [
-                "%a, %d %b %Y %H:%M:%S %z",      # "Fri, 22 Aug 2025 17:54:38 +0000"
-                "%a, %d %b %Y %H:%M:%S GMT",     # "Fri, 22 Aug 2025 16:00:00 GMT"
-                "%a, %d %b %Y %H:%M:%S %Z"       # 其他时区格式
-            ]
-            
-            for fmt in formats:
-                try:
-                    parsed = datetime.strptime(date_str, fmt)
-                    # 如果是 GMT，转换为 UTC
-                    if 'GMT' in date_str:
-                        parsed = parsed.replace(tzinfo=timezone.utc)
-                    return parsed.replace(tzinfo=None)  # 转换为 naive datetime
-                except ValueError:
-                    continue
-            
-            return None
-        except Exception:
-            return None
+            return self._parse_rss_items(rss_content, start_date, end_date)
+        except Exception as e:
+            print(f"Error parsing RSS: {e}", file=sys.stderr)
+            return []
     
-    def parse_rss_items(self, rss_content: str, start_date: str, end_date: str) -> List[Dict]:
-        """解析 RSS 并按日期过滤（基于验证的逻辑）"""
+    def _parse_rss_items(self, rss_content, start_date: str, end_date: str) -> List[Dict]:
+        """解析 RSS 并按日期过滤，解析失败时抛出异常"""
+        return self.parse_rss_stream([rss_content], start_date, end_date)
+    
+    def parse_rss_stream(self, chunks: Iterable, start_date: str, end_date: str) -> List[Dict]:
+        """从字节块流增量解析 RSS 并按日期过滤，按发布时间倒序返回"""
+        # 解析日期范围
+        start_dt = parse_iso_datetime(start_date)
+        end_dt = parse_iso_datetime(end_date)
+        
+        items = list(self.iter_rss_items(chunks, start_dt, end_dt))
+        return sorted(items, key=lambda x: x['pub_date'], reverse=True)
+    
+    def iter_rss_items(self, chunks: Iterable, start_dt: datetime, end_dt: datetime,
+                       hints: Optional[Dict] = None) -> Iterator[Dict]:
+        """使用 XMLPullParser 逐个 item 解析，处理完立即释放元素
+        
+        内存占用与单个 item 相当而不是整个 feed；连续 early_stop_after 篇文章早于
+        start_dt 时停止读取并关闭输入流（feed 按发布时间倒序排列）。
+        传入 hints 字典时记录 channel 的 ttl / sy:updatePeriod / sy:updateFrequency。
+        """
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        stack = []
+        old_streak = 0
+        
+        # 分别统计等待数据块（下载）和解析的耗时；产出文章后调用方处理的时间不计入
+        fetch_time = 0.0
+        parse_time = 0.0
+        mark = None
+        chunk_iter = iter(chunks)
+        
         try:
-            root = ET.fromstring(rss_content)
-            items = []
-            
-            # 解析日期范围
-            start_dt = datetime.fromisoformat(start_date.replace('Z', ''))
-            end_dt = datetime.fromisoformat(end_date.replace('Z', ''))
-            
-            # 提取所有 item 元素
-            for item in root.findall('.//item'):
-                title_elem = item.find('title')
-                link_elem = item.find('link')
-                pub_date_elem = item.find('pubDate')
-                description_elem = item.find('description')
-                creator_elem = item.find('.//{http://purl.org/dc/elements/1.1/}creator')
-                # 提取 content:encoded 内容
-                content_encoded_elem = item.find('.//{http://purl.org/rss/1.0/modules/content/}encoded')
+            while True:
+                waited = time.perf_counter()
+                chunk = next(chunk_iter, None)
+                mark = time.perf_counter()
+                fetch_time += mark - waited
+                if chunk is None:
+                    break
                 
-                if title_elem is None or link_elem is None or pub_date_elem is None:
-                    continue
-                
-                # 解析发布日期
-                pub_date = self.parse_date(pub_date_elem.text)
-                if not pub_date:
-                    continue
-                
-                # 日期过滤
-                if start_dt <= pub_date <= end_dt:
-                    # 修复可能的 URL 格式问题
-                    link = link_elem.text.strip()
-                    if "amazon.comabout-aws" in link:
-                        link = link.replace("amazon.comabout-aws", "amazon.com/about-aws")
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if event == 'start':
+                        stack.append(elem)
+                        continue
+                    stack.pop()
+                    if elem.tag != 'item':
+                        if (hints is not None and elem.tag in FEED_HINT_TAGS and stack
+                                and stack[-1].tag == 'channel' and elem.text):
+                            hints[FEED_HINT_TAGS[elem.tag]] = elem.text.strip()
+                        continue
+                    
+                    pub_date, article = self._extract_item(elem, start_dt, end_dt)
+                    
+                    # 释放已处理的 item，避免整个 feed 的 DOM 留在内存中
+                    elem.clear()
+                    if stack:
+                        stack[-1].remove(elem)
                     
-                    # 提取内容，优先使用 content:encoded
-                    content_encoded = ""
-                    if content_encoded_elem is not None and content_encoded_elem.text:
-                        content_encoded = content_encoded_elem.text.strip()
+                    if pub_date is not None:
+                        if pub_date < start_dt:
+                            old_streak += 1
+                            if self.early_stop_after and old_streak >= self.early_stop_after:
+                                return
+                        else:
+                            old_streak = 0
                     
-                    items.append({
-                        'title': title_elem.text.strip(),
-                        'link': link,
-                        'pub_date': pub_date.isoformat(),
-                        'pub_date_raw': pub_date_elem.text,
-                        'description': description_elem.text.strip() if description_elem is not None else '',
-                        'content_encoded': content_encoded,
-                        'author': creator_elem.text.strip() if creator_elem is not None else 'AWS Team'
-                    })
+                    if article is not None:
+                        parse_time += time.perf_counter() - mark
+                        mark = None
+                        yield article
+                        mark = time.perf_counter()
+                
+                parse_time += time.perf_counter() - mark
+                mark = None
             
-            return sorted(items, key=lambda x: x['pub_date'], reverse=True)
+            mark = time.perf_counter()
+            parser.close()
+        finally:
+            if mark is not None:
+                parse_time += time.perf_counter() - mark
+            # 提前停止时关闭上游（网络生成器会随之关闭连接；启用缓存时读完剩余内容）
+            closing = time.perf_counter()
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+            fetch_time += time.perf_counter() - closing
             
-        except Exception as e:
-            print(f"Error parsing RSS: {e}", file=sys.stderr)
-            return []
+            metrics = get_metrics()
+            metrics.observe('fetch_rss', fetch_time)
+            metrics.observe('parse_rss_items', parse_time)
+    
+    def _extract_item(self, item: ET.Element, start_dt: datetime,
+                      end_dt: datetime) -> Tuple[Optional[datetime], Optional[Dict]]:
+        """提取单个 item：先判断发布日期，只有在日期范围内才提取正文等字段
+        
+        返回 (发布日期, 文章字典)；日期无效时均为 None，不在范围内时文章为 None。
+        """
+        fields = {}
+        for child in item:
+            if child.tag in ITEM_FIELDS and child.tag not in fields:
+                fields[child.tag] = child
+        
+        title_elem = fields.get('title')
+        link_elem = fields.get('link')
+        pub_date_elem = fields.get('pubDate')
+        if title_elem is None or link_elem is None or pub_date_elem is None:
+            return None, None
+        
+        # 解析发布日期
+        pub_date = self.parse_date(pub_date_elem.text)
+        if not pub_date:
+            return None, None
+        
+        # 日期过滤：范围外的文章不提取 content:encoded 等大字段
+        if not start_dt <= pub_date <= end_dt:
+            return pub_date, None
+        
+        # 修复可能的 URL 格式问题
+        link = (link_elem.text or '').strip()
+        if "amazon.comabout-aws" in link:
+            link = link.replace("amazon.comabout-aws", "amazon.com/about-aws")
+        
+        # 提取内容，优先使用 content:encoded
+        content_encoded = ""
+        content_encoded_elem = fields.get(CONTENT_ENCODED)
+        if content_encoded_elem is not None and content_encoded_elem.text:
+            content_encoded = content_encoded_elem.text.strip()
+        
+        description_elem = fields.get('description')
+        creator_elem = fields.get(DC_CREATOR)
+        
+        article = {
+            'title': (title_elem.text or '').strip(),
+            'link': link,
+            'pub_date': pub_date.isoformat(),
+            'pub_date_raw': pub_date_elem.text,
+            'description': (description_elem.text or '').strip() if description_elem is not None else '',
+            'content_encoded': content_encoded,
+            'author': (creator_elem.text or '').strip() if creator_elem is not None else 'AWS Team'
+        }
+        guid_elem = fields.get('guid')
+        if guid_elem is not None and guid_elem.text and guid_elem.text.strip():
+            article['guid'] = guid_elem.text.strip()
+        # 近似重复指纹：交叉发布到多个 feed 的文章在报告中合并，只生成一次摘要
+        fingerprint = fingerprint_article(article['title'], content_encoded or article['description'])
+        if fingerprint is not None:
+            article['simhash'] = fingerprint
+        return pub_date, article
+    
+    def fetch_and_parse(self, feed_url: str, start_date: str, end_date: str) -> List[Dict]:
+        """边下载边解析 feed，失败时抛出 IOError/OSError（获取）或 ET.ParseError（解析）"""
+        if self.archive is not None:
+            return self._fetch_and_parse_archived(feed_url, start_date, end_date)
+        return self.parse_rss_stream(self.iter_feed_chunks(feed_url), start_date, end_date)
+    
+    def _fetch_and_parse_archived(self, feed_url: str, start_date: str, end_date: str) -> List[Dict]:
+        """先把 feed 中的新文章同步到归档，再通过索引查询日期范围
+        
+        查询范围在上次同步之前结束时不访问网络；同步时解析所有文章（不限于查询范围），
+        读到已归档的最新文章且早于开始日期后提前停止。
+        """
+        start_dt = parse_iso_datetime(start_date)
+        end_dt = parse_iso_datetime(end_date)
+        
+        sync = self.archive.get_sync(feed_url)
+        if sync is None or end_dt > sync['synced_at']:
+            floor = datetime.min
+            if sync is not None and sync['newest'] is not None:
+                floor = min(start_dt, sync['newest'])
+            articles = self.iter_rss_items(self.iter_feed_chunks(feed_url), floor, datetime.max)
+            self.archive.add_articles(feed_url, articles)
+            sync = self.archive.get_sync(feed_url)
+        
+        if sync['oldest'] is not None and start_dt < sync['oldest']:
+            print(f"提示: {feed_url} 的本地归档最早只到 {sync['oldest'].isoformat()}，"
+                  f"更早的结果可能不完整", file=sys.stderr)
+        return self.archive.query(feed_url, start_dt, end_dt)
     
     def get_blog_articles(self, blog_type: str, start_date: str, end_date: str) -> List[Dict]:
         """获取指定类型和日期范围的博客文章"""
@@ -142,28 +356,127 @@ class AWSBlogRSSParser:
             return []
         
         feed_url = self.feeds[blog_type]
-        rss_content = self.fetch_rss(feed_url)
+        articles, error = self._fetch_and_parse_safe(feed_url, start_date, end_date)
+        if error:
+            print(error, file=sys.stderr)
+        return articles
+    
+    def _fetch_and_parse_safe(self, feed_url: str, start_date: str, end_date: str) -> Tuple[List[Dict], Optional[str]]:
+        """获取并解析 feed，返回 (文章列表, 错误信息)"""
+        try:
+            return self.fetch_and_parse(feed_url, start_date, end_date), None
+        except ET.ParseError as e:
+            return [], f"Error parsing RSS: {e}"
+        except Exception as e:
+            return [], f"Error fetching RSS: {e}"
+    
+    def resolve_blog_types(self, blog_types: List[str]) -> Dict[str, List[str]]:
+        """把博客类型（支持 'all'）解析为去重后的 feed URL -> 博客类型列表"""
+        # 先校验再展开 'all'，避免 all,bogus 这类输入悄悄丢掉未知类型
+        for blog_type in blog_types:
+            if blog_type != 'all' and blog_type not in self.feeds:
+                raise ValueError(f"Unknown blog type: {blog_type}. Available: {list(self.feeds.keys())}")
+        if 'all' in blog_types:
+            blog_types = list(self.feeds.keys())
         
-        if not rss_content:
-            return []
+        url_types: Dict[str, List[str]] = {}
+        for blog_type in blog_types:
+            url_types.setdefault(self.feeds[blog_type], [])
+            if blog_type not in url_types[self.feeds[blog_type]]:
+                url_types[self.feeds[blog_type]].append(blog_type)
+        return url_types
+    
+    def get_multi_blog_articles(self, blog_types: List[str], start_date: str, end_date: str,
+                                max_workers: int = 8) -> Dict[str, Dict]:
+        """并发获取多个博客类型的文章，别名指向同一 feed 时只获取一次
         
-        return self.parse_rss_items(rss_content, start_date, end_date)
+        返回 {博客类型: {'url', 'aliases', 'articles', 'error'}}，以每个 feed 的第一个
+        请求类型为键；单个 feed 失败只记录在其 error 中，不影响其他 feed。
+        """
+        url_types = self.resolve_blog_types(blog_types)
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {
+                url: pool.submit(self._fetch_and_parse_safe, url, start_date, end_date)
+                for url in url_types
+            }
+        
+        results = {}
+        for feed_url, types in url_types.items():
+            articles, error = futures[feed_url].result()
+            if error:
+                print(f"{types[0]}: {error}", file=sys.stderr)
+            results[types[0]] = {
+                'url': feed_url,
+                'aliases': types,
+                'articles': articles,
+                'error': error
+            }
+        return results
+
+    def close(self):
+        """关闭文章归档"""
+        if self.archive is not None:
+            self.archive.close()
+
+def _split_chunks(data: bytes, chunk_size: int) -> Iterator[bytes]:
+    """把本地缓存的完整内容按块产出，与网络读取保持相同的接口"""
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
 
-def main():
-    if len(sys.argv) != 4:
-        print("Usage: python rss_parser.py <blog_type> <start_date> <end_date>")
-        print("Blog types: aws, machine-learning, database, security, compute, storage, networking")
-        print("Date format: 2024-08-17T00:00:00Z")
+def build_arg_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog='rss_parser.py', add_help=False)
+    parser.add_argument('blog_type')
+    parser.add_argument('start_date')
+    parser.add_argument('end_date')
+    parser.add_argument('--no-http-cache', action='store_true')
+    parser.add_argument('--max-age', type=float, default=0)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--no-archive', action='store_true')
+    parser.add_argument('--archive-path', default=None)
+    return parser
+
+def print_usage():
+    print("Usage: python rss_parser.py <blog_type>[,<blog_type>...]|all <start_date> <end_date> [options]")
+    print("Blog types: aws, machine-learning, database, security, compute, storage, networking")
+    print("Date format: 2024-08-17T00:00:00Z")
+    print("Options:")
+    print("  --no-http-cache    不使用本地 HTTP 缓存（默认发送条件请求并复用 304 响应）")
+    print("  --max-age SECONDS  缓存在该时间内视为新鲜，直接使用本地副本不访问网络 (默认: 0)")
+    print("  --workers N        多个 feed 时的并发获取数 (默认: 8)")
+    print("  --no-archive       不使用本地文章归档（默认把解析过的文章写入归档，日期范围从归档查询）")
+    print("  --archive-path PATH 文章归档文件 (默认: ~/.cache/aws-blog-rss-analyzer/articles.sqlite3)")
+    print("多个博客类型（逗号分隔）或 all 时输出 {博客类型: {url, aliases, articles, error}}")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 1 and argv[0] in ['-h', '--help']:
+        print_usage()
+        sys.exit(0)
+    
+    try:
+        args = build_arg_parser().parse_args(argv)
+    except SystemExit:
+        print_usage()
         sys.exit(1)
     
-    blog_type = sys.argv[1]
-    start_date = sys.argv[2]
-    end_date = sys.argv[3]
+    import pipeline
     
-    parser = AWSBlogRSSParser()
-    articles = parser.get_blog_articles(blog_type, start_date, end_date)
+    parser = pipeline.create_parser(
+        use_http_cache=not args.no_http_cache, max_age=args.max_age,
+        use_archive=not args.no_archive, archive_path=args.archive_path
+    )
+    try:
+        result = pipeline.fetch(args.blog_type, args.start_date, args.end_date,
+                                parser=parser, workers=args.workers)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    finally:
+        parser.close()
     
-    print(json.dumps(articles, indent=2, ensure_ascii=False))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+并发摘要调度器
+使用线程池并发处理文章，按输入顺序回调结果，保证报告顺序不变
+模型调用的限流由 rate_limiter 中的每模型令牌桶负责
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List
+
+
+def run_ordered(items: List[Any], func: Callable[[Any], Any], max_workers: int,
+                on_result: Callable[[int, Any, Any], None]):
+    """并发执行 func(item)，并按输入顺序调用 on_result(index, item, result)
+
+    某一项完成时，只要它之前的所有项都已完成就立即回调，
+    因此调用方可以边生成边输出，而不必等待全部完成。
+    """
+    if not items:
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(func, item): index for index, item in enumerate(items)}
+        finished: Dict[int, Any] = {}
+        next_index = 0
+
+        for future in as_completed(futures):
+            finished[futures[future]] = future.result()
+            while next_index in finished:
+                on_result(next_index, items[next_index], finished.pop(next_index))
+                next_index += 1
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+AWS Blog 摘要缓存
+基于 SQLite 的持久化摘要缓存，按文章链接、内容哈希、模型和处理方式索引
+支持按条目数和存活时间淘汰，并记录命中/未命中统计
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+from near_dedup import DEFAULT_MAX_DISTANCE, band_keys, hamming_distance, parse_fingerprint
+
+# 默认缓存目录，可通过环境变量覆盖
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'aws-blog-rss-analyzer')
+
+
+def get_cache_dir() -> str:
+    """返回缓存目录（AWS_BLOG_RSS_CACHE_DIR 优先）"""
+    return os.environ.get('AWS_BLOG_RSS_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+
+class SummaryCache:
+    def __init__(self, path: Optional[str] = None, max_entries: int = 5000,
+                 max_age_days: float = 30):
+        if path is None:
+            path = os.path.join(get_cache_dir(), 'summaries.sqlite3')
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.similar_hits = 0
+        self.writes = 0
+
+        # 连接允许跨线程使用，所有访问由锁串行化
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                cache_key TEXT PRIMARY KEY,
+                link TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                model_id TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                expires_at REAL
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(summaries)")]
+        if 'expires_at' not in columns:
+            self._conn.execute("ALTER TABLE summaries ADD COLUMN expires_at REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries (accessed_at)"
+        )
+        # 近似重复指纹的分桶索引：其他 feed（本次或之前运行）中交叉发布的同一篇文章可复用摘要
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summary_fingerprints (
+                band INTEGER NOT NULL,
+                band_value INTEGER NOT NULL,
+                cache_key TEXT NOT NULL,
+                simhash TEXT NOT NULL,
+                source TEXT,
+                PRIMARY KEY (band, band_value, cache_key)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """计算清理后内容的哈希"""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_key(link: str, content_hash: str, model_id: str, mode: str) -> str:
+        """组合缓存键：链接 + 内容哈希 + 模型 + 处理方式"""
+        raw = '\x1f'.join([link, content_hash, model_id, mode])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, link: str, content: str, model_ids: Sequence[str], mode: str) -> Optional[str]:
+        """按模型优先级查询缓存的摘要，过期条目视为未命中"""
+        content_hash = self.content_hash(content)
+        now = time.time()
+        with self._lock:
+            for model_id in model_ids:
+                key = self.make_key(link, content_hash, model_id, mode)
+                row = self._conn.execute(
+                    "SELECT summary, created_at, expires_at FROM summaries WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is None or (self.max_age > 0 and now - row[1] > self.max_age):
+                    continue
+                if row[2] is not None and now > row[2]:
+                    continue
+                self._conn.execute(
+                    "UPDATE summaries SET accessed_at = ? WHERE cache_key = ?", (now, key)
+                )
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def get_similar(self, fingerprint, model_ids: Sequence[str], mode: str,
+                    exclude_source: Optional[str] = None,
+                    max_distance: int = DEFAULT_MAX_DISTANCE) -> Optional[str]:
+        """按近似重复指纹查询摘要（模型优先级优先，其次汉明距离），过期条目视为未命中
+
+        exclude_source 为当前文章的来源 feed：同一 feed 中的相似文章不是交叉发布，不复用。
+        """
+        value = parse_fingerprint(fingerprint)
+        if value is None:
+            return None
+        bands = band_keys(value)
+        condition = ' OR '.join(['(f.band = ? AND f.band_value = ?)'] * len(bands))
+        params = [mode] + [v for band in bands for v in band]
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT s.cache_key, f.simhash, f.source, s.model_id, s.summary, s.created_at, s.expires_at "
+                "FROM summary_fingerprints f JOIN summaries s ON s.cache_key = f.cache_key "
+                f"WHERE s.mode = ? AND ({condition})",
+                params
+            ).fetchall()
+
+            best = None
+            for key, simhash, source, model_id, summary, created_at, expires_at in rows:
+                if model_id not in model_ids or (exclude_source is not None and source == exclude_source):
+                    continue
+                if self.max_age > 0 and now - created_at > self.max_age:
+                    continue
+                if expires_at is not None and now > expires_at:
+                    continue
+                distance = hamming_distance(value, int(simhash, 16))
+                if distance > max_distance:
+                    continue
+                rank = (list(model_ids).index(model_id), distance)
+                if best is None or rank < best[0]:
+                    best = (rank, key, summary)
+            if best is None:
+                return None
+            self._conn.execute(
+                "UPDATE summaries SET accessed_at = ? WHERE cache_key = ?", (now, best[1])
+            )
+            self._conn.commit()
+            self.similar_hits += 1
+            return best[2]
+
+    def put(self, link: str, content: str, model_id: str, mode: str, summary: str,
+            ttl: Optional[float] = None, fingerprint=None, source: Optional[str] = None):
+        """写入摘要并按需淘汰旧条目；ttl（秒）用于比 max_age 更早过期的条目，
+        fingerprint 和 source 为文章的近似重复指纹和来源 feed（可选）
+        """
+        content_hash = self.content_hash(content)
+        key = self.make_key(link, content_hash, model_id, mode)
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        value = parse_fingerprint(fingerprint)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries "
+                "(cache_key, link, content_hash, model_id, mode, summary, created_at, accessed_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, link, content_hash, model_id, mode, summary, now, now, expires_at)
+            )
+            if value is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO summary_fingerprints (band, band_value, cache_key, simhash, source) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(band, band_value, key, format(value, '016x'), source)
+                     for band, band_value in band_keys(value)]
+                )
+            self.writes += 1
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def latest_by_link(self) -> Dict[str, str]:
+        """返回每个链接最近生成的未过期摘要 {link: summary}（用于分析和导出，不更新访问时间）"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT link, summary, created_at FROM summaries "
+                "WHERE (expires_at IS NULL OR expires_at >= ?) ORDER BY created_at",
+                (now,)
+            ).fetchall()
+        return {link: summary for link, summary, created_at in rows
+                if not (self.max_age > 0 and now - created_at > self.max_age)}
+
+    def evict(self):
+        """按存活时间和条目上限淘汰缓存"""
+        with self._lock:
+            self._evict_locked(time.time())
+            self._conn.commit()
+
+    def _evict_locked(self, now: float):
+        changes = self._conn.total_changes
+        self._conn.execute("DELETE FROM summaries WHERE expires_at < ?", (now,))
+        if self.max_age > 0:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE created_at < ?", (now - self.max_age,)
+            )
+        if self.max_entries > 0:
+            # 超出上限时删除最久未访问的条目（LRU）
+            self._conn.execute("""
+                DELETE FROM summaries WHERE cache_key IN (
+                    SELECT cache_key FROM summaries
+                    ORDER BY accessed_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+        if self._conn.total_changes != changes:
+            self._conn.execute(
+                "DELETE FROM summary_fingerprints WHERE cache_key NOT IN (SELECT cache_key FROM summaries)"
+            )
+
+    def stats(self) -> Dict:
+        """返回命中统计"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'similar_hits': self.similar_hits,
+            'writes': self.writes,
+            'entries': entries,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0
+        }
+
+    def print_stats(self):
+        """输出缓存统计到 stderr"""
+        stats = self.stats()
+        print(f"摘要缓存: 命中 {stats['hits']}，未命中 {stats['misses']}，"
+              f"命中率 {stats['hit_rate']:.0%}，近似重复命中 {stats['similar_hits']}，"
+              f"缓存条目 {stats['entries']}", file=sys.stderr)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
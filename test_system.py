@@ -8,11 +8,90 @@ import subprocess
 import json
 import sys
 import os
-from datetime import datetime
+import tempfile
+from datetime import datetime, timedelta
 
 # 获取脚本目录
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# 离线测试使用的示例 RSS
+SAMPLE_RSS = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"
+     xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel>
+<title>AWS Machine Learning Blog</title>
+<item>
+  <title>Second post</title>
+  <link>https://aws.amazon.com/blogs/machine-learning/second-post/</link>
+  <pubDate>Fri, 22 Aug 2025 17:54:38 +0000</pubDate>
+  <dc:creator>Jane Doe</dc:creator>
+  <description>Second post description</description>
+  <content:encoded><![CDATA[<p>Second post body</p>]]></content:encoded>
+</item>
+<item>
+  <title>First post</title>
+  <link>https://aws.amazon.com/blogs/machine-learning/first-post/</link>
+  <pubDate>Wed, 20 Aug 2025 16:00:00 GMT</pubDate>
+  <description>First post description</description>
+</item>
+</channel>
+</rss>
+"""
+
+def start_local_feed_server():
+    """启动返回 SAMPLE_RSS 的本地 HTTP 服务（支持 gzip 和 ETag），返回 (server, url, stats)
+    
+    /bad/ 返回格式错误的 XML，/redirect/ 重定向到 /feed/
+    """
+    import gzip
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    stats = {'requests': 0, 'not_modified': 0}
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def do_GET(self):
+            stats['requests'] += 1
+            if self.path == '/redirect/':
+                self.send_response(301)
+                self.send_header('Location', '/feed/')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if self.path == '/bad/':
+                body = b'<rss><channel><item>'
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if self.headers.get('If-None-Match') == '"v1"':
+                stats['not_modified'] += 1
+                self.send_response(304)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = SAMPLE_RSS.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml')
+            self.send_header('ETag', '"v1"')
+            if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/feed/", stats
+
 def test_rss_parser():
     """测试 RSS 解析器"""
     print("=== 测试 RSS 解析器 ===")
@@ -183,6 +262,1778 @@ def test_agent_config():
         print(f"❌ Agent 配置测试出错: {e}")
         return False
 
+def test_summary_cache():
+    """测试摘要缓存（离线）"""
+    print("\n=== 测试摘要缓存 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    from summary_cache import SummaryCache
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = SummaryCache(os.path.join(tmp_dir, 'cache.sqlite3'), max_entries=2)
+            link = 'https://aws.amazon.com/blogs/test/post-1/'
+            
+            if cache.get(link, 'content', ['model-a'], 'summary') is not None:
+                print("❌ 空缓存不应命中")
+                return False
+            
+            cache.put(link, 'content', 'model-a', 'summary', '中文摘要')
+            if cache.get(link, 'content', ['model-b', 'model-a'], 'summary') != '中文摘要':
+                print("❌ 缓存未命中已写入的摘要")
+                return False
+            print("✅ 缓存命中正常")
+            
+            # 内容变化或处理方式不同都不应命中
+            if cache.get(link, 'changed', ['model-a'], 'summary') is not None or \
+                    cache.get(link, 'content', ['model-a'], 'translate') is not None:
+                print("❌ 缓存键未区分内容哈希或处理方式")
+                return False
+            
+            # 短 TTL 条目（备用模型结果）过期后不再命中
+            cache.put(link, 'content', 'model-b', 'summary', '备用摘要', ttl=-1)
+            if cache.get(link, 'content', ['model-b'], 'summary') is not None:
+                print("❌ 过期的备用模型摘要不应命中")
+                return False
+            print("✅ 备用模型摘要按 TTL 过期")
+            
+            cache.put('link-2', 'c', 'model-a', 'summary', 's2')
+            cache.put('link-3', 'c', 'model-a', 'summary', 's3')
+            stats = cache.stats()
+            if stats['entries'] != 2 or stats['hits'] != 1 or stats['misses'] != 4:
+                print(f"❌ 缓存淘汰或统计错误: {stats}")
+                return False
+            print("✅ 条目上限淘汰和命中统计正常")
+            cache.close()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 摘要缓存测试出错: {e}")
+        return False
+
+def test_report_rendering():
+    """测试报告渲染只使用已生成的摘要（离线）"""
+    print("\n=== 测试报告渲染 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import blog_analyzer
+    
+    calls = []
+    original = blog_analyzer.generate_chinese_summary
+    blog_analyzer.generate_chinese_summary = lambda *args, **kwargs: calls.append(args)
+    try:
+        articles = [{
+            'title': 'Test Post',
+            'link': 'https://aws.amazon.com/blogs/test/post/',
+            'pub_date': '2025-08-22T17:54:38',
+            'author': 'AWS Team',
+            'summary': '# 标题\n这是预先生成的摘要。'
+        }]
+        report = blog_analyzer.generate_markdown_report(
+            'machine-learning', articles, '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z'
+        )
+        
+        if calls:
+            print("❌ 渲染报告时不应再次生成摘要")
+            return False
+        
+        if "# AWS 机器学习 博客分析报告" in report and "这是预先生成的摘要。" in report \
+                and "# 标题" not in report:
+            print("✅ 报告基于已生成摘要渲染")
+        else:
+            print("❌ 报告内容错误")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 报告渲染测试出错: {e}")
+        return False
+    finally:
+        blog_analyzer.generate_chinese_summary = original
+
+def test_concurrent_scheduler():
+    """测试并发调度和令牌桶限流（离线）"""
+    print("\n=== 测试并发调度 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import time
+    from rate_limiter import TokenBucket
+    from scheduler import run_ordered
+    
+    try:
+        # 后面的任务先完成，回调仍需保持输入顺序
+        def work(delay):
+            time.sleep(delay)
+            return delay
+        
+        order = []
+        start = time.monotonic()
+        run_ordered([0.2, 0.1, 0.0, 0.15], work, 4, lambda i, item, result: order.append(i))
+        elapsed = time.monotonic() - start
+        
+        if order != [0, 1, 2, 3]:
+            print(f"❌ 回调顺序错误: {order}")
+            return False
+        if elapsed > 0.4:
+            print(f"❌ 任务未并发执行，耗时 {elapsed:.2f} 秒")
+            return False
+        print(f"✅ 并发执行并按顺序输出，耗时 {elapsed:.2f} 秒")
+        
+        # 600 次/分钟 = 10 次/秒，突发 2 个后每 0.1 秒一个令牌
+        bucket = TokenBucket(600, max_concurrency=2)
+        start = time.monotonic()
+        for _ in range(5):
+            with bucket:
+                pass
+        elapsed = time.monotonic() - start
+        if not 0.25 <= elapsed <= 0.6:
+            print(f"❌ 令牌桶速率错误，耗时 {elapsed:.2f} 秒")
+            return False
+        print("✅ 令牌桶限流正常")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 并发调度测试出错: {e}")
+        return False
+
+def test_stub_backend():
+    """测试本地桩后端下的摘要生成流程（离线）"""
+    print("\n=== 测试模型调用后端 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import blog_analyzer
+    import bedrock_backend
+    from bedrock_backend import StubBackend, set_backend
+    
+    # 直接保存模块级后端，避免在测试中创建真实的 boto3 client
+    previous = bedrock_backend._backend
+    try:
+        backend = StubBackend(lambda model_id, body: f"{model_id} 摘要")
+        set_backend(backend)
+        summary = blog_analyzer.generate_chinese_summary('Title', 'x' * 100, 'machine-learning')
+        if summary != f"{blog_analyzer.CLAUDE_MODEL_ID} 摘要" or backend.calls != 1:
+            print(f"❌ Claude 调用结果错误: {summary}")
+            return False
+        print("✅ 桩后端返回 Claude 响应格式")
+        
+        # Claude 调用失败时应回退到 Nova Lite
+        def responder(model_id, body):
+            if model_id == blog_analyzer.CLAUDE_MODEL_ID:
+                raise blog_analyzer.ModelInvocationError('AccessDenied')
+            return 'Nova 翻译'
+        set_backend(StubBackend(responder))
+        summary = blog_analyzer.generate_chinese_summary('Title', 'x' * 100, 'whats-new')
+        if summary != 'Nova 翻译':
+            print(f"❌ 备用模型回退错误: {summary}")
+            return False
+        print("✅ 失败后回退到 Nova Lite")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 模型调用后端测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+
+def test_http_cache():
+    """测试 RSS 条件请求和本地缓存（离线）"""
+    print("\n=== 测试 RSS HTTP 缓存 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    from http_cache import FeedHTTPCache
+    from rss_parser import AWSBlogRSSParser
+    
+    server, url, stats = start_local_feed_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parser = AWSBlogRSSParser(http_cache=FeedHTTPCache(tmp_dir))
+            first = parser.fetch_rss(url)
+            second = parser.fetch_rss(url)
+            
+            if first != SAMPLE_RSS or second != SAMPLE_RSS:
+                print("❌ gzip 解压或 304 复用结果错误")
+                return False
+            if stats['not_modified'] != 1:
+                print(f"❌ 未发送条件请求: {stats}")
+                return False
+            print("✅ gzip 响应和 304 本地复用正常")
+            
+            parser.max_age = 300
+            requests_before = stats['requests']
+            if parser.fetch_rss(url) != SAMPLE_RSS or stats['requests'] != requests_before:
+                print("❌ max-age 内不应访问网络")
+                return False
+            print("✅ max-age 内直接使用本地副本")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ RSS HTTP 缓存测试出错: {e}")
+        return False
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_multi_feed_fetch():
+    """测试多 feed 并发获取、别名去重、失败隔离和连接复用（离线）"""
+    print("\n=== 测试多 feed 并发获取 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import blog_analyzer
+    from http_pool import HTTPConnectionPool
+    from rss_parser import AWSBlogRSSParser
+    
+    server, url, stats = start_local_feed_server()
+    base_url = url.rsplit('/feed/', 1)[0]
+    pool = HTTPConnectionPool(max_per_host=2)
+    try:
+        parser = AWSBlogRSSParser(pool=pool)
+        parser.feeds = {
+            'ml': url,
+            'ml-alias': url,
+            'bad': base_url + '/bad/',
+            'moved': base_url + '/redirect/'
+        }
+        
+        if parser.resolve_blog_types(['ml', 'ml-alias']) != {url: ['ml', 'ml-alias']}:
+            print("❌ 别名未合并为同一 feed")
+            return False
+        try:
+            parser.resolve_blog_types(['all', 'bogus'])
+            print("❌ all 与未知类型组合时应报错")
+            return False
+        except ValueError:
+            pass
+        print("✅ 别名去重和类型校验正常")
+        
+        results = parser.get_multi_blog_articles(
+            ['all'], '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z', max_workers=4
+        )
+        if sorted(results) != ['bad', 'ml', 'moved'] or results['ml']['aliases'] != ['ml', 'ml-alias']:
+            print(f"❌ 多 feed 结果结构错误: {sorted(results)}")
+            return False
+        if not results['bad']['error'] or results['bad']['articles']:
+            print("❌ 格式错误的 feed 应记录在 error 中")
+            return False
+        if len(results['ml']['articles']) != 2 or len(results['moved']['articles']) != 2:
+            print("❌ 正常 feed 或重定向 feed 结果错误")
+            return False
+        print("✅ 单个 feed 失败不影响其他 feed，重定向正常")
+        
+        # 顺序请求应复用空闲连接，并发请求不超过每主机连接上限
+        parser.fetch_feed(url)
+        parser.fetch_feed(url)
+        if pool.connections_reused == 0 or pool.connections_created > 2:
+            print(f"❌ 连接未复用: 新建 {pool.connections_created}，复用 {pool.connections_reused}")
+            return False
+        print(f"✅ keep-alive 连接复用正常（新建 {pool.connections_created}，复用 {pool.connections_reused}）")
+        
+        articles = blog_analyzer.flatten_feed_results(results)
+        if len(articles) != 4 or any('feed' not in article for article in articles):
+            print("❌ 多 feed 结果合并错误")
+            return False
+        print("✅ 多 feed 结果合并为文章列表")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 多 feed 并发获取测试出错: {e}")
+        return False
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+
+def test_streaming_parse():
+    """测试增量解析和早于开始日期时提前停止（离线）"""
+    print("\n=== 测试增量解析 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    from rss_parser import AWSBlogRSSParser
+    
+    # 200 篇按天倒序的文章，只有最新 5 天在查询范围内
+    items = []
+    for day in range(200):
+        items.append(f"""<item><title>Post {day}</title>
+<link>https://aws.amazon.com/blogs/test/post-{day}/</link>
+<pubDate>{(datetime(2025, 8, 23) - timedelta(days=day)).strftime('%a, %d %b %Y 12:00:00 +0000')}</pubDate>
+<description>Description {day}</description>
+<content:encoded><![CDATA[<p>{'body ' * 200}</p>]]></content:encoded></item>""")
+    feed = (SAMPLE_RSS.split('<item>')[0] + ''.join(items) + '</channel></rss>').encode('utf-8')
+    
+    consumed = []
+    def chunks():
+        for offset in range(0, len(feed), 4096):
+            consumed.append(offset)
+            yield feed[offset:offset + 4096]
+    
+    try:
+        parser = AWSBlogRSSParser()
+        articles = parser.parse_rss_stream(chunks(), '2025-08-19T00:00:00Z', '2025-08-23T23:59:59Z')
+        total_chunks = (len(feed) + 4095) // 4096
+        
+        if [a['title'] for a in articles] != [f"Post {i}" for i in range(5)]:
+            print(f"❌ 日期过滤结果错误: {[a['title'] for a in articles]}")
+            return False
+        if len(consumed) >= total_chunks // 2:
+            print(f"❌ 未提前停止读取: {len(consumed)}/{total_chunks} 块")
+            return False
+        print(f"✅ 增量解析在读取 {len(consumed)}/{total_chunks} 块后停止")
+        
+        if len(parser.parse_rss_items(SAMPLE_RSS, '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z')) != 2:
+            print("❌ 完整字符串解析结果错误")
+            return False
+        print("✅ 完整内容解析兼容")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 增量解析测试出错: {e}")
+        return False
+
+def test_date_parsing():
+    """测试 pubDate 快速解析与 UTC 换算（离线）"""
+    print("\n=== 测试日期解析 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    from date_utils import parse_iso_datetime, parse_rss_date
+    
+    cases = {
+        'Fri, 22 Aug 2025 17:54:38 +0000': datetime(2025, 8, 22, 17, 54, 38),
+        'Fri, 22 Aug 2025 16:00:00 GMT': datetime(2025, 8, 22, 16, 0, 0),
+        'Fri, 22 Aug 2025 10:00:00 -0700': datetime(2025, 8, 22, 17, 0, 0),
+        'Sat, 23 Aug 2025 01:30:00 +0800': datetime(2025, 8, 22, 17, 30, 0),
+        'Fri, 22 Aug 2025 10:00:00 PDT': datetime(2025, 8, 22, 17, 0, 0),
+        '22 Aug 2025 17:54 +0000': datetime(2025, 8, 22, 17, 54, 0),
+        'not a date': None,
+        '': None
+    }
+    
+    try:
+        for value, expected in cases.items():
+            parsed = parse_rss_date(value)
+            if parsed != expected:
+                print(f"❌ {value!r} 解析为 {parsed}，期望 {expected}")
+                return False
+        print(f"✅ {len(cases)} 种日期格式解析正确（含时区换算）")
+        
+        if parse_iso_datetime('2025-08-23T08:00:00+08:00') != datetime(2025, 8, 23, 0, 0, 0):
+            print("❌ ISO 日期未换算为 UTC")
+            return False
+        if parse_iso_datetime('2025-08-23T00:00:00Z') != datetime(2025, 8, 23, 0, 0, 0):
+            print("❌ ISO 日期 Z 后缀解析错误")
+            return False
+        print("✅ 命令行日期换算为 UTC")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 日期解析测试出错: {e}")
+        return False
+
+def test_pipeline():
+    """测试进程内流水线和统一入口（离线）"""
+    print("\n=== 测试进程内流水线 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import io
+    import bedrock_backend
+    import pipeline
+    from bedrock_backend import StubBackend, set_backend
+    from rss_parser import AWSBlogRSSParser
+    
+    server, url, stats = start_local_feed_server()
+    previous = bedrock_backend._backend
+    try:
+        parser = AWSBlogRSSParser()
+        parser.feeds = {'machine-learning': url, 'whats-new': url}
+        
+        articles = pipeline.fetch_articles(
+            'machine-learning', '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z', parser=parser
+        )
+        if [a['title'] for a in articles] != ['Second post', 'First post']:
+            print(f"❌ 单个 feed 获取结果错误: {articles}")
+            return False
+        merged = pipeline.fetch_articles(
+            'machine-learning,whats-new', '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z', parser=parser
+        )
+        if len(merged) != 2 or merged[0].get('feed') != 'machine-learning':
+            print(f"❌ 多 feed 合并结果错误: {merged}")
+            return False
+        print("✅ 进程内获取文章，无需子进程和 JSON 往返")
+        
+        # 示例 feed 的正文太短，补充正文使其达到生成摘要的最小长度
+        for article in articles:
+            article['content_encoded'] = f"<p>{article['title']} body with enough detail to summarize in the test.</p>"
+        set_backend(StubBackend(lambda model_id, body: '流水线摘要'))
+        buffer = io.StringIO()
+        writer = pipeline.write_report(
+            buffer, articles, 'machine-learning', '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z',
+            concurrency=2
+        )
+        report = buffer.getvalue()
+        if writer.written != 2 or report.count('流水线摘要') != 2:
+            print("❌ 报告渲染结果错误")
+            return False
+        print("✅ 摘要生成与报告输出正常")
+        
+        start = datetime.now()
+        result = subprocess.run(['python3', os.path.join(SCRIPT_DIR, 'cli.py'), '--version'],
+                                capture_output=True, text=True, timeout=30)
+        if result.returncode != 0 or 'v2.0' not in result.stdout:
+            print(f"❌ 统一入口 --version 失败: {result.stderr}")
+            return False
+        print(f"✅ cli.py --version 耗时 {(datetime.now() - start).total_seconds():.2f}s")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 进程内流水线测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+        server.shutdown()
+        server.server_close()
+
+def test_article_archive():
+    """测试本地文章归档：去重、按索引查询和离线回答历史范围（离线）"""
+    print("\n=== 测试文章归档 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    from article_archive import ArticleArchive
+    from rss_parser import AWSBlogRSSParser
+    
+    server, url, stats = start_local_feed_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive = ArticleArchive(os.path.join(tmp_dir, 'articles.sqlite3'))
+            parser = AWSBlogRSSParser(archive=archive)
+            
+            articles = parser.fetch_and_parse(url, '2025-08-21T00:00:00Z', '2025-08-23T23:59:59Z')
+            if [a['title'] for a in articles] != ['Second post'] or archive.count(url) != 2:
+                print(f"❌ 同步结果错误: {[a['title'] for a in articles]}，归档 {archive.count(url)} 篇")
+                return False
+            print("✅ feed 中所有文章写入归档，查询只返回日期范围内的文章")
+            
+            # 不在 feed 中的历史文章（如更早同步的内容）由归档回答
+            archive.add_articles(url, [{
+                'title': 'Old post', 'link': 'https://aws.amazon.com/blogs/machine-learning/old-post/',
+                'pub_date': '2025-06-01T08:00:00', 'description': 'Old', 'author': 'AWS Team'
+            }])
+            requests_before = stats['requests']
+            history = parser.fetch_and_parse(url, '2025-05-01T00:00:00Z', '2025-08-23T23:59:59Z')
+            if [a['title'] for a in history] != ['Second post', 'First post', 'Old post']:
+                print(f"❌ 历史范围查询错误: {[a['title'] for a in history]}")
+                return False
+            if stats['requests'] != requests_before:
+                print("❌ 上次同步之前结束的范围不应访问网络")
+                return False
+            print("✅ 历史日期范围由本地索引查询，不访问网络")
+            
+            parser.fetch_and_parse(url, '2025-08-01T00:00:00Z', '2099-01-01T00:00:00Z')
+            if archive.count(url) != 3 or stats['requests'] != requests_before + 1:
+                print(f"❌ 重复同步未去重: {archive.count(url)} 篇")
+                return False
+            print("✅ 新窗口重新同步，重复文章按链接去重")
+            
+            parser.close()
+        return True
+        
+    except Exception as e:
+        print(f"❌ 文章归档测试出错: {e}")
+        return False
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_batch_translation():
+    """测试 What's New 批量翻译：JSON 拆分、缺失条目重试和缓存（离线）"""
+    print("\n=== 测试批量翻译 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import bedrock_backend
+    import pipeline
+    from bedrock_backend import StubBackend, request_prompt, set_backend
+    from summary_cache import SummaryCache
+    
+    articles = [{
+        'title': f'Update {i}',
+        'link': f'https://aws.amazon.com/about-aws/whats-new/2025/08/update-{i}/',
+        'pub_date': '2025-08-22T12:00:00',
+        'description': f'Amazon service update number {i} is now generally available in all regions.',
+        'author': 'AWS Team'
+    } for i in range(1, 6)]
+    
+    prompts = []
+    def responder(model_id, body):
+        prompt = request_prompt(body)
+        prompts.append(prompt)
+        if '只输出一个 JSON 对象' in prompt:
+            # 第 3 条为空、第 5 条缺失，应单独重试
+            return '```json\n{"1": "译文1", "2": "译文2", "3": "", "4": "译文4"}\n```'
+        return '单条译文'
+    
+    previous = bedrock_backend._backend
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = SummaryCache(os.path.join(tmp_dir, 'cache.sqlite3'))
+            set_backend(StubBackend(responder))
+            
+            groups = pipeline.plan_batches(articles, 'whats-new', batch_size=5)
+            if groups != [[0, 1, 2, 3, 4]] or len(pipeline.plan_batches(articles, 'aws', 5)) != 5:
+                print(f"❌ 分组错误: {groups}")
+                return False
+            
+            pipeline.summarize_articles(articles, 'whats-new', cache=cache, concurrency=2, batch_size=5)
+            summaries = [a['summary'] for a in articles]
+            if summaries != ['译文1', '译文2', '单条译文', '译文4', '单条译文'] or len(prompts) != 3:
+                print(f"❌ 批量翻译结果错误: {summaries}，请求 {len(prompts)} 次")
+                return False
+            print("✅ 5 条更新用 1 次批量请求翻译，缺失/格式错误的 2 条单独重试")
+            
+            prompts.clear()
+            pipeline.summarize_articles(articles, 'whats-new', cache=cache, concurrency=2, batch_size=5)
+            if prompts or [a['summary'] for a in articles] != summaries:
+                print(f"❌ 缓存命中时不应调用模型: {len(prompts)} 次")
+                return False
+            print("✅ 批量翻译结果写入摘要缓存")
+            cache.close()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 批量翻译测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+
+def test_benchmark_harness():
+    """测试基准测试工具：合成 feed、假后端和端到端场景（离线）"""
+    print("\n=== 测试基准测试工具 ===")
+    
+    bench_dir = os.path.join(SCRIPT_DIR, 'benchmarks')
+    sys.path.insert(0, SCRIPT_DIR)
+    sys.path.insert(0, bench_dir)
+    import bedrock_backend
+    from fake_backend import FakeBedrockBackend
+    from feed_generator import generate_feed
+    from rss_parser import AWSBlogRSSParser
+    
+    previous = bedrock_backend._backend
+    try:
+        feed = generate_feed(items=50, body_bytes=2000)
+        articles = AWSBlogRSSParser().parse_rss_items(feed, '2000-01-01T00:00:00Z', '2025-08-23T23:59:59Z')
+        if len(articles) != 50 or 'About the authors' not in articles[0]['content_encoded']:
+            print(f"❌ 合成 feed 解析结果错误: {len(articles)} 篇")
+            return False
+        print("✅ 合成 feed 可被解析")
+        
+        backend = FakeBedrockBackend(latency=0, throttle_rate=1.0)
+        try:
+            backend.invoke('us.anthropic.claude', {'messages': [{'role': 'user', 'content': 'x'}]})
+            print("❌ 未注入限流")
+            return False
+        except bedrock_backend.ThrottlingError:
+            pass
+        print("✅ 假后端按比例注入 ThrottlingException")
+        
+        output = os.path.join(tempfile.mkdtemp(), 'bench.json')
+        result = subprocess.run([
+            'python3', os.path.join(bench_dir, 'run_benchmarks.py'),
+            '--scenarios', 'parse,end_to_end', '--large-items', '50', '--repeat', '1',
+            '--latency', '0', '-o', output
+        ], capture_output=True, text=True, timeout=60)
+        if result.returncode != 0:
+            print(f"❌ 基准测试运行失败: {result.stderr}")
+            return False
+        with open(output, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        end_to_end = report['scenarios']['end_to_end']
+        if end_to_end['articles'] == 0 or end_to_end['calls_per_article'] >= 1:
+            print(f"❌ 端到端结果异常: {end_to_end}")
+            return False
+        print(f"✅ 端到端场景 {end_to_end['articles']} 篇，每篇 {end_to_end['calls_per_article']:.2f} 次模型调用")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 基准测试工具测试出错: {e}")
+        return False
+    finally:
+        bedrock_backend.set_backend(previous)
+
+def test_metrics_export():
+    """测试阶段耗时、限流/备用计数和 JSON/Prometheus 导出（离线）"""
+    print("\n=== 测试运行指标 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import blog_analyzer
+    import bedrock_backend
+    from bedrock_backend import StubBackend, set_backend
+    from metrics import get_metrics, percentile
+    from rss_parser import AWSBlogRSSParser
+    
+    if percentile([1, 2, 3, 4], 50) != 2.5 or percentile([5], 99) != 5:
+        print("❌ 百分位数计算错误")
+        return False
+    
+    metrics = get_metrics()
+    previous = bedrock_backend._backend
+    try:
+        metrics.reset()
+        blog_analyzer.configure_rate_limits()
+        AWSBlogRSSParser().parse_rss_items(SAMPLE_RSS, '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z')
+        
+        # Claude 始终限流，重试后回退到 Nova Lite
+        def responder(model_id, body):
+            if model_id == blog_analyzer.CLAUDE_MODEL_ID:
+                raise bedrock_backend.ThrottlingError('ThrottlingException')
+            return 'Nova 摘要'
+        set_backend(StubBackend(responder))
+        blog_analyzer.generate_chinese_summary('Title', 'x' * 100, 'machine-learning')
+        
+        snapshot = metrics.snapshot()
+        expected_stages = {'fetch_rss', 'parse_rss_items', 'invoke_bedrock_model', 'invoke_nova_lite_fallback'}
+        if not expected_stages <= set(snapshot['stages']):
+            print(f"❌ 缺少阶段耗时: {sorted(snapshot['stages'])}")
+            return False
+        if metrics.counter('bedrock_throttled_total') != 3 or metrics.counter('bedrock_retries_total') != 2:
+            print(f"❌ 限流/重试计数错误: {snapshot['counters']}")
+            return False
+        if snapshot['fallback_rate'] != 1.0:
+            print(f"❌ 备用率错误: {snapshot['fallback_rate']}")
+            return False
+        print("✅ 记录阶段耗时、限流重试次数和备用率")
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, 'metrics.json')
+            prom_path = os.path.join(tmp_dir, 'metrics.prom')
+            metrics.write_json(json_path)
+            metrics.write_prometheus(prom_path)
+            with open(json_path, 'r', encoding='utf-8') as f:
+                exported = json.load(f)
+            with open(prom_path, 'r', encoding='utf-8') as f:
+                prom = f.read()
+        if 'p95' not in exported['stages']['invoke_bedrock_model']:
+            print("❌ JSON 导出缺少百分位数")
+            return False
+        if ('aws_blog_rss_stage_duration_seconds{stage="parse_rss_items",quantile="0.99"}' not in prom
+                or 'aws_blog_rss_bedrock_throttled_total{model=' not in prom):
+            print("❌ Prometheus 导出格式错误")
+            return False
+        print("✅ 导出 JSON 摘要和 Prometheus textfile")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 运行指标测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+        metrics.reset()
+        blog_analyzer.configure_rate_limits()
+
+def test_throttling_control():
+    """测试限流处理：AIMD 并发上限、熔断后直接使用 Nova Lite、探测请求恢复 Claude（离线）"""
+    print("\n=== 测试限流熔断 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import time
+    import blog_analyzer
+    import bedrock_backend
+    from bedrock_backend import StubBackend, ThrottlingError, set_backend
+    from rate_limiter import SUCCESS, THROTTLED, AdaptiveConcurrency, configure_circuit_breaker
+    
+    previous = bedrock_backend._backend
+    try:
+        limit = AdaptiveConcurrency(8)
+        for _ in range(4):
+            limit.acquire()
+        limit.release(THROTTLED)
+        limit.release(THROTTLED)
+        if limit.limit != 4:
+            print(f"❌ 同一轮中的多次限流应只减半一次: {limit.limit}")
+            return False
+        limit.release(SUCCESS)
+        limit.release(SUCCESS)
+        limit.acquire()
+        limit.release(THROTTLED)
+        for _ in range(8):
+            limit.acquire()
+            limit.release(SUCCESS)
+        if not 2 < limit.limit < 8:
+            print(f"❌ 成功后并发上限未逐步恢复: {limit.limit}")
+            return False
+        print(f"✅ 限流时并发上限减半，成功后逐步恢复（当前 {limit.limit:.1f}）")
+        
+        claude = {'throttled': True, 'calls': 0}
+        def responder(model_id, body):
+            if model_id == blog_analyzer.CLAUDE_MODEL_ID:
+                claude['calls'] += 1
+                if claude['throttled']:
+                    raise ThrottlingError('ThrottlingException')
+                return 'Claude 摘要'
+            return 'Nova 摘要'
+        set_backend(StubBackend(responder))
+        blog_analyzer.configure_rate_limits()
+        configure_circuit_breaker(blog_analyzer.CLAUDE_MODEL_ID, failure_threshold=5, recovery_timeout=0.3)
+        
+        start = time.monotonic()
+        results = [blog_analyzer.generate_chinese_summary(f'Title {i}', 'x' * 100, 'machine-learning')
+                   for i in range(5)]
+        elapsed = time.monotonic() - start
+        if results != ['Nova 摘要'] * 5 or claude['calls'] != 5:
+            print(f"❌ 熔断后仍调用 Claude: {claude['calls']} 次")
+            return False
+        if elapsed > 1:
+            print(f"❌ 限流后仍有等待，耗时 {elapsed:.2f} 秒")
+            return False
+        print(f"✅ 连续限流 5 次后熔断，其余文章直接使用 Nova Lite（耗时 {elapsed:.2f} 秒，无退避等待）")
+        
+        claude['throttled'] = False
+        time.sleep(0.35)
+        summary = blog_analyzer.generate_chinese_summary('Recovered', 'x' * 100, 'machine-learning')
+        if summary != 'Claude 摘要' or claude['calls'] != 6:
+            print(f"❌ 探测请求未恢复 Claude: {summary}")
+            return False
+        if blog_analyzer.generate_chinese_summary('Next', 'x' * 100, 'machine-learning') != 'Claude 摘要':
+            print("❌ 熔断器未关闭")
+            return False
+        print("✅ 熔断超时后探测请求成功，恢复使用 Claude")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 限流熔断测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+        blog_analyzer.configure_rate_limits()
+
+def test_content_extractor():
+    """测试正文提取：跳过代码和作者介绍、遵守 token 预算（离线）"""
+    print("\n=== 测试正文提取 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    from content_extractor import estimate_tokens, extract_text
+    
+    filler = ' '.join(['The team reviewed the general background of the project in detail.'] * 3)
+    html = (
+        '<script>var tracking = 1;</script><nav>Home | Blogs</nav>'
+        '<p>Amazon Bedrock now supports prompt caching for Claude models, reducing latency by up to 85% '
+        'for repeated prompt prefixes in Amazon Bedrock.</p>'
+        + ''.join(f'<p>{filler}</p>' for _ in range(2))
+        + '<pre><code>import boto3\nclient = boto3.client("bedrock-runtime")</code></pre>'
+        '<p>Prompt caching is available in US East (N. Virginia) and US West (Oregon) for Amazon Bedrock.</p>'
+        '<h3>About the authors</h3><p>Jane Doe is a Solutions Architect at AWS.</p>'
+    )
+    
+    try:
+        text = extract_text(html, token_budget=100, title='Amazon Bedrock prompt caching')
+        if any(marker in text for marker in ('tracking', 'boto3', 'Home | Blogs', 'Jane Doe')):
+            print(f"❌ 未去除脚本/代码/导航/作者介绍: {text}")
+            return False
+        print("✅ 去除脚本、代码、导航和作者介绍")
+        
+        if estimate_tokens(text) > 100 or 'background' in text:
+            print(f"❌ 超出 token 预算: {estimate_tokens(text)}")
+            return False
+        if 'reducing latency by up to 85%' not in text or 'US West (Oregon)' not in text:
+            print(f"❌ 未保留信息量高的段落: {text}")
+            return False
+        if text.index('85%') > text.index('Oregon'):
+            print("❌ 段落未按原顺序输出")
+            return False
+        print("✅ 在 token 预算内按信息量选取段落并保持原顺序")
+        
+        if extract_text('Plain What\'s New description &amp; details') != "Plain What's New description & details":
+            print("❌ 纯文本描述处理错误")
+            return False
+        print("✅ 纯文本描述直接保留")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ 正文提取测试出错: {e}")
+        return False
+
+def test_near_duplicates():
+    """测试跨 feed 近似重复检测：SimHash 分组、合并报告和跨运行复用摘要（离线）"""
+    print("\n=== 测试近似重复检测 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import io
+    import bedrock_backend
+    import pipeline
+    from bedrock_backend import StubBackend, set_backend
+    from near_dedup import fingerprint_article, group_near_duplicates, hamming_distance
+    from summary_cache import SummaryCache
+    
+    sentences = [
+        f"Step {i}: configure the {service} integration so that requests from the {region} Region are "
+        f"processed with {latency} milliseconds of added latency."
+        for i, (service, region, latency) in enumerate(zip(
+            ['Lambda', 'SQS', 'EventBridge', 'DynamoDB', 'API Gateway', 'Step Functions'],
+            ['Oregon', 'Ireland', 'Tokyo', 'Sydney', 'Frankfurt', 'Mumbai'],
+            [12, 7, 30, 5, 18, 9]
+        ))
+    ]
+    body = '<p>' + '</p><p>'.join(sentences) + '</p>'
+    title = 'Building event-driven serverless applications'
+    
+    def make(feed, link, content, article_title=title):
+        return {
+            'title': article_title, 'link': link, 'feed': feed, 'author': 'AWS Team',
+            'pub_date': '2025-08-22T12:00:00', 'description': '', 'content_encoded': content,
+            'simhash': fingerprint_article(article_title, content)
+        }
+    
+    calls = []
+    previous = bedrock_backend._backend
+    try:
+        original = fingerprint_article(title, body)
+        cross_post = fingerprint_article(title, body + '<p>Originally published on the AWS Compute Blog.</p>')
+        unrelated = fingerprint_article('Amazon S3 storage classes', body.replace('Lambda', 'Glacier')
+                                        .replace('configure', 'archive').replace('Region', 'bucket'))
+        if hamming_distance(int(original, 16), int(cross_post, 16)) > 3:
+            print("❌ 交叉发布的文章指纹差异过大")
+            return False
+        if hamming_distance(int(original, 16), int(unrelated, 16)) <= 3:
+            print("❌ 不同文章被判定为近似重复")
+            return False
+        print("✅ SimHash 指纹区分交叉发布和不同文章")
+        
+        articles = [
+            make('aws', 'https://aws.amazon.com/blogs/aws/event-driven/', body),
+            make('machine-learning', 'https://aws.amazon.com/blogs/machine-learning/other/',
+                 body.replace('Lambda', 'SageMaker').replace('configure', 'train').replace('Region', 'cluster'),
+                 'Training models on SageMaker'),
+            make('compute', 'https://aws.amazon.com/blogs/compute/event-driven/',
+                 body + '<p>Originally published on the AWS Compute Blog.</p>'),
+            # 同一 feed 中的相似文章不是交叉发布，不合并
+            make('aws', 'https://aws.amazon.com/blogs/aws/event-driven-part-2/', body)
+        ]
+        groups = group_near_duplicates(articles)
+        if groups != [[0, 2], [1], [3]]:
+            print(f"❌ 近似重复分组错误: {groups}")
+            return False
+        print("✅ 只合并来自不同 feed 的近似重复文章")
+        
+        set_backend(StubBackend(lambda model_id, body: calls.append(model_id) or '共享摘要'))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = SummaryCache(os.path.join(tmp_dir, 'cache.sqlite3'))
+            buffer = io.StringIO()
+            writer = pipeline.write_report(buffer, articles, 'aws,machine-learning,compute',
+                                           '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z',
+                                           cache=cache, concurrency=2)
+            report = buffer.getvalue()
+            if len(calls) != 3 or writer.written != 3:
+                print(f"❌ 重复文章应只生成一次摘要: 调用 {len(calls)} 次，写出 {writer.written} 篇")
+                return False
+            if ('同时发布于' not in report or 'https://aws.amazon.com/blogs/compute/event-driven/' not in report
+                    or '已合并' not in report):
+                print("❌ 报告未列出所有来源链接")
+                return False
+            print("✅ 重复文章共用一次模型调用，报告列出所有来源链接")
+            
+            # 之后的运行中，其他 feed 的交叉发布文章直接复用缓存的摘要
+            calls.clear()
+            later = make('containers', 'https://aws.amazon.com/blogs/containers/event-driven/', body)
+            summary = pipeline.summarize_article(later, 'containers', cache)
+            same_feed = make('aws', 'https://aws.amazon.com/blogs/aws/event-driven-part-3/', body)
+            pipeline.summarize_article(same_feed, 'aws', cache)
+            if summary != '共享摘要' or len(calls) != 1 or cache.stats()['similar_hits'] != 1:
+                print(f"❌ 跨运行近似重复复用错误: 调用 {len(calls)} 次")
+                return False
+            print("✅ 之后运行中其他 feed 的交叉发布文章复用缓存摘要")
+            cache.close()
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 近似重复检测测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+
+def test_watch_mode():
+    """测试监视模式：水位、自适应轮询间隔和滚动报告（离线）"""
+    print("\n=== 测试监视模式 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import threading
+    import bedrock_backend
+    import watcher
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from bedrock_backend import StubBackend, set_backend
+    from rss_parser import AWSBlogRSSParser
+    
+    def item(number, hours_ago):
+        pub_date = datetime(2025, 8, 22, 12, 0, 0) - timedelta(hours=hours_ago)
+        pub_date = pub_date.strftime('%a, %d %b %Y %H:%M:%S +0000')
+        return (f"<item><title>Post {number}</title>"
+                f"<link>https://aws.amazon.com/blogs/aws/post-{number}/</link>"
+                f"<guid>post-{number}</guid><pubDate>{pub_date}</pubDate>"
+                f"<description>Amazon service announcement number {number} with enough detail to summarize "
+                f"for the watch mode test.</description></item>")
+    
+    feed = {'items': [item(3, 2), item(2, 4), item(1, 6)]}
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def do_GET(self):
+            body = ('<?xml version="1.0"?><rss version="2.0"><channel><title>AWS News Blog</title>'
+                    '<ttl>60</ttl>' + ''.join(feed['items']) + '</channel></rss>').encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/aws/"
+    
+    calls = []
+    previous = bedrock_backend._backend
+    try:
+        if (watcher.hint_min_interval({'ttl': '60'}) != 3600
+                or watcher.hint_min_interval({'update_period': 'daily', 'update_frequency': '2'}) != 43200):
+            print("❌ ttl / sy:updatePeriod 提示解析错误")
+            return False
+        hourly = [f'2025-08-22T{h:02d}:00:00' for h in range(6)]
+        if watcher.cadence_interval(hourly) != 1800:
+            print(f"❌ 发布节奏估计错误: {watcher.cadence_interval(hourly)}")
+            return False
+        print("✅ 按发布节奏和 ttl / updatePeriod 提示计算轮询间隔")
+        
+        set_backend(StubBackend(lambda model_id, body: calls.append(model_id) or '监视摘要'))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state = watcher.WatchState(os.path.join(tmp_dir, 'state.json'))
+            report_path = os.path.join(tmp_dir, 'watch.md')
+            feed_watcher = watcher.FeedWatcher(
+                AWSBlogRSSParser(), {url: ['aws']}, state, watcher.RollingReport(report_path, state),
+                min_interval=60, max_interval=3 * 3600, seed=1
+            )
+            
+            # 首次轮询只建立水位，不为已有文章生成摘要
+            if feed_watcher.poll([url], now=1000.0) or calls or os.path.exists(report_path):
+                print("❌ 首次轮询不应处理已有文章")
+                return False
+            feed_state = state.feed(url)
+            if feed_state['watermark_ids'] != ['post-3'] or feed_state['next_poll'] < 1000 + 3600:
+                print(f"❌ 水位或 ttl 提示错误: {feed_state}")
+                return False
+            print("✅ 首次轮询建立水位，下次轮询间隔不短于 ttl")
+            
+            feed['items'].insert(0, item(4, 1))
+            state = watcher.WatchState(state.path)
+            feed_watcher.state = feed_watcher.report.state = state
+            new = feed_watcher.poll(feed_watcher.due_feeds(1000.0 + 7200), now=1000.0 + 7200)
+            if [a['title'] for a in new] != ['Post 4'] or len(calls) != 1:
+                print(f"❌ 新文章检测错误: {[a['title'] for a in new]}，调用 {len(calls)} 次")
+                return False
+            with open(report_path, encoding='utf-8') as f:
+                report = f.read()
+            if report.count('# AWS 博客实时摘要') != 1 or '### 1. Post 4' not in report or '监视摘要' not in report:
+                print("❌ 滚动报告内容错误")
+                return False
+            print("✅ 重启后按持久化水位只为新文章生成摘要并追加到滚动报告")
+            
+            idle_before = watcher.next_interval(state.feed(url), 60, 3 * 3600)
+            if feed_watcher.poll([url], now=20000.0) or len(calls) != 1:
+                print("❌ 没有新文章时不应调用模型")
+                return False
+            if watcher.next_interval(state.feed(url), 60, 3 * 3600) <= idle_before:
+                print("❌ 空轮询后间隔未放大")
+                return False
+            print("✅ 空轮询不调用模型，轮询间隔逐次放大")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 监视模式测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+        server.shutdown()
+        server.server_close()
+
+def test_streaming_summaries():
+    """测试流式摘要：本地替身端点逐段返回，报告中下一篇文章的摘要边生成边写出（离线）"""
+    print("\n=== 测试流式摘要 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    sys.path.insert(0, os.path.join(SCRIPT_DIR, 'benchmarks'))
+    import io
+    import re
+    import time
+    import blog_analyzer
+    import bedrock_backend
+    import pipeline
+    from bedrock_backend import EndpointBackend, ThrottlingError, set_backend
+    from fake_backend import FakeBedrockBackend
+    from report_writer import StreamingSummaryCleaner, clean_summary_markdown
+    from stream_server import start_stream_server
+    
+    class RecordingStream(io.StringIO):
+        """记录每次写出的内容"""
+        def __init__(self):
+            super().__init__()
+            self.writes = []
+        
+        def write(self, text):
+            self.writes.append(text)
+            return super().write(text)
+    
+    raw = "# 标题\n本文介绍了新功能。\n## 要点\n- 支持流式输出\n\n"
+    cleaner = StreamingSummaryCleaner()
+    streamed = ''.join(cleaner.feed(raw[i:i + 3]) for i in range(0, len(raw), 3)) + cleaner.finish()
+    if streamed != clean_summary_markdown(raw):
+        print(f"❌ 流式清理结果与完整清理不一致: {streamed!r}")
+        return False
+    print("✅ 流式清理标题标记，结果与完整清理一致")
+    
+    server, base_url = start_stream_server(FakeBedrockBackend(latency=0.05, jitter=0), token_delay=0.05)
+    previous = bedrock_backend._backend
+    try:
+        set_backend(EndpointBackend(base_url))
+        arrivals = []
+        start = time.perf_counter()
+        text = blog_analyzer.invoke_claude('prompt', on_delta=lambda t: arrivals.append(time.perf_counter() - start))
+        total = time.perf_counter() - start
+        if not text or len(arrivals) < 3 or arrivals[0] > total / 2:
+            print(f"❌ 首段文本到达过晚: 首段 {arrivals[:1]}，总耗时 {total:.2f}s")
+            return False
+        print(f"✅ 首段文本 {arrivals[0] * 1000:.0f} ms 到达（完整生成 {total * 1000:.0f} ms）")
+        
+        articles = [
+            {'title': f'Post {i}', 'link': f'https://aws.amazon.com/blogs/machine-learning/post-{i}/',
+             'author': 'AWS', 'pub_date': '2025-08-20T10:00:00',
+             'description': f'Amazon SageMaker feature number {i} with enough detail to summarize in the test.'}
+            for i in range(3)
+        ]
+        reports = {}
+        for stream_summaries in (False, True):
+            buffer = RecordingStream()
+            pipeline.write_report(buffer, [dict(a) for a in articles], 'machine-learning',
+                                  '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z', concurrency=2,
+                                  dedup=False, stream_summaries=stream_summaries)
+            reports[stream_summaries] = buffer
+        # 生成时间精确到秒，两次运行可能不同
+        contents = [re.sub(r'\*\*生成时间\*\*: .*', '', reports[key].getvalue()) for key in (True, False)]
+        if contents[0] != contents[1]:
+            print("❌ 流式输出的报告与非流式不一致")
+            return False
+        if len(reports[True].writes) <= len(reports[False].writes) + 3:
+            print("❌ 摘要没有逐段写出")
+            return False
+        print("✅ 报告逐段写出摘要，最终内容与非流式一致")
+        
+        throttled_server, throttled_url = start_stream_server(FakeBedrockBackend(latency=0, throttle_rate=1.0))
+        try:
+            list(EndpointBackend(throttled_url).invoke_stream(blog_analyzer.CLAUDE_MODEL_ID, {}))
+            print("❌ HTTP 429 未转换为限流错误")
+            return False
+        except ThrottlingError:
+            print("✅ 端点返回 429 时抛出 ThrottlingError")
+        finally:
+            throttled_server.shutdown()
+            throttled_server.server_close()
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 流式摘要测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+        server.shutdown()
+        server.server_close()
+
+def test_trend_analytics():
+    """测试趋势分析：从归档构建列式表、按 feed 和周统计服务名和 TF-IDF、列式导出（离线）"""
+    print("\n=== 测试趋势分析 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import analytics
+    from article_archive import ArticleArchive
+    
+    def article(number, day, services):
+        return {
+            'title': f'Update {number}', 'link': f'https://aws.amazon.com/about-aws/whats-new/{number}/',
+            'pub_date': f'2025-08-{day:02d}T10:00:00', 'author': 'AWS',
+            'description': ' '.join(f'{service} now supports a new feature.' for service in services),
+            'content_encoded': ''
+        }
+    
+    try:
+        if analytics.extract_terms('Amazon Bedrock Now Supports prompt caching in AWS Lambda and the AWS Region') != [
+                'Amazon Bedrock', 'AWS Lambda']:
+            print(f"❌ 服务名提取错误: {analytics.extract_terms('Amazon Bedrock Now Supports AWS Lambda')}")
+            return False
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive = ArticleArchive(os.path.join(tmp_dir, 'articles.sqlite3'))
+            # 第一周（8 月 11-17 日）以 Amazon S3 为主，第二周（8 月 18-24 日）Amazon Bedrock 大量出现
+            archive.add_articles('https://feeds/whats-new', [
+                article(1, 12, ['Amazon S3', 'AWS Lambda']),
+                article(2, 13, ['Amazon S3']),
+                article(3, 19, ['Amazon Bedrock', 'Amazon S3']),
+                article(4, 20, ['Amazon Bedrock', 'Amazon Bedrock', 'AWS Lambda']),
+                article(5, 21, ['Amazon Bedrock'])
+            ])
+            archive.add_articles('https://feeds/database', [article(6, 20, ['Amazon Aurora'])])
+            rows = analytics.load_articles(
+                archive, datetime(2025, 8, 1), datetime(2025, 8, 31),
+                {'https://feeds/whats-new': 'whats-new', 'https://feeds/database': 'database'},
+                summaries={'https://aws.amazon.com/about-aws/whats-new/3/': '中文摘要'}
+            )
+            archive.close()
+            
+            table = analytics.ArticleTable(rows)
+            if len(table) != 6 or table.columns['summary'].count('中文摘要') != 1:
+                print(f"❌ 列式表构建错误: {len(table)} 篇")
+                return False
+            result = analytics.analyze(table, top=3, use_numpy=False)
+            weeks = result['whats-new']['weeks']
+            if [w['week'] for w in weeks] != ['2025-W34', '2025-W33'] or result['database']['articles'] != 1:
+                print(f"❌ 按 feed 和周分组错误: {[w['week'] for w in weeks]}")
+                return False
+            if weeks[0]['top_terms'][0] != ('Amazon Bedrock', 4, 3) or weeks[0]['trending'][0][0] != 'Amazon Bedrock':
+                print(f"❌ 词频或 TF-IDF 趋势错误: {weeks[0]}")
+                return False
+            if result['whats-new']['top_terms'][:2] != [('Amazon Bedrock', 4, 3), ('Amazon S3', 3, 3)]:
+                print(f"❌ 整体提及最多的服务错误: {result['whats-new']['top_terms']}")
+                return False
+            if analytics.np is not None and analytics.analyze(table, top=3, use_numpy=True) != result:
+                print("❌ numpy 与纯 Python 实现结果不一致")
+                return False
+            print(f"✅ 按 feed 和周统计服务名，TF-IDF 识别本周趋势（{'numpy' if analytics.np is not None else '纯 Python'}）")
+            
+            export_path = os.path.join(tmp_dir, 'articles.json')
+            analytics.export_table(table, export_path)
+            with open(export_path, encoding='utf-8') as f:
+                exported = json.load(f)
+            if exported['columns']['week'][0] != '2025-W33' or len(exported['terms']['doc']) != len(table.term_id):
+                print("❌ 列式 JSON 导出错误")
+                return False
+            try:
+                analytics.export_table(table, os.path.join(tmp_dir, 'articles.csv'))
+                print("❌ 不支持的格式应报错")
+                return False
+            except ValueError:
+                pass
+            print("✅ 导出列式数据（字段列 + 扁平词项列）")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 趋势分析测试出错: {e}")
+        return False
+
+def test_job_queue():
+    """测试持久化任务队列：崩溃后租约过期重新认领、多进程分担、重新运行只处理未完成的文章（离线）"""
+    print("\n=== 测试任务队列 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import io
+    import threading
+    import time
+    import bedrock_backend
+    import pipeline
+    from bedrock_backend import StubBackend, set_backend
+    from job_queue import JobQueue, make_job_id
+    
+    articles = [
+        {'title': f'Post {i}', 'link': f'https://aws.amazon.com/blogs/machine-learning/post-{i}/',
+         'author': 'AWS', 'pub_date': '2025-08-20T10:00:00',
+         'description': f'Amazon SageMaker feature number {i} with enough detail to summarize in the test.'}
+        for i in range(6)
+    ]
+    job_id = make_job_id('machine-learning', '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z')
+    calls = []
+    calls_lock = threading.Lock()
+    
+    def generate(model_id, body):
+        time.sleep(0.05)
+        prompt = json.dumps(body, ensure_ascii=False)
+        with calls_lock:
+            calls.append(next(a['title'] for a in articles if a['title'] in prompt))
+        return '队列摘要'
+    
+    previous = bedrock_backend._backend
+    try:
+        set_backend(StubBackend(generate))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'jobs.sqlite3')
+            queue = JobQueue(path)
+            if not pipeline.enqueue_job(queue, job_id, [dict(a) for a in articles], 'machine-learning',
+                                        '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z', dedup=False):
+                print("❌ 创建任务失败")
+                return False
+            if pipeline.enqueue_job(queue, job_id, [dict(a) for a in articles[:2]], 'machine-learning',
+                                    '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z', dedup=False):
+                print("❌ 重复创建同一任务应直接加入")
+                return False
+            
+            # 模拟崩溃：认领两篇，只完成第一篇后退出，租约过期前其他进程不会认领这两篇
+            crashed = JobQueue(path, lease_seconds=0.2)
+            claimed = crashed.claim(job_id, 'crashed', 2)
+            crashed.complete(job_id, claimed[0][0], '崩溃前完成的摘要')
+            crashed.close()
+            if [position for position, _ in queue.claim(job_id, 'probe', 10)] != [2, 3, 4, 5]:
+                print("❌ 租约有效期内的子任务被重复认领")
+                return False
+            queue.release(job_id, 'probe')
+            time.sleep(0.3)
+            print("✅ 认领的子任务在租约有效期内不会被其他进程认领")
+            
+            # 两个工作进程（各自打开队列文件）分担剩余文章，已完成的文章不再生成
+            processed = {}
+            
+            def work(worker):
+                worker_queue = JobQueue(path)
+                processed[worker] = pipeline.process_job(worker_queue, job_id, 'machine-learning',
+                                                         worker=worker, concurrency=1, poll_interval=0.05)
+                worker_queue.close()
+            
+            threads = [threading.Thread(target=work, args=(worker,)) for worker in ('a', 'b')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            if sorted(calls) != [f'Post {i}' for i in range(1, 6)] or sum(processed.values()) != 5:
+                print(f"❌ 恢复后应只处理未完成的 5 篇文章: {sorted(calls)}，{processed}")
+                return False
+            if min(processed.values()) == 0 or not queue.is_finished(job_id):
+                print(f"❌ 两个工作进程未分担任务: {processed}")
+                return False
+            print(f"✅ 崩溃遗留的子任务租约过期后被接手，两个进程分别完成 {processed['a']}/{processed['b']} 篇")
+            
+            buffer = io.StringIO()
+            writer = pipeline.write_job_report(buffer, queue, job_id)
+            report = buffer.getvalue()
+            positions = [report.index(f'Post {i}') for i in range(6)]
+            if writer.written != 6 or positions != sorted(positions) or report.count('队列摘要') != 5 \
+                    or '崩溃前完成的摘要' not in report:
+                print("❌ 任务报告渲染错误")
+                return False
+            print("✅ 按原顺序从队列渲染报告")
+            
+            # 多次认领仍未完成的子任务标记为 failed，报告中使用备用摘要
+            poison = JobQueue(path, lease_seconds=0.05, max_attempts=1)
+            poison.create_job('poison', 'machine-learning', '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z',
+                              [dict(articles[0])])
+            poison.claim('poison', 'crashed', 1)
+            time.sleep(0.1)
+            if poison.claim('poison', 'a', 1) or poison.progress('poison')['failed'] != 1:
+                print("❌ 超过最大认领次数的子任务应标记为 failed")
+                return False
+            buffer = io.StringIO()
+            pipeline.write_job_report(buffer, poison, 'poison')
+            if '本文介绍了 Post 0' not in buffer.getvalue():
+                print("❌ failed 子任务应使用备用摘要")
+                return False
+            poison.close()
+            queue.close()
+            print("✅ 反复失败的子任务标记为 failed，不再阻塞任务")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 任务队列测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+
+def test_prompt_caching():
+    """测试提示缓存：指令前缀作为带缓存点的系统提示，缓存读写 token 计入运行指标（离线）"""
+    print("\n=== 测试提示缓存 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    sys.path.insert(0, os.path.join(SCRIPT_DIR, 'benchmarks'))
+    import blog_analyzer
+    import bedrock_backend
+    from bedrock_backend import EndpointBackend, set_backend, stream_event_usage
+    from fake_backend import FakeBedrockBackend
+    from metrics import get_metrics
+    from stream_server import start_stream_server
+    
+    class RecordingBackend(FakeBedrockBackend):
+        """记录每次请求的请求体"""
+        def __init__(self):
+            super().__init__(latency=0, jitter=0)
+            self.bodies = []
+        
+        def invoke(self, model_id, body, timeout=30):
+            self.bodies.append((model_id, body))
+            return super().invoke(model_id, body, timeout)
+    
+    content = 'Amazon Bedrock now supports prompt caching for more models in additional regions. ' * 3
+    metrics = get_metrics()
+    previous = bedrock_backend._backend
+    server = None
+    try:
+        metrics.reset()
+        blog_analyzer.configure_rate_limits()
+        backend = RecordingBackend()
+        set_backend(backend)
+        for i in range(3):
+            blog_analyzer.invoke_bedrock_model(content, f'Post {i}', 'machine-learning')
+        systems = [body['system'] for _, body in backend.bodies]
+        prompts = [body['messages'][0]['content'] for _, body in backend.bodies]
+        if systems[0] != systems[2] or systems[0][-1].get('cache_control') != {'type': 'ephemeral'}:
+            print(f"❌ Claude 系统提示应相同并带缓存点: {systems[0]}")
+            return False
+        if not prompts[1].startswith('博客标题：Post 1') or '150-200字' in prompts[1]:
+            print(f"❌ 文章内容应只出现在用户消息中: {prompts[1][:40]!r}")
+            return False
+        
+        backend.bodies.clear()
+        blog_analyzer.invoke_nova_lite_fallback(content, 'Post 0', 'whats-new')
+        nova_system = backend.bodies[0][1]['system']
+        if nova_system[-1] != {'cachePoint': {'type': 'default'}} or 'Post 0' in nova_system[0]['text']:
+            print(f"❌ Nova 系统提示应以 cachePoint 结尾: {nova_system}")
+            return False
+        print("✅ 指令前缀作为系统提示并设置缓存点（Claude cache_control / Nova cachePoint），文章内容作为后缀")
+        
+        claude = {'model': blog_analyzer.CLAUDE_MODEL_ID}
+        cache_write = metrics.counter('bedrock_cache_write_tokens_total', claude)
+        cache_read = metrics.counter('bedrock_cache_read_tokens_total', claude)
+        if not cache_write or cache_read != 2 * cache_write or not metrics.counter('bedrock_output_tokens_total'):
+            print(f"❌ 缓存读写 token 计量错误: 写入 {cache_write}，读取 {cache_read}")
+            return False
+        if not 0 < metrics.snapshot()['prompt_cache_hit_rate'] < 1 \
+                or 'prompt_cache_hit_rate' not in metrics.to_prometheus():
+            print("❌ 缓存命中率未导出")
+            return False
+        print(f"✅ 首次请求写入缓存 {cache_write:g} token，之后命中读取，命中率 "
+              f"{metrics.snapshot()['prompt_cache_hit_rate']:.0%}")
+        
+        # 流式响应中的用量（Claude message_start/message_delta 事件）同样计入
+        if stream_event_usage({'amazon-bedrock-invocationMetrics': {'inputTokenCount': 5, 'cacheReadInputTokenCount': 7}}) \
+                != {'input_tokens': 5, 'cache_read_tokens': 7}:
+            print("❌ invocationMetrics 用量解析错误")
+            return False
+        server, base_url = start_stream_server(FakeBedrockBackend(latency=0, jitter=0))
+        set_backend(EndpointBackend(base_url))
+        metrics.reset()
+        for i in range(2):
+            blog_analyzer.invoke_claude(f'博客标题：Post {i}', system=blog_analyzer.SUMMARY_INSTRUCTIONS,
+                                        on_delta=lambda text: None)
+        if not metrics.counter('bedrock_cache_read_tokens_total') or not metrics.counter('bedrock_output_tokens_total'):
+            print("❌ 流式响应的缓存用量未计入")
+            return False
+        print("✅ 流式响应的缓存读写用量计入运行指标")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 提示缓存测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+        metrics.reset()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+def test_deadline_mode():
+    """测试限时运行：时间预算逐级降级（备用模型 → 原文摘录）、按时输出完整报告、文章数上限（离线）"""
+    print("\n=== 测试限时运行 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import io
+    import time
+    import blog_analyzer
+    import bedrock_backend
+    import pipeline
+    from bedrock_backend import StubBackend, set_backend
+    from deadline import EXTRACT, FALLBACK, Deadline, set_deadline
+    
+    now = [0.0]
+    deadline = Deadline(100, clock=lambda: now[0])
+    levels = []
+    for elapsed in (0, 85, 96):
+        now[0] = elapsed
+        levels.append(deadline.degrade_level())
+    if levels != [None, FALLBACK, EXTRACT] or deadline.timeout(30) != 0.5:
+        print(f"❌ 降级阶段错误: {levels}")
+        return False
+    now[0] = 80
+    if deadline.timeout(30) != 15:
+        print(f"❌ 请求超时应限制在截止前: {deadline.timeout(30)}")
+        return False
+    print("✅ 剩余 20% 时改用备用模型，只剩报告预留时间时改用原文摘录，请求超时不超过截止时间")
+    
+    def responder(model_id, body):
+        time.sleep(0.3 if model_id == blog_analyzer.CLAUDE_MODEL_ID else 0.15)
+        return 'Claude 摘要' if model_id == blog_analyzer.CLAUDE_MODEL_ID else 'Nova 摘要'
+    
+    articles = [
+        {'title': f'Post {i}', 'link': f'https://aws.amazon.com/blogs/machine-learning/post-{i}/',
+         'author': 'AWS', 'pub_date': f'2025-08-{20 - i:02d}T10:00:00',
+         'description': f'Amazon SageMaker feature number {i} with enough detail to summarize in the test.'}
+        for i in range(10)
+    ]
+    previous = bedrock_backend._backend
+    try:
+        set_backend(StubBackend(responder))
+        blog_analyzer.configure_rate_limits()
+        buffer = io.StringIO()
+        start = time.perf_counter()
+        set_deadline(Deadline(2.0, fallback_fraction=0.5, reserve=0.3))
+        writer = pipeline.write_report(buffer, [dict(a) for a in articles], 'machine-learning',
+                                       '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z', concurrency=1)
+        elapsed = time.perf_counter() - start
+        report = buffer.getvalue()
+        levels = [level for _, _, level in writer.degraded]
+        if writer.written != 10 or elapsed > 2.5 or writer.degraded[0][0] == 1:
+            print(f"❌ 未按时输出完整报告: {writer.written} 篇，{elapsed:.2f}s")
+            return False
+        if FALLBACK not in levels or levels[-1] != EXTRACT or levels != sorted(levels, key=[FALLBACK, EXTRACT].index):
+            print(f"❌ 降级顺序错误: {levels}")
+            return False
+        if '## 降级条目' not in report or '本条为原文摘录' not in report or 'Claude 摘要' not in report:
+            print("❌ 报告未标注降级条目")
+            return False
+        print(f"✅ {elapsed:.2f}s 内输出 10 篇，最新的 {10 - len(levels)} 篇使用主模型，"
+              f"{levels.count(FALLBACK)} 篇备用模型、{levels.count(EXTRACT)} 篇原文摘录并在报告中列出")
+        
+        set_deadline(None)
+        set_backend(StubBackend(lambda model_id, body: '完整摘要'))
+        buffer = io.StringIO()
+        shuffled = [dict(articles[i]) for i in (5, 0, 7, 2, 1)]
+        writer = pipeline.write_report(buffer, shuffled, 'machine-learning', '2025-08-17T00:00:00Z',
+                                       '2025-08-23T23:59:59Z', concurrency=2, max_articles=3)
+        report = buffer.getvalue()
+        titles = [line.split('. ', 1)[1] for line in report.splitlines() if line.startswith('### ')]
+        if titles != ['Post 0', 'Post 2', 'Post 1'] or '只包含最新的 3 篇，另有 2 篇未包含' not in report:
+            print(f"❌ 文章数上限应保留最新的文章: {titles}")
+            return False
+        print("✅ --max-articles 保留发布时间最新的文章（保持原顺序）")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 限时运行测试出错: {e}")
+        return False
+    finally:
+        set_deadline(None)
+        set_backend(previous)
+
+def test_model_router():
+    """测试模型路由：按处理方式和内容长度选择首选模型、延迟/错误率调整、每个模型的成本统计（离线）"""
+    print("\n=== 测试模型路由 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import blog_analyzer
+    import bedrock_backend
+    from bedrock_backend import StubBackend, set_backend
+    from metrics import get_metrics
+    from model_router import MIN_SAMPLES, POLICIES, ModelProfile, ModelRouter
+    from rate_limiter import ERROR, SUCCESS
+    
+    claude, nova = blog_analyzer.CLAUDE_MODEL_ID, blog_analyzer.NOVA_LITE_MODEL_ID
+    router = ModelRouter(claude, nova, blog_analyzer.MODEL_PROFILES, POLICIES['balanced'])
+    if router.route('translate', 120) != [nova, claude] or router.route('translate', 800) != [claude, nova] \
+            or router.route('summary', 50) != [claude, nova]:
+        print("❌ balanced 策略应只让较短的翻译先用 Nova Lite")
+        return False
+    if ModelRouter(claude, nova, {}, POLICIES['quality']).route('translate', 10)[0] != claude \
+            or ModelRouter(claude, nova, {}, POLICIES['cost']).route('summary', 5000)[0] != nova:
+        print("❌ quality/cost 策略的首选模型错误")
+        return False
+    print("✅ 较短的翻译条目先用 Nova Lite，长篇摘要先用 Claude；quality/cost 策略分别固定首选模型")
+    
+    for _ in range(MIN_SAMPLES):
+        router.record(claude, 4.0, SUCCESS)
+        router.record(nova, 0.5, SUCCESS)
+    if router.route('translate', 800) != [nova, claude] or router.route('summary', 800)[0] != claude:
+        print("❌ Claude 明显较慢时较长的翻译应改用 Nova Lite，摘要不受影响")
+        return False
+    for _ in range(MIN_SAMPLES):
+        router.record(nova, 0.1, ERROR)
+    if router.route('translate', 120)[0] != claude:
+        print("❌ Nova Lite 错误率过高时应先用 Claude")
+        return False
+    print("✅ Claude 平均延迟超过 3 倍时较长的翻译也先用 Nova Lite，Nova Lite 错误率过高时改回 Claude")
+    
+    profile = ModelProfile('test', 0.001, 0.002, cache_read_price=0.0001)
+    if abs(profile.cost({'input_tokens': 1000, 'output_tokens': 500, 'cache_read_tokens': 2000}) - 0.0022) > 1e-12:
+        print("❌ 成本估算错误")
+        return False
+    
+    calls = []
+    def responder(model_id, body):
+        calls.append(model_id)
+        return 'Claude 生成' if model_id == claude else 'Nova 生成'
+    
+    metrics = get_metrics()
+    previous = bedrock_backend._backend
+    try:
+        metrics.reset()
+        blog_analyzer.configure_rate_limits()
+        blog_analyzer.configure_routing('balanced')
+        set_backend(StubBackend(responder))
+        short = blog_analyzer.generate_uncached_summary(
+            'Amazon S3 update', 'Amazon S3 now supports a new feature in more regions. ' * 3, 'whats-new', 'l1')
+        long = blog_analyzer.generate_uncached_summary(
+            'SageMaker deep dive', 'Amazon SageMaker walkthrough with details. ' * 200, 'machine-learning', 'l2')
+        if calls != [nova, claude] or short != 'Nova 生成' or long != 'Claude 生成':
+            print(f"❌ 文章未按路由调用模型: {calls}")
+            return False
+        if metrics.counter('fallbacks_total'):
+            print("❌ 路由首选模型成功不应计为备用")
+            return False
+        nova_cost = metrics.counter('bedrock_cost_usd_total', {'model': nova})
+        claude_cost = metrics.counter('bedrock_cost_usd_total', {'model': claude})
+        if not 0 < nova_cost < claude_cost or 'bedrock_cost_usd_total{model=' not in metrics.to_prometheus():
+            print(f"❌ 每个模型的成本未计入: Nova {nova_cost}，Claude {claude_cost}")
+            return False
+        stats = blog_analyzer.get_model_router().stats()
+        if stats[nova]['requests'] != 1 or stats[claude]['requests'] != 1:
+            print(f"❌ 实时统计错误: {stats}")
+            return False
+        print(f"✅ What's New 短条目由 Nova Lite 翻译，长篇摘要由 Claude 生成，"
+              f"估算成本 Nova ${nova_cost:.6f} / Claude ${claude_cost:.6f}")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 模型路由测试出错: {e}")
+        return False
+    finally:
+        set_backend(previous)
+        blog_analyzer.configure_routing()
+        metrics.reset()
+
+def test_extractive_summarizer():
+    """测试本地抽取式摘要：TextRank 选句、模型全部失败时的最后一级备用、--offline 不调用模型（离线）"""
+    print("\n=== 测试本地抽取式摘要 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import io
+    import tempfile
+    import time
+    import blog_analyzer
+    import bedrock_backend
+    import extractive_summarizer
+    import pipeline
+    from bedrock_backend import StubBackend, set_backend
+    from content_extractor import estimate_tokens
+    from metrics import get_metrics
+    from summary_cache import SummaryCache
+    
+    title = 'Amazon Bedrock Knowledge Bases supports hybrid search'
+    content = (
+        '<p>In this post, we show you how to build a RAG application.</p>'
+        '<p>Amazon Bedrock Knowledge Bases now supports hybrid search that combines semantic and keyword retrieval. '
+        'Hybrid search improves retrieval accuracy for queries that include product codes and names. '
+        'Pricing is unchanged and the feature is available in all commercial regions.</p>'
+        '<h2>Getting started</h2>'
+        '<p>We walk through an example using customer support tickets where error codes matter. '
+        'Results show a 20% improvement in retrieval accuracy for hybrid search over semantic search alone. '
+        'To learn more, visit the documentation.</p>'
+    )
+    text = blog_analyzer.extract_text(content, 600, title)
+    start = time.perf_counter()
+    summary = extractive_summarizer.summarize(text, title, use_numpy=False)
+    elapsed = (time.perf_counter() - start) * 1000
+    sentences = extractive_summarizer.split_sentences(text)
+    chosen = [s for s in sentences if s in summary]
+    if not summary.startswith('Amazon Bedrock Knowledge Bases now supports hybrid search') \
+            or 'In this post' in summary or 'To learn more' in summary or 'Getting started' in summary:
+        print(f"❌ 应选出与主题相关的句子并跳过引导语/小标题: {summary}")
+        return False
+    if len(chosen) > 3 or estimate_tokens(summary) > 120 or chosen != sorted(chosen, key=sentences.index):
+        print(f"❌ 摘要应在预算内按原顺序输出: {chosen}")
+        return False
+    if extractive_summarizer.np is not None:
+        numpy_scores = extractive_summarizer.rank_sentences(sentences, title, use_numpy=True)
+        python_scores = extractive_summarizer.rank_sentences(sentences, title, use_numpy=False)
+        if max(abs(a - b) for a, b in zip(numpy_scores, python_scores)) > 1e-9:
+            print("❌ numpy 与纯 Python 实现的得分不一致")
+            return False
+    print(f"✅ TextRank 选出 {len(chosen)} 句关键句（{elapsed:.1f}ms，"
+          f"{'numpy' if extractive_summarizer.np is not None else '纯 Python'}），跳过引导语并保持原顺序")
+    
+    calls = []
+    def failing(model_id, body):
+        calls.append(model_id)
+        raise blog_analyzer.ModelInvocationError('AccessDenied')
+    
+    metrics = get_metrics()
+    previous = bedrock_backend._backend
+    try:
+        metrics.reset()
+        blog_analyzer.configure_rate_limits()
+        blog_analyzer.configure_routing()
+        set_backend(StubBackend(failing))
+        summary = blog_analyzer.generate_chinese_summary(title, content, 'machine-learning')
+        if 'hybrid search' not in summary or metrics.counter('fallbacks_total', {'model': 'extractive'}) != 1:
+            print(f"❌ 模型全部失败时应使用抽取式摘要: {summary}")
+            return False
+        print("✅ 模型全部失败时使用抽取式摘要代替模板句")
+        
+        articles = [
+            {'title': title, 'link': 'https://aws.amazon.com/blogs/machine-learning/hybrid/', 'author': 'AWS',
+             'pub_date': '2025-08-20T10:00:00', 'description': content, 'feed': 'machine-learning'},
+            {'title': 'Amazon S3 adds a feature', 'link': 'https://aws.amazon.com/about-aws/whats-new/s3/',
+             'author': 'AWS', 'pub_date': '2025-08-19T10:00:00', 'feed': 'whats-new',
+             'description': 'Amazon S3 now supports conditional writes in all regions. This helps avoid overwrites.'},
+            {'title': 'Amazon EC2 adds a feature', 'link': 'https://aws.amazon.com/about-aws/whats-new/ec2/',
+             'author': 'AWS', 'pub_date': '2025-08-18T10:00:00', 'feed': 'whats-new',
+             'description': 'Amazon EC2 now offers new instance types for memory intensive workloads in more regions.'}
+        ]
+        calls.clear()
+        blog_analyzer.set_offline(True)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = SummaryCache(os.path.join(tmp_dir, 'cache.sqlite3'))
+            ec2 = blog_analyzer.clean_article_content(articles[2]['description'], articles[2]['title'], 'whats-new')
+            cache.put(articles[2]['link'], ec2, blog_analyzer.CLAUDE_MODEL_ID, 'translate', '缓存的 EC2 翻译')
+            buffer = io.StringIO()
+            start = time.perf_counter()
+            writer = pipeline.write_report(buffer, [dict(a) for a in articles], 'machine-learning,whats-new',
+                                           '2025-08-17T00:00:00Z', '2025-08-23T23:59:59Z', cache=cache)
+            elapsed = time.perf_counter() - start
+            report = buffer.getvalue()
+            stored = cache.get(articles[1]['link'], blog_analyzer.clean_article_content(
+                articles[1]['description'], articles[1]['title'], 'whats-new'),
+                [blog_analyzer.CLAUDE_MODEL_ID, blog_analyzer.NOVA_LITE_MODEL_ID], 'translate')
+            cache.close()
+        if calls or writer.written != 3 or '离线模式' not in report or stored:
+            print(f"❌ 离线模式不应调用模型或缓存抽取结果: 调用 {len(calls)} 次")
+            return False
+        if '缓存的 EC2 翻译' not in report or 'conditional writes' not in report or 'hybrid search' not in report:
+            print("❌ 离线报告应使用缓存的摘要，其余为抽取式摘要")
+            return False
+        print(f"✅ --offline 在 {elapsed * 1000:.0f}ms 内输出报告：未调用模型，缓存命中的条目使用缓存摘要")
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 本地抽取式摘要测试出错: {e}")
+        return False
+    finally:
+        blog_analyzer.set_offline(False)
+        set_backend(previous)
+        metrics.reset()
+
+def test_translation_memory():
+    """测试句段级翻译记忆：区域/服务名称归一化、只翻译未命中的句段、命中率统计（离线）"""
+    print("\n=== 测试翻译记忆 ===")
+    
+    sys.path.insert(0, SCRIPT_DIR)
+    import re
+    import tempfile
+    import blog_analyzer
+    import bedrock_backend
+    from bedrock_backend import StubBackend, request_prompt, set_backend
+    from metrics import get_metrics
+    from translation_memory import (
+        TranslationMemory, fill_placeholders, normalize_segment, set_translation_memory
+    )
+    
+    tokyo, _ = normalize_segment('Amazon EC2 R8g instances are now available in the Asia Pacific (Tokyo) Region.')
+    ireland, names = normalize_segment('Amazon EC2  M7i instances are now available in the Europe (Ireland) Region.')
+    if tokyo != ireland or names != ['Europe (Ireland)', 'Amazon EC2 M7i']:
+        print(f"❌ 区域/服务名称归一化错误: {tokyo!r} / {ireland!r} {names}")
+        return False
+    if fill_placeholders('<S2> 实例现已在 <R1> 区域推出。', names) != 'Amazon EC2 M7i 实例现已在 Europe (Ireland) 区域推出。':
+        print("❌ 占位符填回错误")
+        return False
+    print(f"✅ 只有区域/服务名称不同的句子归一化为同一模板: {tokyo}")
+    
+    requests = []
+    def responder(model_id, body):
+        prompt = request_prompt(body)
+        if body['system'][0]['text'] != blog_analyzer.SEGMENT_TRANSLATE_INSTRUCTIONS:
+            requests.append(('whole', prompt))
+            return '整条翻译'
+        items = re.findall(r'^\[(\d+)\] (.*)$', prompt, re.MULTILINE)
+        requests.append(('segments', [template for _, template in items]))
+        # 模拟模型丢失占位符的句段不应写入翻译记忆
+        return json.dumps({item_id: '译文缺少占位符' if 'Graviton' in template else f'译：{template}'
+                           for item_id, template in items}, ensure_ascii=False)
+    
+    def article(name, description):
+        return {'title': name, 'link': f'https://aws.amazon.com/about-aws/whats-new/2025/08/{name}/',
+                'author': 'AWS', 'pub_date': '2025-08-20T10:00:00', 'description': description}
+    
+    learn_more = 'To learn more, visit the Amazon EC2 documentation.'
+    first = [
+        article('r8g', 'Amazon EC2 R8g instances are now available in the Asia Pacific (Tokyo) Region. ' + learn_more),
+        article('m7i', 'Amazon EC2 M7i instances are now available in the Europe (Ireland) Region. ' + learn_more),
+        article('graviton', 'Amazon EC2 now supports Graviton based instances for the new workload type. ' + learn_more)
+    ]
+    second = [
+        article('c8g', 'Amazon EC2 C8g instances are now available in the US East (Ohio) Region. ' + learn_more),
+        article('r8g-2', 'Amazon EC2 R8g instances are now available in the Asia Pacific (Tokyo) Region. ' + learn_more)
+    ]
+    metrics = get_metrics()
+    previous = bedrock_backend._backend
+    memory = None
+    try:
+        metrics.reset()
+        blog_analyzer.configure_rate_limits()
+        blog_analyzer.configure_routing()
+        set_backend(StubBackend(responder))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            memory = TranslationMemory(os.path.join(tmp_dir, 'tm.sqlite3'))
+            set_translation_memory(memory)
+            results = blog_analyzer.translate_articles(first, 'whats-new')
+            segment_requests = [r for kind, r in requests if kind == 'segments']
+            if len(segment_requests) != 1 or len(segment_requests[0]) != 3:
+                print(f"❌ 未命中的句段应去重后合并为一次请求: {segment_requests}")
+                return False
+            if results[1] != '译：Amazon EC2 M7i instances are now available in the Europe (Ireland) Region.' \
+                                '译：To learn more, visit the Amazon EC2 documentation.':
+                print(f"❌ 句段译文拼接错误: {results[1]}")
+                return False
+            if results[2] != '整条翻译' or memory.stats()['writes'] != 2:
+                print(f"❌ 占位符不完整的译文不应写入，条目应整条翻译: {results[2]}")
+                return False
+            print("✅ 3 篇条目的 6 个未命中句段去重为 3 句一次请求，占位符不完整的句段改为整条翻译")
+            
+            requests.clear()
+            results = blog_analyzer.translate_articles(second, 'whats-new')
+            if requests or 'US East (Ohio)' not in results[0] or 'Amazon EC2 C8g' not in results[0]:
+                print(f"❌ 已记忆的句段不应再调用模型: {requests}")
+                return False
+            stats = memory.stats()
+            hit_rate = metrics.translation_memory_hit_rate()
+            if stats['exact_hits'] != 3 or stats['normalized_hits'] != 1 or not 0 < hit_rate < 1 \
+                    or 'translation_memory_hit_rate' not in metrics.to_prometheus() \
+                    or metrics.counter('translation_memory_articles_total', {'source': 'memory'}) != 2:
+                print(f"❌ 命中统计错误: {stats}")
+                return False
+            print(f"✅ 新条目只有区域/型号不同时归一化命中，不再调用模型；句段命中率 {hit_rate:.0%}")
+            memory.close()
+            memory = None
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ 翻译记忆测试出错: {e}")
+        return False
+    finally:
+        set_translation_memory(None)
+        if memory is not None:
+            memory.close()
+        set_backend(previous)
+        metrics.reset()
+
 def main():
     """主测试函数"""
     print("AWS Blog RSS 系统测试")
@@ -192,7 +2043,32 @@ def main():
         ("RSS 解析器", test_rss_parser),
         ("博客分析器", test_blog_analyzer),
         ("What's New 翻译", test_whats_new_translation),
-        ("Agent 配置", test_agent_config)
+        ("Agent 配置", test_agent_config),
+        ("摘要缓存", test_summary_cache),
+        ("报告渲染", test_report_rendering),
+        ("并发调度", test_concurrent_scheduler),
+        ("模型调用后端", test_stub_backend),
+        ("RSS HTTP 缓存", test_http_cache),
+        ("多 feed 并发获取", test_multi_feed_fetch),
+        ("增量解析", test_streaming_parse),
+        ("日期解析", test_date_parsing),
+        ("进程内流水线", test_pipeline),
+        ("文章归档", test_article_archive),
+        ("批量翻译", test_batch_translation),
+        ("基准测试工具", test_benchmark_harness),
+        ("运行指标", test_metrics_export),
+        ("限流熔断", test_throttling_control),
+        ("正文提取", test_content_extractor),
+        ("近似重复检测", test_near_duplicates),
+        ("监视模式", test_watch_mode),
+        ("流式摘要", test_streaming_summaries),
+        ("趋势分析", test_trend_analytics),
+        ("任务队列", test_job_queue),
+        ("提示缓存", test_prompt_caching),
+        ("限时运行", test_deadline_mode),
+        ("模型路由", test_model_router),
+        ("本地抽取式摘要", test_extractive_summarizer),
+        ("翻译记忆", test_translation_memory)
     ]
     
     results = {}
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+What's New 句段级翻译记忆
+把清理后的 description 按句切分，每句中的区域名称（如 Asia Pacific (Tokyo)、us-east-1）和服务名称
+（如 Amazon EC2）替换为占位符后作为句段模板，以模板为键保存译文模板：
+- 与已翻译的句子完全相同时精确命中，只有区域/服务名称不同时归一化命中，直接在本地填回名称
+- 只有未命中的句段发给模型翻译，译文中的占位符与原文一致时写入翻译记忆
+基于 SQLite 持久化，按条目数淘汰最久未使用的句段，并记录命中率
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from analytics import extract_terms
+from extractive_summarizer import split_sentences
+from summary_cache import get_cache_dir
+
+EXACT = 'exact'
+NORMALIZED = 'normalized'
+MISS = 'miss'
+
+DEFAULT_MAX_ENTRIES = 50000
+
+# 区域显示名称（如 US East (N. Virginia)、AWS GovCloud (US-West)）和区域代码（如 ap-northeast-1）
+REGION_NAME = re.compile(
+    r'\b(?:US East|US West|Asia Pacific|Europe|Canada(?: West)?|South America|Middle East|Africa|Israel|'
+    r'Mexico|AWS GovCloud|China)\s*\([^()]{2,40}\)'
+)
+REGION_CODE = re.compile(
+    r'\b(?:us|eu|ap|sa|ca|me|af|il|mx|cn)(?:-gov|-iso[a-z]?)?-'
+    r'(?:east|west|north|south|central|northeast|northwest|southeast|southwest)-\d\b'
+)
+# 占位符：R 为区域，S 为服务，数字为名称的编号（先区域后服务，同一名称多次出现时编号相同）
+PLACEHOLDER = re.compile(r'<([RS])(\d+)>')
+WHITESPACE = re.compile(r'\s+')
+
+
+def split_segments(text: str) -> List[str]:
+    """把正文切分为句段（与抽取式摘要相同的分句规则）"""
+    return split_sentences(text)
+
+
+def normalize_segment(segment: str) -> Tuple[str, List[str]]:
+    """返回 (句段模板, 按占位符编号排列的名称)：合并空白，区域和服务名称替换为占位符"""
+    text = WHITESPACE.sub(' ', segment).strip()
+    names: List[str] = []
+
+    def placeholder(kind: str, name: str) -> str:
+        if name not in names:
+            names.append(name)
+        return f'<{kind}{names.index(name) + 1}>'
+
+    text = REGION_NAME.sub(lambda m: placeholder('R', m.group()), text)
+    text = REGION_CODE.sub(lambda m: placeholder('R', m.group()), text)
+    # 较长的服务名称先替换（Amazon EC2 Auto Scaling 优先于 Amazon EC2）
+    for service in sorted(set(extract_terms(text, 'services')), key=len, reverse=True):
+        text = re.sub(r'(?<![\w<])' + re.escape(service) + r'(?![\w>])',
+                      lambda m: placeholder('S', m.group()), text)
+    return text, names
+
+
+def fill_placeholders(template: str, names: List[str]) -> str:
+    """把译文模板中的占位符替换回名称"""
+    return PLACEHOLDER.sub(lambda m: names[int(m.group(2)) - 1]
+                           if int(m.group(2)) <= len(names) else m.group(), template)
+
+
+def placeholders_match(source: str, translation: str) -> bool:
+    """译文模板中的占位符与句段模板中的完全一致（模型没有丢失或编造占位符）"""
+    return sorted(PLACEHOLDER.findall(source)) == sorted(PLACEHOLDER.findall(translation))
+
+
+class TranslationMemory:
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if path is None:
+            path = os.path.join(get_cache_dir(), 'translation_memory.sqlite3')
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.exact_hits = 0
+        self.normalized_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        # 连接允许跨线程使用，所有访问由锁串行化
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS segments (
+                source TEXT PRIMARY KEY,
+                example TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                model_id TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_segments_accessed ON segments (accessed_at)")
+        self._conn.commit()
+
+    def lookup(self, segment: str) -> Tuple[Optional[str], str]:
+        """查询句段的译文，返回 (译文, EXACT/NORMALIZED/MISS)，未命中时译文为 None"""
+        template, names = normalize_segment(segment)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT example, translation FROM segments WHERE source = ?", (template,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, MISS
+            self._conn.execute(
+                "UPDATE segments SET hits = hits + 1, accessed_at = ? WHERE source = ?", (time.time(), template)
+            )
+            self._conn.commit()
+            example, translation = row
+            if example == WHITESPACE.sub(' ', segment).strip():
+                self.exact_hits += 1
+                return fill_placeholders(translation, names), EXACT
+            self.normalized_hits += 1
+            return fill_placeholders(translation, names), NORMALIZED
+
+    def add(self, segment: str, translation: str, model_id: str) -> bool:
+        """保存句段模板的译文模板（translation 中的名称以占位符表示）；占位符不一致时不保存并返回 False"""
+        template, _ = normalize_segment(segment)
+        translation = translation.strip()
+        if not translation or not placeholders_match(template, translation):
+            return False
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO segments (source, example, translation, model_id, hits, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, 0, ?, ?)",
+                (template, WHITESPACE.sub(' ', segment).strip(), translation, model_id, now, now)
+            )
+            self.writes += 1
+            if self.max_entries > 0:
+                # 超出上限时删除最久未使用的句段（LRU）
+                self._conn.execute("""
+                    DELETE FROM segments WHERE source IN (
+                        SELECT source FROM segments ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+            self._conn.commit()
+        return True
+
+    def stats(self) -> Dict:
+        """返回命中统计"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        hits = self.exact_hits + self.normalized_hits
+        lookups = hits + self.misses
+        return {
+            'exact_hits': self.exact_hits,
+            'normalized_hits': self.normalized_hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'entries': entries,
+            'hit_rate': (hits / lookups) if lookups else 0.0
+        }
+
+    def print_stats(self):
+        """输出翻译记忆统计到 stderr"""
+        stats = self.stats()
+        print(f"翻译记忆: 精确命中 {stats['exact_hits']}，归一化命中 {stats['normalized_hits']}，"
+              f"未命中 {stats['misses']}，句段命中率 {stats['hit_rate']:.0%}，新增 {stats['writes']}，"
+              f"句段条目 {stats['entries']}", file=sys.stderr)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def set_translation_memory(memory: Optional[TranslationMemory]):
+    """设置进程内共享的翻译记忆（None 表示不使用）"""
+    global _memory
+    with _memory_lock:
+        _memory = memory
+
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    with _memory_lock:
+        return _memory
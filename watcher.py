@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+AWS Blog 监视模式
+常驻进程按每个 feed 的发布节奏（以及 ttl / sy:updatePeriod 提示）自适应轮询，按 feed 记录水位
+（最新发布时间和该时间的 GUID），只为新出现的文章生成摘要并追加到滚动报告；
+模型调用随文章发布分散到全天，而不是在需要周报时集中调用上百次
+
+用法:
+    python3 watcher.py                                   # 监视全部 feed，报告写入 aws-blog-watch-YYYY-MM-DD.md
+    python3 watcher.py aws,machine-learning --report watch.md --since 2025-08-20T00:00:00Z
+    python3 watcher.py whats-new --once                  # 轮询一次后退出（适合 cron）
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from statistics import median
+from typing import Dict, List, Optional
+
+from date_utils import parse_iso_datetime
+from summary_cache import get_cache_dir
+
+# 轮询间隔上下限（秒）
+DEFAULT_MIN_INTERVAL = 5 * 60
+DEFAULT_MAX_INTERVAL = 6 * 3600
+# 发布记录不足以估计节奏时的轮询间隔
+DEFAULT_INTERVAL = 30 * 60
+# 每个发布间隔内轮询的次数（新文章平均在发布后 1/4 个发布间隔内被发现）
+POLLS_PER_POST = 2
+# 连续没有新文章时每次把间隔放大的倍数（周末、节假日等发布稀疏的时段少轮询）
+IDLE_BACKOFF = 1.5
+# 间隔随机抖动比例，避免多个 feed 总在同一时刻轮询
+JITTER = 0.1
+# 估计发布节奏时保留的最近发布时间数
+CADENCE_WINDOW = 20
+
+DEFAULT_REPORT = 'aws-blog-watch-%Y-%m-%d.md'
+
+# sy:updatePeriod 对应的秒数
+UPDATE_PERIOD_SECONDS = {
+    'hourly': 3600,
+    'daily': 86400,
+    'weekly': 7 * 86400,
+    'monthly': 30 * 86400,
+    'yearly': 365 * 86400
+}
+
+
+def hint_min_interval(hints: Dict) -> float:
+    """由 ttl（分钟）和 sy:updatePeriod / sy:updateFrequency 得到 feed 要求的最短轮询间隔（秒），无提示时为 0"""
+    floor = 0.0
+    try:
+        floor = max(floor, float(hints.get('ttl')) * 60)
+    except (TypeError, ValueError):
+        pass
+    period = UPDATE_PERIOD_SECONDS.get((hints.get('update_period') or '').strip().lower())
+    if period:
+        try:
+            frequency = max(1, int(hints.get('update_frequency') or 1))
+        except ValueError:
+            frequency = 1
+        floor = max(floor, period / frequency)
+    return floor
+
+
+def cadence_interval(pub_dates: List[str]) -> Optional[float]:
+    """按最近发布时间的中位间隔估计轮询间隔（秒），发布记录不足时返回 None"""
+    dates = sorted(datetime.fromisoformat(d) for d in pub_dates)
+    gaps = [(b - a).total_seconds() for a, b in zip(dates, dates[1:]) if b > a]
+    if len(gaps) < 2:
+        return None
+    return median(gaps) / POLLS_PER_POST
+
+
+def next_interval(feed_state: Dict, min_interval: float = DEFAULT_MIN_INTERVAL,
+                  max_interval: float = DEFAULT_MAX_INTERVAL) -> float:
+    """计算 feed 的下次轮询间隔（秒，不含抖动）
+
+    以发布节奏为基础，连续空轮询时逐次放大，限制在 [min_interval, max_interval] 内；
+    feed 的 ttl / updatePeriod 提示优先于上限。
+    """
+    interval = cadence_interval(feed_state.get('recent', [])) or DEFAULT_INTERVAL
+    interval *= IDLE_BACKOFF ** min(feed_state.get('idle_polls', 0), 20)
+    interval = min(max(interval, min_interval), max_interval)
+    return max(interval, hint_min_interval(feed_state.get('hints', {})))
+
+
+def select_new_articles(articles: List[Dict], feed_state: Dict) -> List[Dict]:
+    """返回水位之后的文章：发布时间晚于水位，或等于水位但 GUID 未出现过"""
+    watermark = feed_state.get('watermark')
+    if watermark is None:
+        return list(articles)
+    seen = set(feed_state.get('watermark_ids', []))
+    return [a for a in articles
+            if a['pub_date'] > watermark or (a['pub_date'] == watermark and _article_id(a) not in seen)]
+
+
+def advance_watermark(feed_state: Dict, articles: List[Dict]):
+    """把水位推进到 articles 中最新的发布时间，记录该时间所有文章的 GUID"""
+    watermark = feed_state.get('watermark')
+    ids = set(feed_state.get('watermark_ids', []))
+    for article in articles:
+        if watermark is None or article['pub_date'] > watermark:
+            watermark = article['pub_date']
+            ids = set()
+        if article['pub_date'] == watermark:
+            ids.add(_article_id(article))
+    feed_state['watermark'] = watermark
+    feed_state['watermark_ids'] = sorted(ids)
+
+
+def _article_id(article: Dict) -> str:
+    return article.get('guid') or article['link']
+
+
+class WatchState:
+    """持久化的监视状态（JSON 文件）：每个 feed 的水位、发布记录、轮询提示和下次轮询时间"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(get_cache_dir(), 'watch_state.json')
+        self.data = {'feeds': {}, 'reports': {}}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                self.data.update(loaded)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"监视状态文件无法读取，重新开始: {e}", file=sys.stderr)
+
+    def feed(self, url: str) -> Dict:
+        return self.data['feeds'].setdefault(url, {})
+
+    def save(self):
+        """先写临时文件再替换，进程被终止时不会留下半个状态文件"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.watch-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class RollingReport:
+    """按日期滚动的 Markdown 报告：路径可包含 strftime 格式，新文件先写头部，之后只追加条目"""
+
+    def __init__(self, pattern: str, state: WatchState):
+        self.pattern = pattern
+        self.state = state
+
+    def append(self, articles: List[Dict], now: Optional[datetime] = None) -> str:
+        """追加已生成摘要的文章，返回报告路径"""
+        from report_writer import MarkdownReportWriter
+
+        now = now or datetime.now()
+        path = now.strftime(self.pattern)
+        counts = self.state.data.setdefault('reports', {})
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', encoding='utf-8') as stream:
+            if new_file:
+                counts[path] = 0
+                stream.write(f"# AWS 博客实时摘要\n\n"
+                             f"**报告日期**: {now.strftime('%Y年%m月%d日')}\n"
+                             f"**说明**: 监视模式滚动报告，新文章发布后追加\n\n"
+                             f"## 博客文章列表\n\n")
+            writer = MarkdownReportWriter(stream, 'all', '', '')
+            for article in articles:
+                counts[path] = counts.get(path, 0) + 1
+                writer.write_article(counts[path], article)
+        return path
+
+
+class FeedWatcher:
+    def __init__(self, parser, url_types: Dict[str, List[str]], state: WatchState, report: RollingReport,
+                 cache=None, concurrency: int = 2, since: Optional[datetime] = None,
+                 min_interval: float = DEFAULT_MIN_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                 seed: Optional[int] = None):
+        """url_types 为 {feed URL: [博客类型, ...]}；since 为首次轮询时视为新文章的起始时间（UTC），
+        为 None 时首次轮询只建立水位，不为 feed 中已有的文章生成摘要
+        """
+        self.parser = parser
+        self.url_types = url_types
+        self.state = state
+        self.report = report
+        self.cache = cache
+        self.concurrency = concurrency
+        self.since = since
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._rng = random.Random(seed)
+        self._stop = threading.Event()
+
+    def due_feeds(self, now: float) -> List[str]:
+        """返回已到轮询时间的 feed URL"""
+        return [url for url in self.url_types if self.state.feed(url).get('next_poll', 0) <= now]
+
+    def seconds_until_next(self, now: float) -> float:
+        return max(0.0, min(self.state.feed(url).get('next_poll', 0) for url in self.url_types) - now)
+
+    def fetch_new(self, url: str) -> List[Dict]:
+        """轮询单个 feed，返回水位之后的新文章（标记来源 feed），并更新发布记录和轮询提示"""
+        feed_state = self.state.feed(url)
+        first_poll = feed_state.get('watermark') is None
+        # 首次轮询读取整个 feed 以估计发布节奏；之后只解析到水位为止（提前停止）
+        floor = datetime.min if first_poll else datetime.fromisoformat(feed_state['watermark'])
+        hints = {}
+        articles = list(self.parser.iter_rss_items(self.parser.iter_feed_chunks(url), floor,
+                                                   datetime.max, hints=hints))
+        if self.parser.archive is not None and articles:
+            self.parser.archive.add_articles(url, articles)
+
+        new_articles = select_new_articles(articles, feed_state)
+        if first_poll:
+            since = self.since.isoformat() if self.since else None
+            new_articles = [a for a in new_articles if since is not None and a['pub_date'] >= since]
+
+        feed_state['hints'] = hints
+        recent = set(feed_state.get('recent', [])) | {a['pub_date'] for a in articles}
+        feed_state['recent'] = sorted(recent)[-CADENCE_WINDOW:]
+        advance_watermark(feed_state, articles)
+        for article in new_articles:
+            article['feed'] = self.url_types[url][0]
+        return new_articles
+
+    def poll(self, urls: List[str], now: Optional[float] = None) -> List[Dict]:
+        """轮询指定 feed，为新文章生成摘要并追加到滚动报告，返回新文章"""
+        import pipeline
+        from metrics import get_metrics
+
+        now = time.time() if now is None else now
+        metrics = get_metrics()
+        new_articles = []
+        for url in urls:
+            feed_state = self.state.feed(url)
+            try:
+                found = self.fetch_new(url)
+            except Exception as e:
+                print(f"{self.url_types[url][0]}: 轮询失败: {e}", file=sys.stderr)
+                found = []
+            metrics.increment('watch_polls_total', labels={'feed': self.url_types[url][0]})
+            feed_state['idle_polls'] = 0 if found else feed_state.get('idle_polls', 0) + 1
+            interval = next_interval(feed_state, self.min_interval, self.max_interval)
+            interval *= 1 + self._rng.uniform(-JITTER, JITTER)
+            feed_state['last_poll'] = now
+            feed_state['next_poll'] = now + interval
+            new_articles.extend(found)
+
+        if new_articles:
+            # 滚动报告按发布时间顺序追加
+            new_articles.sort(key=lambda a: a['pub_date'])
+            articles = pipeline.collapse_duplicates(new_articles, 'all')
+            print(f"发现 {len(new_articles)} 篇新文章，正在生成摘要...", file=sys.stderr)
+            pipeline.summarize_articles(articles, 'all', self.cache, self.concurrency)
+            path = self.report.append(articles)
+            metrics.increment('watch_new_articles_total', len(new_articles))
+            print(f"已追加 {len(articles)} 篇到 {path}", file=sys.stderr)
+        self.state.save()
+        return new_articles
+
+    def run(self, cycles: Optional[int] = None, on_cycle=None):
+        """持续轮询到期的 feed，直到 stop() 或完成 cycles 轮"""
+        completed = 0
+        while not self._stop.is_set() and (cycles is None or completed < cycles):
+            now = time.time()
+            due = self.due_feeds(now)
+            if due:
+                self.poll(due, now)
+                completed += 1
+                if on_cycle is not None:
+                    on_cycle()
+                continue
+            wait = self.seconds_until_next(now)
+            next_url = min(self.url_types, key=lambda url: self.state.feed(url).get('next_poll', 0))
+            print(f"下次轮询 {self.url_types[next_url][0]}: {wait / 60:.1f} 分钟后", file=sys.stderr)
+            self._stop.wait(wait)
+
+    def stop(self):
+        self._stop.set()
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog='watcher.py',
+                                     description='监视模式：自适应轮询 feed，只为新文章生成摘要并追加到滚动报告')
+    parser.add_argument('blog_type', nargs='?', default='all',
+                        help='博客类型，多个用逗号分隔 (默认: all)')
+    parser.add_argument('--report', default=DEFAULT_REPORT,
+                        help=f'滚动报告路径，可包含 strftime 格式 (默认: {DEFAULT_REPORT})')
+    parser.add_argument('--state', default=None,
+                        help='监视状态文件 (默认: ~/.cache/aws-blog-rss-analyzer/watch_state.json)')
+    parser.add_argument('--since', default=None,
+                        help='首次轮询时把该时间之后的文章视为新文章 (ISO 格式；默认只处理启动后发布的文章)')
+    parser.add_argument('--min-interval', type=float, default=DEFAULT_MIN_INTERVAL,
+                        help=f'最短轮询间隔，秒 (默认: {DEFAULT_MIN_INTERVAL})')
+    parser.add_argument('--max-interval', type=float, default=DEFAULT_MAX_INTERVAL,
+                        help=f'最长轮询间隔，秒 (默认: {DEFAULT_MAX_INTERVAL}；feed 的 ttl 提示优先)')
+    parser.add_argument('--once', action='store_true', help='轮询所有 feed 一次后退出')
+    parser.add_argument('--cycles', type=int, default=None, help='完成 N 轮轮询后退出')
+    parser.add_argument('--concurrency', type=int, default=2, help='摘要生成并发数 (默认: 2)')
+    parser.add_argument('--claude-rpm', type=float, default=None, help='Claude 3.7 Sonnet 请求速率上限，次/分钟')
+    parser.add_argument('--nova-rpm', type=float, default=None, help='Nova Lite 请求速率上限，次/分钟')
+    parser.add_argument('--backend', default=None, choices=['auto', 'boto3', 'cli', 'endpoint', 'stub'])
+    parser.add_argument('--no-cache', action='store_true', help='不使用摘要缓存')
+    parser.add_argument('--cache-path', default=None)
+    parser.add_argument('--no-archive', action='store_true', help='不写入本地文章归档')
+    parser.add_argument('--archive-path', default=None)
+    parser.add_argument('--metrics-prom', default=None, help='每轮轮询后写出 Prometheus textfile')
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(sys.argv[1:] if argv is None else argv)
+
+    import blog_analyzer
+    import pipeline
+
+    since = None
+    if args.since:
+        try:
+            since = parse_iso_datetime(args.since)
+        except ValueError as e:
+            print(f"--since 格式错误: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    parser = pipeline.create_parser(use_archive=not args.no_archive, archive_path=args.archive_path)
+    try:
+        url_types = parser.resolve_blog_types(pipeline.split_blog_types(args.blog_type))
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        parser.close()
+        sys.exit(1)
+
+    cache = None
+    if not args.no_cache:
+        from summary_cache import SummaryCache
+        try:
+            cache = SummaryCache(args.cache_path)
+        except Exception as e:
+            print(f"摘要缓存不可用，继续无缓存运行: {e}", file=sys.stderr)
+
+    blog_analyzer.configure_rate_limits(
+        args.claude_rpm or blog_analyzer.DEFAULT_CLAUDE_RPM,
+        args.nova_rpm or blog_analyzer.DEFAULT_NOVA_RPM,
+        args.concurrency
+    )
+    if args.backend:
+        from bedrock_backend import create_backend, set_backend
+        set_backend(create_backend(args.backend))
+
+    state = WatchState(args.state)
+    watcher = FeedWatcher(parser, url_types, state, RollingReport(args.report, state), cache=cache,
+                          concurrency=args.concurrency, since=since,
+                          min_interval=args.min_interval, max_interval=args.max_interval)
+
+    def export_metrics():
+        if not args.metrics_prom:
+            return
+        from metrics import get_metrics
+        try:
+            get_metrics().write_prometheus(args.metrics_prom)
+        except OSError as e:
+            print(f"指标写出失败: {args.metrics_prom}: {e}", file=sys.stderr)
+
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+    print(f"监视 {len(url_types)} 个 feed，报告写入 {args.report}", file=sys.stderr)
+    try:
+        if args.once:
+            watcher.poll(list(url_types))
+            export_metrics()
+        else:
+            watcher.run(args.cycles, on_cycle=export_metrics)
+    except KeyboardInterrupt:
+        print("已停止监视", file=sys.stderr)
+    finally:
+        state.save()
+        parser.close()
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()